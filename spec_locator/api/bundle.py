@@ -0,0 +1,121 @@
+"""
+多页面打包下载
+- zip：逐文件、逐块写入并立即输出，内存占用与文件数量无关
+- 合并 PDF：分批插入临时文件并增量保存，完成后分块输出并删除临时文件
+- 均为同步生成器，由 StreamingResponse 在线程池中迭代
+"""
+
+import logging
+import os
+import tempfile
+import time
+import zipfile
+from typing import Iterator, List
+
+import fitz  # PyMuPDF
+
+from spec_locator.database.file_index import SpecFile
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+# 合并 PDF 时每插入多少个文件增量保存一次（释放已插入页面占用的内存）
+MERGE_BATCH_SIZE = 20
+
+
+class _ChunkBuffer:
+    """供 zipfile 写入的不可定位输出流，按块取出已写入的数据"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(files: List[SpecFile]) -> Iterator[bytes]:
+    """
+    流式生成 zip（PDF 已压缩，使用 STORED 不再压缩）
+
+    Args:
+        files: 要打包的文件
+
+    Yields:
+        zip 数据块
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        for spec_file in files:
+            info = zipfile.ZipInfo(
+                f"{spec_file.spec_code}/{spec_file.file_name}",
+                date_time=time.localtime(spec_file.mtime or time.time())[:6],
+            )
+            with open(spec_file.file_path, "rb") as src, archive.open(info, "w") as dest:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                    dest.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+    # 中央目录
+    data = buffer.drain()
+    if data:
+        yield data
+
+
+def iter_merged_pdf(files: List[SpecFile], temp_dir: str) -> Iterator[bytes]:
+    """
+    流式生成合并后的 PDF
+
+    Args:
+        files: 要合并的文件（按顺序）
+        temp_dir: 临时文件目录
+
+    Yields:
+        PDF 数据块
+    """
+    fd, merged_path = tempfile.mkstemp(suffix=".pdf", dir=temp_dir)
+    os.close(fd)
+    try:
+        _merge_to_file(files, merged_path)
+        with open(merged_path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                yield chunk
+    finally:
+        try:
+            os.remove(merged_path)
+        except OSError:
+            pass
+
+
+def _merge_to_file(files: List[SpecFile], merged_path: str):
+    """分批插入并增量保存，避免整个合并文档常驻内存"""
+    doc = fitz.open()
+    saved = False
+    try:
+        for i, spec_file in enumerate(files, 1):
+            with fitz.open(spec_file.file_path) as src:
+                doc.insert_pdf(src)
+            if i % MERGE_BATCH_SIZE == 0 or i == len(files):
+                if saved:
+                    doc.saveIncr()
+                else:
+                    doc.save(merged_path)
+                    saved = True
+                doc.close()
+                doc = fitz.open(merged_path) if i < len(files) else None
+    finally:
+        if doc is not None:
+            doc.close()
@@ -0,0 +1,206 @@
+"""
+预派生（pre-fork）多进程服务
+- 主进程先创建 Pipeline（文件索引等），再 fork 出多个 uvicorn 工作进程
+- 工作进程继承主进程内存，以写时复制方式共享，不再各自扫描数据目录
+- 所有工作进程共享主进程创建的监听套接字，由内核分发连接
+- 主进程负责监控，工作进程异常退出时重新派生；收到 SIGTERM/SIGINT 时通知工作进程退出
+- OCR 模型（onnx / paddle 的推理线程池不能跨 fork 使用）由工作进程派生后各自加载，见 server.preload_pipeline
+
+使用方法：
+    API_PREFORK=true python -m spec_locator.api.server
+    python -m spec_locator.api.prefork --workers 4
+
+仅支持提供 os.fork 的平台（Linux / macOS）。
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 工作进程存活不足该时长即退出视为启动失败（秒）
+MIN_WORKER_LIFETIME = 5.0
+
+# 连续启动失败次数达到 工作进程数 × 该值 时主进程放弃并退出
+MAX_FAILED_STARTS_PER_WORKER = 3
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """创建供所有工作进程共享的监听套接字"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+    """预派生多进程服务主进程"""
+
+    def __init__(
+        self,
+        app: Any,
+        host: str = "0.0.0.0",
+        port: int = 8000,
+        workers: int = 4,
+        preload: Optional[Callable[[], None]] = None,
+        log_level: str = "info",
+        sock: Optional[socket.socket] = None,
+    ):
+        """
+        Args:
+            app: ASGI 应用
+            host: 监听地址
+            port: 监听端口
+            workers: 工作进程数
+            preload: 派生前在主进程中执行的预加载函数（创建 Pipeline）
+            log_level: uvicorn 日志级别
+            sock: 已创建的监听套接字（为 None 时在预加载完成后绑定 host:port）
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.preload = preload
+        self.log_level = log_level
+        self.sock = sock
+
+        self._children: Dict[int, float] = {}  # pid -> 启动时间
+        self._stopping = False
+        self._failed_starts = 0
+
+    def run(self) -> int:
+        """
+        预加载、派生工作进程并监控，直到收到退出信号
+
+        Returns:
+            进程退出码
+        """
+        if not hasattr(os, "fork"):
+            raise RuntimeError("当前平台不支持 os.fork，无法使用预派生模式")
+
+        if self.preload is not None:
+            start = time.time()
+            logger.info("主进程预加载模型...")
+            self.preload()
+            logger.info(f"✓ 主进程预加载完成，用时 {time.time() - start:.1f}s")
+
+        # 预加载完成后再开始监听，就绪前不接受连接
+        if self.sock is None:
+            self.sock = bind_socket(self.host, self.port)
+        address = self.sock.getsockname()
+        logger.info(f"预派生模式: 监听 {address[0]}:{address[1]}，工作进程 {self.workers} 个")
+
+        # 冻结已有对象，避免子进程中的垃圾回收扫描触碰共享页面导致写时复制
+        gc.collect()
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        for _ in range(self.workers):
+            self._spawn()
+        return self._supervise()
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker()
+            except BaseException:  # noqa: BLE001 - 子进程不能把异常抛回主进程的代码路径
+                logger.exception("工作进程异常退出")
+                code = 1
+            finally:
+                logging.shutdown()
+                os._exit(code)
+        self._children[pid] = time.monotonic()
+        logger.info(f"派生工作进程 pid={pid}")
+
+    def _run_worker(self):
+        """子进程：在共享套接字上运行 uvicorn"""
+        import uvicorn
+
+        # 恢复默认信号处理，由 uvicorn 安装自己的处理函数
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+        config = uvicorn.Config(self.app, log_level=self.log_level)
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def _handle_stop(self, signum, _frame):
+        if not self._stopping:
+            logger.info(f"收到信号 {signum}，通知工作进程退出")
+        self._stopping = True
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _supervise(self) -> int:
+        """等待工作进程退出，非主动退出时重新派生"""
+        while self._children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self._children.pop(pid, None)
+            if started is None or self._stopping:
+                continue
+
+            code = os.waitstatus_to_exitcode(status)
+            logger.warning(f"工作进程 pid={pid} 意外退出（exit={code}），重新派生")
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                self._failed_starts += 1
+                if self._failed_starts >= self.workers * MAX_FAILED_STARTS_PER_WORKER:
+                    logger.error("工作进程反复启动失败，主进程退出")
+                    self._handle_stop(signal.SIGTERM, None)
+                    continue
+            else:
+                self._failed_starts = 0
+            self._spawn()
+
+        self.sock.close()
+        logger.info("✓ 所有工作进程已退出")
+        return 1 if self._failed_starts >= self.workers * MAX_FAILED_STARTS_PER_WORKER else 0
+
+
+def main(argv=None) -> int:
+    """命令行入口：以预派生模式启动规范定位服务"""
+    from spec_locator.config import APIConfig, LOG_LEVEL
+
+    parser = argparse.ArgumentParser(description="以预派生模式启动 Spec Locator 服务（主进程加载模型，工作进程共享）")
+    parser.add_argument("--host", default=APIConfig.HOST, help="监听地址")
+    parser.add_argument("--port", type=int, default=APIConfig.PORT, help="监听端口")
+    parser.add_argument("--workers", type=int, default=APIConfig.WORKERS, help="工作进程数")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=getattr(logging, LOG_LEVEL.upper(), logging.INFO),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    from spec_locator.api import server
+
+    return PreforkServer(
+        server.app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        preload=server.preload_pipeline,
+        log_level=LOG_LEVEL.lower(),
+    ).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
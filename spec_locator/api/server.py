@@ -6,37 +6,132 @@ HTTP API 服务层
 - 统一封装返回结果与错误码
 """
 
+import asyncio
+import concurrent.futures
+import io
+import json
 import logging
 import os
 import tempfile
-import hashlib
 import time
-from typing import Optional
+import zipfile
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional, List
 from contextlib import asynccontextmanager
-from threading import Thread
+from threading import Event, Lock, Thread
 import cv2
 import numpy as np
-import fitz  # PyMuPDF
 
 try:
-    from fastapi import FastAPI, File, UploadFile, HTTPException, Query  # 添加Query
-    from fastapi.responses import JSONResponse, FileResponse
+    from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Request, Header, Path  # 添加Query
+    from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, Response
+    from fastapi.concurrency import run_in_threadpool
     from fastapi.middleware.cors import CORSMiddleware
     from fastapi.staticfiles import StaticFiles
 except ImportError:
     raise ImportError("FastAPI is required. Install with: pip install fastapi uvicorn")
 
-from spec_locator.config import APIConfig, ErrorCode, ERROR_MESSAGES, PathConfig, LOG_LEVEL, OCRConfig, LLMConfig  # 添加LLMConfig
-from spec_locator.core import SpecLocatorPipeline
+from spec_locator.config import APIConfig, ErrorCode, ERROR_MESSAGES, PathConfig, LOG_LEVEL, OCRConfig, LLMConfig, CacheConfig, PreviewConfig, SearchConfig  # 添加LLMConfig
+from spec_locator.core import (
+    SpecLocatorPipeline,
+    ResultCache,
+    image_digest,
+    NearDuplicateIndex,
+    callout_signature,
+    perceptual_hash,
+)
+from spec_locator.core import metrics
+from spec_locator.api.worker_pool import RecognitionPool, PoolFullError
+from spec_locator.ocr import OCREnginePool
+from spec_locator.api.singleflight import SingleFlight
+from spec_locator.preview import (
+    MEDIA_TYPES,
+    DocumentPool,
+    DocumentUnavailableError,
+    PageOutOfRangeError,
+    PreviewCache,
+    PreviewPrefetcher,
+    TileOutOfRangeError,
+    page_geometry,
+    preview_key,
+    render_page,
+    render_tile,
+    tile_grid,
+    tile_key,
+    tile_scale,
+)
+from spec_locator.api.upload_limit import UploadSizeLimitMiddleware
+from spec_locator.api.bundle import iter_merged_pdf, iter_zip
+from spec_locator.search import SearchIndex
 
 logger = logging.getLogger(__name__)
 
 # 全局变量：延迟初始化
 pipeline = None
+recognition_pool = None
+result_cache = None
+near_duplicate_index = None
+preview_cache = None
+preview_prefetcher = None
+preview_documents = None
+search_index = None
+search_index_lock = Lock()
+# OCR 预热状态："disabled"（未启用预热，懒加载）| "warming" | "ready" | "failed"
+warmup_status = "disabled"
+# 预派生模式下由主进程预加载 Pipeline
+pipeline_preloaded = False
+
+# 进行中的识别请求合并器
+recognition_flight = SingleFlight()
+# 进行中的预览渲染合并器（相同 spec_code/page_code/page_number/dpi 只渲染一次）
+preview_flight = SingleFlight()
+
+
+def _pool_stat(name: str):
+    """执行池状态采集回调（服务未启动时不输出）"""
+    return lambda: recognition_pool.stats()[name] if recognition_pool else None
+
+
+metrics.REGISTRY.gauge(
+    "spec_locator_recognition_queue_depth",
+    "Recognition jobs waiting for a worker.",
+    callback=_pool_stat("queue_depth"),
+)
+metrics.REGISTRY.gauge(
+    "spec_locator_recognition_active",
+    "Recognition jobs currently running.",
+    callback=_pool_stat("active"),
+)
+metrics.REGISTRY.gauge(
+    "spec_locator_recognition_rejected",
+    "Recognition jobs rejected because the pool was full (since start).",
+    callback=_pool_stat("rejected"),
+)
+metrics.REGISTRY.gauge(
+    "spec_locator_recognition_in_flight",
+    "Distinct recognitions in flight after request coalescing.",
+    callback=lambda: recognition_flight.in_flight(),
+)
+
+metrics.REGISTRY.gauge(
+    "spec_locator_preview_cache_hit_ratio",
+    "PDF page preview cache hit ratio (memory + disk) since start.",
+    callback=lambda: preview_cache.hit_ratio() if preview_cache else None,
+)
+metrics.REGISTRY.gauge(
+    "spec_locator_preview_cache_memory_bytes",
+    "Bytes held by the in-memory preview tier.",
+    callback=lambda: preview_cache.memory_size() if preview_cache else None,
+)
+metrics.REGISTRY.gauge(
+    "spec_locator_preview_cache_disk_bytes",
+    "Bytes held by the on-disk preview tier.",
+    callback=lambda: preview_cache.disk_size() if preview_cache else None,
+)
 
 # PDF预览缓存目录
-PREVIEW_CACHE_DIR = os.path.join(PathConfig.TEMP_DIR, "pdf_previews")
-PREVIEW_CACHE_MAX_AGE = 3600  # 缓存1小时
+PREVIEW_CACHE_DIR = PreviewConfig.CACHE_DIR
+PREVIEW_CACHE_MAX_AGE = PreviewConfig.CACHE_MAX_AGE
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -46,15 +141,23 @@ async def lifespan(app: FastAPI):
     - shutdown: 清理资源
     """
     # 启动时
-    global pipeline
+    global pipeline, recognition_pool, result_cache, near_duplicate_index, preview_cache, preview_prefetcher, preview_documents
+    global warmup_status
     logger.info("Spec Locator Service 启动中...")
     
     # 确保必要目录存在
     PathConfig.ensure_dirs()
     
-    # 创建PDF预览缓存目录
-    os.makedirs(PREVIEW_CACHE_DIR, exist_ok=True)
+    # PDF预览缓存（内存热层 + 有上限的磁盘层）
+    preview_cache = PreviewCache(
+        cache_dir=PREVIEW_CACHE_DIR,
+        memory_bytes=PreviewConfig.MEMORY_BYTES,
+        disk_bytes=PreviewConfig.DISK_BYTES,
+        ttl=PreviewConfig.CACHE_TTL,
+    )
     logger.info(f"PDF预览缓存目录: {PREVIEW_CACHE_DIR}")
+    # 预览渲染复用已打开的 PDF 文档句柄
+    preview_documents = DocumentPool(max_documents=PreviewConfig.DOCUMENT_POOL_SIZE)
     
     # 验证数据目录
     try:
@@ -64,28 +167,74 @@ async def lifespan(app: FastAPI):
         logger.warning(str(e))
         logger.warning("数据目录不可用，文件查找功能将受限")
     
-    # 初始化 Pipeline（懒加载模式，支持LLM）
-    # 如果LLM已启用且配置正确，初始化为auto模式以支持LLM调用
-    initial_method = "auto" if (LLMConfig.ENABLED and LLMConfig.validate()) else "ocr"
-    pipeline = SpecLocatorPipeline(
-        lazy_ocr=OCRConfig.LAZY_LOAD,
-        recognition_method=initial_method
-    )
-    logger.info(f"✓ Pipeline 初始化完成（OCR 懒加载: {OCRConfig.LAZY_LOAD}, 识别方式: {initial_method}）")
+    if pipeline_preloaded:
+        # 预派生模式：主进程已建好文件索引，工作进程以写时复制方式共享；OCR 模型在派生后各自加载
+        initial_method = pipeline.recognition_method
+        logger.info(f"✓ 使用主进程预加载的 Pipeline（识别方式: {initial_method}）")
+        if warmup_status == "disabled" and OCRConfig.WARMUP_ON_STARTUP:
+            warmup_status = "warming"
+            Thread(target=_warmup_pipeline, daemon=True).start()
+    else:
+        pipeline, initial_method = _create_pipeline()
+
+        # 可选：后台异步预热 OCR（不阻塞启动）
+        if OCRConfig.WARMUP_ON_STARTUP:
+            # 在后台线程中预热，完成前 /health 返回 503
+            warmup_status = "warming"
+            warmup_thread = Thread(target=_warmup_pipeline, daemon=True)
+            warmup_thread.start()
     
-    # 可选：后台异步预热 OCR（不阻塞启动）
-    if OCRConfig.WARMUP_ON_STARTUP:
-        def warmup_in_background():
-            try:
-                logger.info("后台预热 OCR 模型...")
-                pipeline.warmup()
-                logger.info("✓ OCR 模型预热完成")
-            except Exception as e:
-                logger.error(f"OCR 预热失败: {e}")
-        
-        # 在后台线程中预热
-        warmup_thread = Thread(target=warmup_in_background, daemon=True)
-        warmup_thread.start()
+    # 创建识别执行池（识别在池中运行，不阻塞事件循环）
+    # 进程模式下每个子进程持有独立的 Pipeline
+    if APIConfig.RECOGNITION_EXECUTOR == "process":
+        recognition_pool = RecognitionPool(
+            max_workers=APIConfig.RECOGNITION_WORKERS,
+            queue_size=APIConfig.RECOGNITION_QUEUE_SIZE,
+            executor="process",
+            initializer=_init_recognition_worker,
+            initargs=(initial_method,),
+        )
+    else:
+        recognition_pool = RecognitionPool(
+            max_workers=APIConfig.RECOGNITION_WORKERS,
+            queue_size=APIConfig.RECOGNITION_QUEUE_SIZE,
+            executor="thread",
+        )
+        if APIConfig.RECOGNITION_WORKERS < OCRConfig.REPLICAS:
+            logger.warning(
+                f"API_RECOGNITION_WORKERS ({APIConfig.RECOGNITION_WORKERS}) 小于 OCR_REPLICAS ({OCRConfig.REPLICAS})，"
+                f"多余的 OCR 副本不会被用到"
+            )
+    
+    # 识别结果缓存
+    if CacheConfig.ENABLED:
+        result_cache = ResultCache(
+            max_entries=CacheConfig.MAX_ENTRIES,
+            ttl=CacheConfig.TTL,
+            disk_path=CacheConfig.DISK_PATH if CacheConfig.DISK_ENABLED else None,
+        )
+    if CacheConfig.ENABLED and CacheConfig.NEAR_DUP_ENABLED:
+        near_duplicate_index = NearDuplicateIndex(
+            max_distance=CacheConfig.NEAR_DUP_MAX_DISTANCE,
+            min_confidence=CacheConfig.NEAR_DUP_MIN_CONFIDENCE,
+            max_entries=CacheConfig.NEAR_DUP_MAX_ENTRIES,
+            ttl=CacheConfig.TTL,
+        )
+    
+    # 相邻页面预览预取（低优先级后台线程，前台有识别任务时暂停）
+    if PreviewConfig.PREFETCH_ENABLED:
+        preview_prefetcher = PreviewPrefetcher(
+            file_index=pipeline.file_index,
+            cache=preview_cache,
+            render=_prefetch_renderer(asyncio.get_running_loop()),
+            neighbors=PreviewConfig.PREFETCH_NEIGHBORS,
+            dpi=PreviewConfig.PREFETCH_DPI,
+            fmt=PreviewConfig.PREFETCH_FORMAT,
+            quality=PreviewConfig.QUALITY,
+            queue_size=PreviewConfig.PREFETCH_QUEUE_SIZE,
+            interval=PreviewConfig.PREFETCH_INTERVAL_MS / 1000,
+            busy=lambda: recognition_pool is not None and recognition_pool.stats()["active"] > 0,
+        )
     
     logger.info("✓ Spec Locator Service 启动完成")
     
@@ -93,8 +242,104 @@ async def lifespan(app: FastAPI):
     
     # 关闭时
     logger.info("Spec Locator Service 关闭中...")
+    if preview_prefetcher is not None:
+        preview_prefetcher.shutdown()
+    if preview_documents is not None:
+        preview_documents.clear()
+    if search_index is not None:
+        search_index.close()
+    if recognition_pool is not None:
+        recognition_pool.shutdown(wait=False)
+    if result_cache is not None:
+        result_cache.close()
     logger.info("✓ Spec Locator Service 已关闭")
 
+def _create_pipeline(lazy_ocr: bool = None):
+    """
+    初始化 Pipeline（懒加载模式，支持LLM）
+
+    Args:
+        lazy_ocr: 是否懒加载 OCR 模型，默认使用配置 OCR_LAZY_LOAD
+
+    Returns:
+        (Pipeline, 默认识别方式)
+    """
+    # 如果LLM已启用且配置正确，初始化为auto模式以支持LLM调用
+    initial_method = "auto" if (LLMConfig.ENABLED and LLMConfig.validate()) else "ocr"
+    if lazy_ocr is None:
+        lazy_ocr = OCRConfig.LAZY_LOAD
+    created = SpecLocatorPipeline(
+        lazy_ocr=lazy_ocr,
+        recognition_method=initial_method
+    )
+    logger.info(f"✓ Pipeline 初始化完成（OCR 懒加载: {lazy_ocr}, 识别方式: {initial_method}）")
+    return created, initial_method
+
+
+def _warmup_pipeline():
+    """加载 OCR 模型并更新预热状态"""
+    global warmup_status
+    warmup_status = "warming"
+    try:
+        logger.info("预热 OCR 模型...")
+        pipeline.warmup()
+        warmup_status = "ready"
+        logger.info("✓ OCR 模型预热完成")
+    except Exception as e:
+        warmup_status = "failed"
+        logger.error(f"OCR 预热失败: {e}")
+
+
+def preload_pipeline():
+    """
+    预派生模式的主进程钩子：在派生工作进程之前创建 Pipeline（文件索引等）
+
+    工作进程继承主进程内存（写时复制共享），lifespan 中直接复用，不再各自扫描数据目录。
+
+    OCR 模型不在主进程中加载：onnxruntime 的推理线程池、Paddle 的 OpenMP/MKL 线程池
+    在 fork 出的子进程中都不会重建，继承已初始化的引擎推理可能挂起。
+    模型由各工作进程派生后自行加载（OCR_WARMUP_ON_STARTUP 时在 lifespan 中预热）。
+    """
+    global pipeline, pipeline_preloaded
+    PathConfig.ensure_dirs()
+    pipeline, _ = _create_pipeline(lazy_ocr=True)
+    pipeline_preloaded = True
+
+
+def _init_recognition_worker(recognition_method: str):
+    """进程池子进程初始化：在子进程中创建独立的 Pipeline（子进程只做识别，不采集文件元数据）"""
+    global pipeline
+    pipeline = SpecLocatorPipeline(
+        lazy_ocr=OCRConfig.LAZY_LOAD,
+        recognition_method=recognition_method,
+        collect_metadata=False,
+    )
+    if OCRConfig.WARMUP_ON_STARTUP:
+        pipeline.warmup()
+
+
+def _run_recognition(image: np.ndarray, method: str):
+    """
+    在执行池中运行识别（线程模式使用主进程 Pipeline，进程模式使用子进程 Pipeline）
+
+    Returns:
+        (结果, 请求追踪)，追踪在主进程中汇总到指标
+    """
+    with metrics.trace(method) as request_trace:
+        result = pipeline.process(image, method=method)
+    return result, request_trace
+
+
+def _run_batch_item(contents: bytes, method: str):
+    """在执行池中解码并识别单个批量条目"""
+    image = _decode_image(contents)
+    if image is None:
+        return _error_content(ErrorCode.INVALID_FILE), None
+    result, request_trace = _run_recognition(image, method)
+    result.pop("callout_bbox", None)  # 内部字段，不返回给客户端
+    return result, request_trace
+
+
 # 初始化 FastAPI 应用
 app = FastAPI(
     title="Spec Locator Service",
@@ -112,6 +357,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 上传大小限制：在解析 multipart 之前拒绝超限请求
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/api/spec-locate": APIConfig.MAX_UPLOAD_SIZE + 64 * 1024,  # 预留 multipart 头部开销
+        "/api/spec-locate/raw": APIConfig.MAX_UPLOAD_SIZE,
+        "/api/spec-locate/batch": APIConfig.MAX_BATCH_UPLOAD_SIZE,
+    },
+)
+
+# 原始字节接口接受的 Content-Type
+RAW_UPLOAD_CONTENT_TYPES = {"application/octet-stream", "image/png", "image/jpeg"}
+
 # 挂载静态文件目录
 static_path = os.path.join(os.path.dirname(__file__), "static")
 if os.path.exists(static_path):
@@ -141,23 +399,54 @@ async def read_demo():
 
 @app.get("/health")
 def health_check():
-    """健康检查端点"""
+    """健康检查端点（OCR 预热进行中返回 503，可直接用作就绪探针）"""
     if pipeline is None:
         return {
             "status": "initializing",
             "message": "服务正在初始化中"
         }
+    if warmup_status == "warming":
+        return JSONResponse(
+            status_code=503,
+            content={
+                "status": "warming_up",
+                "ready": False,
+                "message": "OCR 模型预热中",
+            },
+        )
     
     stats = pipeline.file_index.get_stats()
     return {
         "status": "ok",
+        "ready": True,
+        "warmup": warmup_status,
+        "pid": os.getpid(),
         "index_stats": stats,
         "ocr_loaded": pipeline.ocr_engine._initialized,  # 显示OCR是否已加载
+        "ocr_pool": pipeline.ocr_engine.stats() if isinstance(pipeline.ocr_engine, OCREnginePool) else None,
         "llm_enabled": LLMConfig.ENABLED,  # 显示LLM是否启用
         "llm_configured": LLMConfig.validate(),  # 显示LLM是否正确配置
+        "recognition_pool": recognition_pool.stats() if recognition_pool else None,  # 执行池状态与队列深度
+        "in_flight_recognitions": recognition_flight.in_flight(),  # 合并后进行中的识别数
+        "in_flight_previews": preview_flight.in_flight(),  # 合并后进行中的预览渲染数
+        "result_cache": result_cache.stats() if result_cache else None,
+        "near_duplicate_index": near_duplicate_index.stats() if near_duplicate_index else None,
+        "preview_cache": preview_cache.stats() if preview_cache else None,
+        "preview_prefetch": preview_prefetcher.stats() if preview_prefetcher else None,
+        "preview_documents": preview_documents.stats() if preview_documents else None,
+        "search_index": search_index.stats() if search_index else None,
     }
 
 
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus 指标端点"""
+    return Response(
+        content=metrics.REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @app.post("/api/spec-locate")
 async def locate_spec(
     file: UploadFile = File(...),
@@ -165,7 +454,8 @@ async def locate_spec(
         default="ocr",
         pattern="^(ocr|llm|auto)$",
         description="识别方式: ocr-OCR识别, llm-大模型识别, auto-智能切换"
-    )
+    ),
+    timings: bool = Query(default=False, description="是否在响应中返回各阶段耗时（毫秒）"),
 ):
     """
     规范定位识别接口（支持多种识别方式）
@@ -175,11 +465,12 @@ async def locate_spec(
     Args:
         file: CAD 截图文件
         method: 识别方式 (ocr/llm/auto)
+        timings: 为 True 时响应附带 timings 字段及 Server-Timing 响应头
 
     Returns:
         JSON 响应
     """
-    if pipeline is None:
+    if pipeline is None or recognition_pool is None:
         raise HTTPException(status_code=503, detail="服务正在初始化中，请稍后重试")
     
     try:
@@ -189,37 +480,73 @@ async def locate_spec(
 
         # 检查文件扩展名
         filename = file.filename.lower()
-        if not any(filename.endswith(ext) for ext in APIConfig.ALLOWED_EXTENSIONS):
+        if not _allowed_file(filename):
             return _error_response(ErrorCode.INVALID_FILE)
 
-        # 检查文件大小
-        contents = await file.read()
-        if len(contents) > APIConfig.MAX_UPLOAD_SIZE:
+        # 检查文件大小（分块读取，超出上限立即停止）
+        contents = await _read_upload_capped(file, APIConfig.MAX_UPLOAD_SIZE)
+        if contents is None:
             raise HTTPException(status_code=413, detail="File too large")
 
-        # 2. 读取图像
-        try:
-            nparr = np.frombuffer(contents, np.uint8)
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        return await _locate_contents(contents, filename, method, timings)
 
-            if image is None:
-                return _error_response(ErrorCode.INVALID_FILE)
-        except Exception as e:
-            logger.error(f"Failed to decode image: {e}")
+    except HTTPException as e:
+        logger.error(f"HTTP exception: {e}")
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "success": False,
+                "error_code": "INVALID_REQUEST",
+                "message": e.detail,
+            },
+        )
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}", exc_info=True)
+        return _error_response(ErrorCode.INTERNAL_ERROR)
+
+
+@app.post("/api/spec-locate/raw")
+async def locate_spec_raw(
+    request: Request,
+    method: str = Query(
+        default="ocr",
+        pattern="^(ocr|llm|auto)$",
+        description="识别方式: ocr-OCR识别, llm-大模型识别, auto-智能切换"
+    ),
+    timings: bool = Query(default=False, description="是否在响应中返回各阶段耗时（毫秒）"),
+):
+    """
+    规范定位识别接口（原始字节版本）
+
+    请求体直接为图片字节（Content-Type: application/octet-stream 或 image/png、image/jpeg），
+    省去 multipart 解析与拷贝，供内部 CAD 插件客户端使用。返回格式与 /api/spec-locate 相同。
+
+    Args:
+        request: 请求对象（请求体为图片字节）
+        method: 识别方式 (ocr/llm/auto)
+        timings: 为 True 时响应附带 timings 字段及 Server-Timing 响应头
+
+    Returns:
+        JSON 响应
+    """
+    if pipeline is None or recognition_pool is None:
+        raise HTTPException(status_code=503, detail="服务正在初始化中，请稍后重试")
+
+    try:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type not in RAW_UPLOAD_CONTENT_TYPES:
             return _error_response(ErrorCode.INVALID_FILE)
 
-        # 3. 根据method参数设置识别方式
-        original_method = pipeline.recognition_method
-        pipeline.recognition_method = method
-        
-        # 4. 调用流水线处理
-        logger.info(f"Processing file: {filename} with method: {method}")
-        result = pipeline.process(image)
-        
-        # 恢复原始设置
-        pipeline.recognition_method = original_method
+        # 分块读取请求体，超出上限立即停止
+        contents = bytearray()
+        async for chunk in request.stream():
+            contents.extend(chunk)
+            if len(contents) > APIConfig.MAX_UPLOAD_SIZE:
+                raise HTTPException(status_code=413, detail="File too large")
+        if not contents:
+            raise HTTPException(status_code=400, detail="Empty request body")
 
-        return JSONResponse(content=result)
+        return await _locate_contents(contents, "(raw)", method, timings)
 
     except HTTPException as e:
         logger.error(f"HTTP exception: {e}")
@@ -236,14 +563,314 @@ async def locate_spec(
         return _error_response(ErrorCode.INTERNAL_ERROR)
 
 
+async def _locate_contents(contents, filename: str, method: str, timings: bool):
+    """
+    解码上传内容并执行识别（multipart 与原始字节两种入口共用）
+
+    Args:
+        contents: 图片字节（bytes 或 bytearray，解码时不再拷贝）
+        filename: 文件名（仅用于日志）
+        method: 识别方式
+        timings: 是否返回各阶段耗时
+    """
+    try:
+        # API 层阶段计时（与流水线阶段一起汇总到 /metrics，可选返回给调用方）
+        request_trace = metrics.RequestTrace(method)
+
+        # 2. 读取图像
+        with request_trace.stage("decode"):
+            image = await run_in_threadpool(_decode_image, contents)
+        if image is None:
+            return _error_response(ErrorCode.INVALID_FILE)
+
+        # 3. 查询结果缓存（键：图像内容哈希 + 识别方式 + 流水线配置版本）
+        with request_trace.stage("cache_lookup"):
+            digest = await run_in_threadpool(image_digest, image)
+            cache_key = None
+            cached = None
+            if result_cache is not None:
+                cache_key = result_cache.make_key(digest, method, pipeline.config_version)
+                cached, tier = await run_in_threadpool(result_cache.get, cache_key)
+                metrics.CACHE_LOOKUPS.inc(tier="exact", result="hit" if cached is not None else "miss")
+        if cached is not None:
+            logger.info(f"Result cache hit ({tier}): {filename} with method: {method}")
+            cached["cache_hit"] = True
+            cached["cache_tier"] = tier
+            _schedule_prefetch(cached)
+            return _locate_response(cached, request_trace, timings)
+
+        # 4. 查询近似重复截图（裁剪偏移、压缩差异导致内容哈希不同）
+        phash = None
+        phash_scope = f"{method}:{pipeline.config_version}"
+        if near_duplicate_index is not None:
+            with request_trace.stage("cache_lookup"):
+                phash = await run_in_threadpool(perceptual_hash, image)
+                similar, distance = await run_in_threadpool(near_duplicate_index.lookup, phash, phash_scope, image)
+            metrics.CACHE_LOOKUPS.inc(tier="near_duplicate", result="hit" if similar is not None else "miss")
+            if similar is not None:
+                logger.info(f"Near-duplicate hit (distance={distance}): {filename} with method: {method}")
+                similar["cache_hit"] = True
+                similar["cache_tier"] = "near_duplicate"
+                similar["near_duplicate_distance"] = distance
+                _schedule_prefetch(similar)
+                return _locate_response(similar, request_trace, timings)
+
+        # 5. 在执行池中调用流水线处理（不阻塞事件循环）
+        # 相同图像 + 识别方式的并发请求合并为一次计算（重试、双击等场景）
+        logger.info(f"Processing file: {filename} with method: {method}")
+        with request_trace.stage("recognition"):  # 含排队等待
+            (result, pipeline_trace), shared = await recognition_flight.do(
+                (digest, method),
+                lambda: _recognize_and_remember(image, method, cache_key, phash, phash_scope),
+            )
+        if shared:
+            logger.info(f"Joined in-flight recognition: {filename} with method: {method}")
+
+        metrics.observe_result(result)
+        result = dict(result)  # 合并请求共享同一结果对象，响应字段单独添加
+        result["cache_hit"] = False
+
+        _schedule_prefetch(result)
+        return _locate_response(result, request_trace, timings, pipeline_trace)
+
+    except PoolFullError as e:
+        logger.warning(f"Recognition pool full, rejecting request: {e}")
+        metrics.ERRORS.inc(error_code="SERVER_BUSY")
+        return _busy_response()
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}", exc_info=True)
+        return _error_response(ErrorCode.INTERNAL_ERROR)
+
+
+def _schedule_prefetch(result: dict):
+    """识别成功且找到 PDF 时，提交命中页面及相邻页面的预览预取"""
+    if preview_prefetcher is None or not result.get("success") or not result.get("file"):
+        return
+    preview_prefetcher.submit(result["spec"]["code"], result["file"]["path"])
+
+
+def _locate_response(result: dict, request_trace, include_timings: bool, pipeline_trace=None):
+    """
+    生成识别响应，并记录 API 层阶段耗时
+
+    Args:
+        result: 识别结果
+        request_trace: API 层请求追踪（decode / cache_lookup / recognition）
+        include_timings: 是否返回 timings 字段与 Server-Timing 响应头
+        pipeline_trace: 流水线阶段追踪（已在识别完成时汇总到指标）
+    """
+    metrics.observe_trace(request_trace)
+    if not include_timings:
+        return JSONResponse(content=result)
+
+    if pipeline_trace is not None:
+        request_trace.stages.update(pipeline_trace.stages)
+    result["timings"] = request_trace.timings_ms()
+    return JSONResponse(
+        content=result,
+        headers={
+            "Server-Timing": request_trace.server_timing(),
+            "Timing-Allow-Origin": "*",  # 允许跨域页面读取计时
+        },
+    )
+
+
+async def _recognize_and_remember(image, method, cache_key, phash, phash_scope):
+    """在执行池中识别，并将可缓存的结果写入结果缓存与近似重复索引"""
+    result, request_trace = await recognition_pool.run(_run_recognition, image, method)
+    metrics.observe_trace(request_trace)
+    # 标注区域只用于近似重复核对，不写入缓存、不返回给客户端
+    callout_bbox = result.pop("callout_bbox", None)
+
+    if _is_cacheable(result):
+        if cache_key is not None:
+            await run_in_threadpool(result_cache.put, cache_key, result)
+        # 只收录能核对标注区域的结果（整图哈希分辨不出只差一个字符的标注）
+        if phash is not None and callout_bbox:
+            signature = await run_in_threadpool(callout_signature, image, callout_bbox)
+            if signature is not None:
+                near_duplicate_index.add(phash, phash_scope, result, signature)
+    return result, request_trace
+
+
+@app.post("/api/spec-locate/batch")
+async def locate_spec_batch(
+    files: List[UploadFile] = File(..., description="多张 CAD 截图，或包含截图的 zip 压缩包"),
+    method: str = Query(
+        default="ocr",
+        pattern="^(ocr|llm|auto)$",
+        description="识别方式: ocr-OCR识别, llm-大模型识别, auto-智能切换"
+    )
+):
+    """
+    批量规范定位识别接口
+
+    接收多张 CAD 截图（multipart 多文件或 zip 压缩包），分发到识别执行池，
+    每完成一张即以 NDJSON 格式流式返回一行结果。单张失败不影响整个批次。
+
+    每行格式：{"index": 序号, "filename": 文件名, ...与 /api/spec-locate 相同的结果字段}
+
+    Args:
+        files: 图片文件列表或 zip 文件
+        method: 识别方式 (ocr/llm/auto)
+
+    Returns:
+        application/x-ndjson 流式响应
+    """
+    if pipeline is None or recognition_pool is None:
+        raise HTTPException(status_code=503, detail="服务正在初始化中，请稍后重试")
+
+    try:
+        items = await _collect_batch_items(files)
+    except zipfile.BadZipFile:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "success": False,
+                "error_code": "INVALID_REQUEST",
+                "message": "无效的 zip 文件",
+            },
+        )
+
+    if not items:
+        return _error_response(ErrorCode.INVALID_FILE)
+    if len(items) > APIConfig.MAX_BATCH_FILES:
+        return JSONResponse(
+            status_code=413,
+            content={
+                "success": False,
+                "error_code": "INVALID_REQUEST",
+                "message": f"Too many files: {len(items)} > {APIConfig.MAX_BATCH_FILES}",
+            },
+        )
+
+    logger.info(f"Processing batch: {len(items)} files with method: {method}")
+
+    # 每个批次最多同时占用 workers 个执行名额，避免挤占单张请求的队列
+    in_flight = asyncio.Semaphore(recognition_pool.max_workers)
+
+    async def _process_item(index: int, filename: str, loader):
+        async with in_flight:
+            try:
+                result = await _locate_batch_item(loader, method)
+            except Exception as e:
+                logger.error(f"Batch item failed: {filename}: {e}", exc_info=True)
+                result = _error_content(ErrorCode.INTERNAL_ERROR)
+        metrics.observe_result(result)
+        return {"index": index, "filename": filename, **result}
+
+    async def _stream():
+        tasks = [
+            asyncio.ensure_future(_process_item(index, filename, loader))
+            for index, (filename, loader) in enumerate(items)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                yield json.dumps(item, ensure_ascii=False) + "\n"
+        finally:
+            # 客户端断开时取消尚未开始的条目
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
+
+class _FileTooLarge(Exception):
+    """批量条目超过单文件大小限制"""
+
+
+async def _collect_batch_items(files: List[UploadFile]):
+    """
+    展开批量上传的文件列表
+
+    上传内容在返回流式响应之前读取：响应开始后框架可能已关闭上传文件
+    （取决于 FastAPI 版本），不能在流中再读。zip 条目仍在处理时才解压。
+
+    Returns:
+        [(filename, loader)]，loader 为返回条目内容的异步函数
+    """
+    items = []
+    for upload in files:
+        filename = upload.filename or ""
+        if filename.lower().endswith(".zip"):
+            archive = zipfile.ZipFile(io.BytesIO(await upload.read()))
+            for info in archive.infolist():
+                entry_name = info.filename
+                if info.is_dir() or entry_name.startswith("__MACOSX/"):
+                    continue
+                if not _allowed_file(entry_name):
+                    continue
+                items.append((entry_name, _zip_entry_loader(archive, info)))
+        else:
+            items.append((filename, await _upload_loader(upload)))
+    return items
+
+
+async def _upload_loader(upload: UploadFile):
+    allowed = _allowed_file(upload.filename or "")
+    contents = await _read_upload_capped(upload, APIConfig.MAX_UPLOAD_SIZE) if allowed else None
+
+    async def _load():
+        if not allowed:
+            return None
+        if contents is None:
+            raise _FileTooLarge()
+        return contents
+    return _load
+
+
+def _zip_entry_loader(archive: zipfile.ZipFile, info: zipfile.ZipInfo):
+    async def _load():
+        if info.file_size > APIConfig.MAX_UPLOAD_SIZE:
+            raise _FileTooLarge()
+        return await run_in_threadpool(archive.read, info)
+    return _load
+
+
+async def _locate_batch_item(loader, method: str):
+    """读取并识别单个批量条目，返回与 /api/spec-locate 相同结构的结果字典"""
+    try:
+        contents = await loader()
+    except _FileTooLarge:
+        return {
+            "success": False,
+            "error_code": "FILE_TOO_LARGE",
+            "message": "File too large",
+        }
+    if contents is None:
+        return _error_content(ErrorCode.INVALID_FILE)
+
+    # 执行池已满时短暂等待重试，超时后仅该条目返回繁忙
+    deadline = time.monotonic() + APIConfig.RETRY_AFTER_SECONDS
+    while True:
+        try:
+            result, request_trace = await recognition_pool.run(_run_batch_item, contents, method)
+            if request_trace is not None:
+                metrics.observe_trace(request_trace)
+            return result
+        except PoolFullError:
+            if time.monotonic() >= deadline:
+                return {
+                    "success": False,
+                    "error_code": "SERVER_BUSY",
+                    "message": "服务繁忙，识别队列已满，请稍后重试",
+                }
+            await asyncio.sleep(0.2)
+
+
 @app.get("/api/download/{spec_code}/{page_code}")
-def download_pdf(spec_code: str, page_code: str):
+def download_pdf(spec_code: str, page_code: str, request: Request):
     """
     下载PDF文件端点
 
+    使用索引中缓存的元数据：返回 ETag / Last-Modified，条件请求命中时返回 304，
+    支持 Range 断点续传。
+
     Args:
         spec_code: 规范编号（如 12J2）
         page_code: 页码（如 C11）
+        request: 请求对象（读取 If-None-Match / If-Modified-Since / Range）
 
     Returns:
         PDF文件
@@ -262,8 +889,10 @@ def download_pdf(spec_code: str, page_code: str):
                 },
             )
 
-        # 检查文件是否存在
-        if not os.path.exists(pdf_file.file_path):
+        # 每次请求 stat 一次：文件被删除时返回 404，被原地替换时不使用索引中的过期元数据
+        try:
+            file_stat = os.stat(pdf_file.file_path)
+        except OSError:
             logger.error(f"File not found on disk: {pdf_file.file_path}")
             return JSONResponse(
                 status_code=404,
@@ -274,11 +903,23 @@ def download_pdf(spec_code: str, page_code: str):
                 },
             )
 
-        # 返回文件
+        # 条件请求：内容未变化时返回 304
+        etag = _file_etag(pdf_file, file_stat)
+        validators = {
+            "ETag": etag,
+            "Last-Modified": formatdate(file_stat.st_mtime, usegmt=True),
+            "Cache-Control": "public, max-age=0, must-revalidate",
+        }
+        if _not_modified(request, etag, file_stat.st_mtime):
+            return Response(status_code=304, headers=validators)
+
+        # 返回文件（Range 请求由 FileResponse 处理）
         return FileResponse(
             path=pdf_file.file_path,
             filename=pdf_file.file_name,
             media_type="application/pdf",
+            headers=validators,
+            stat_result=file_stat,
         )
 
     except Exception as e:
@@ -293,12 +934,206 @@ def download_pdf(spec_code: str, page_code: str):
         )
 
 
+@app.get("/api/download-bundle")
+def download_bundle(
+    items: Optional[List[str]] = Query(default=None, description="规范编号:页码 列表，如 12J2:C11（可重复）"),
+    spec_code: Optional[str] = Query(default=None, description="页码范围下载：规范编号"),
+    start: Optional[str] = Query(default=None, description="页码范围下载：起始页码（含）"),
+    end: Optional[str] = Query(default=None, description="页码范围下载：结束页码（含）"),
+    bundle_format: str = Query(default="zip", alias="format", pattern="^(zip|pdf)$", description="打包格式 zip/pdf"),
+):
+    """
+    多页面打包下载
+
+    两种选择方式：
+    1. items=12J2:C11&items=12J2:C12 指定若干规范编号与页码
+    2. spec_code=12J2&start=C11&end=C20 下载同一图集中的一段页码（按页码自然顺序）
+
+    以 zip 或合并后的单个 PDF 流式返回，一次请求代替逐页下载。
+
+    Returns:
+        zip 或 PDF 文件流
+    """
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="服务正在初始化中，请稍后重试")
+
+    files = []
+    missing = []
+    if items:
+        for item in items:
+            code, sep, page = item.partition(":")
+            pdf_file = pipeline.file_index.find_file(code, page) if sep and code and page else None
+            if pdf_file is None:
+                missing.append(item)
+            elif pdf_file not in files:
+                files.append(pdf_file)
+    elif spec_code and start and end:
+        first = pipeline.file_index.find_file(spec_code, start)
+        last = pipeline.file_index.find_file(spec_code, end)
+        if first is None:
+            missing.append(f"{spec_code}:{start}")
+        if last is None:
+            missing.append(f"{spec_code}:{end}")
+        if first is not None and last is not None:
+            # 模糊匹配可能把起止页码解析到不同图集，范围无意义
+            if first.spec_code != last.spec_code:
+                return JSONResponse(
+                    status_code=400,
+                    content={
+                        "success": False,
+                        "error_code": "INVALID_REQUEST",
+                        "message": f"起止页码不在同一图集中: {first.spec_code}:{first.page_code} / {last.spec_code}:{last.page_code}",
+                    },
+                )
+            spec_files = pipeline.file_index.get_spec_files(first.spec_code)
+            lo, hi = sorted((spec_files.index(first), spec_files.index(last)))
+            files = spec_files[lo:hi + 1]
+    else:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "success": False,
+                "error_code": "INVALID_REQUEST",
+                "message": "请提供 items，或 spec_code + start + end",
+            },
+        )
+
+    if missing:
+        return JSONResponse(
+            status_code=404,
+            content={
+                "success": False,
+                "error_code": "FILE_NOT_FOUND",
+                "message": f"未找到 {len(missing)} 个页面对应的PDF文件",
+                "missing": missing,
+            },
+        )
+    if len(files) > APIConfig.MAX_BUNDLE_FILES:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "success": False,
+                "error_code": "INVALID_REQUEST",
+                "message": f"单次最多打包 {APIConfig.MAX_BUNDLE_FILES} 个文件",
+            },
+        )
+
+    label = files[0].spec_code if len({f.spec_code for f in files}) == 1 else "specs"
+    filename = f"{label}_{len(files)}_pages.{bundle_format}"
+    logger.info(f"Bundle download: {len(files)} files as {bundle_format}")
+    if bundle_format == "pdf":
+        content = iter_merged_pdf(files, PathConfig.TEMP_DIR)
+        media_type = "application/pdf"
+    else:
+        content = iter_zip(files)
+        media_type = "application/zip"
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    """判断条件请求是否可返回 304（If-None-Match 优先于 If-Modified-Since）"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since
+    return False
+
+
+def _file_etag(spec_file, file_stat: os.stat_result) -> str:
+    """
+    文件的 ETag：索引元数据与当前文件一致时使用内容哈希（强 ETag），
+    未采集元数据或文件在建索引后被替换时由大小与修改时间生成弱 ETag
+    """
+    if spec_file.has_metadata and (spec_file.size, spec_file.mtime) == (file_stat.st_size, file_stat.st_mtime):
+        return spec_file.etag
+    return f'W/"{file_stat.st_size:x}-{file_stat.st_mtime_ns:x}"'
+
+
+
+def _render_preview(cache_key: str, pdf_path: str, page_number: int, dpi: int, fmt: str, quality: int) -> bytes:
+    """渲染 PDF 页面并写入预览缓存（在线程池中执行）"""
+    image_bytes = render_page(pdf_path, page_number, dpi, fmt, quality, documents=preview_documents)
+    preview_cache.put(cache_key, image_bytes, fmt)
+    return image_bytes
+
+
+def _prefetch_renderer(loop: asyncio.AbstractEventLoop):
+    """
+    预取线程使用的渲染函数：在 preview_flight 中登记渲染，与前台预览请求合并
+
+    - 同一页面已有进行中的渲染（前台请求或其他预取）时等待其结果，不重复渲染
+    - 否则在预取线程（低优先级）中渲染，期间打开该页面的前台请求等待这次渲染
+    """
+    def render(cache_key: str, pdf_path: str, page_number: int, dpi: int, fmt: str, quality: int) -> bytes:
+        done: "concurrent.futures.Future[bytes]" = concurrent.futures.Future()
+        leader = Event()
+
+        def lead():
+            leader.set()
+            return asyncio.wrap_future(done)
+
+        async def claim() -> asyncio.Future:
+            waiter = asyncio.ensure_future(preview_flight.do(cache_key, lead))
+            await asyncio.sleep(0)  # 让 do() 执行到登记，成为首个调用者时 lead() 已被调用
+            return waiter
+
+        async def wait(waiter: asyncio.Future):
+            return await waiter
+
+        waiter = asyncio.run_coroutine_threadsafe(claim(), loop).result()
+        if leader.is_set():
+            try:
+                done.set_result(_render_preview(cache_key, pdf_path, page_number, dpi, fmt, quality))
+            except Exception as e:
+                done.set_exception(e)
+        image_bytes, _ = asyncio.run_coroutine_threadsafe(wait(waiter), loop).result()
+        return image_bytes
+
+    return render
+
+
+def _negotiate_preview_format(requested: Optional[str], accept: str) -> str:
+    """
+    确定预览图输出格式
+
+    优先使用 format 参数；未指定时根据 Accept 头协商：
+    支持 WebP 的客户端返回 WebP，只接受 JPEG 的客户端返回 JPEG，其余返回 PNG。
+    """
+    if requested:
+        return "jpeg" if requested == "jpg" else requested
+    accept = accept.lower()
+    if "image/webp" in accept:
+        return "webp"
+    if "image/jpeg" in accept and "image/png" not in accept and "image/*" not in accept:
+        return "jpeg"
+    return "png"
+
+
 @app.get("/api/pdf-page-preview")
 async def pdf_page_preview(
     spec_code: str = Query(..., description="规范编号，如 12J2"),
     page_code: str = Query(None, description="页码编号，如 C11, 1-11（推荐使用，确保与下载功能一致）"),
     page_number: int = Query(default=1, ge=1, description="PDF内部页码，从1开始，默认第1页"),
-    dpi: int = Query(default=150, ge=72, le=300, description="图片DPI质量，默认150")
+    dpi: int = Query(default=150, ge=72, le=300, description="图片DPI质量，默认150"),
+    image_format: Optional[str] = Query(
+        default=None,
+        alias="format",
+        pattern="^(png|jpeg|jpg|webp)$",
+        description="输出格式 png/jpeg/webp，不指定时根据 Accept 头协商"
+    ),
+    quality: int = Query(default=PreviewConfig.QUALITY, ge=1, le=100, description="JPEG/WebP 质量（1-100）"),
+    accept: str = Header(default=""),
 ):
     """
     PDF页面预览接口 - 将指定PDF页面转换为图片
@@ -312,6 +1147,8 @@ async def pdf_page_preview(
         page_code: 页码编号（如 C11, 1-11），用于定位具体的PDF文件（可选，推荐提供）
         page_number: PDF内部页码（从1开始），用于定位文件内的具体页面，默认为1
         dpi: 图片质量，默认150 DPI
+        image_format: 输出格式 png/jpeg/webp（查询参数 format，可选，默认按 Accept 头协商）
+        quality: 有损格式的质量，PNG 忽略
 
     Returns:
         图片文件
@@ -320,6 +1157,11 @@ async def pdf_page_preview(
         raise HTTPException(status_code=503, detail="服务正在初始化中，请稍后重试")
     
     try:
+        fmt = _negotiate_preview_format(image_format, accept)
+        headers = {"Cache-Control": f"public, max-age={PREVIEW_CACHE_MAX_AGE}"}
+        if image_format is None:
+            headers["Vary"] = "Accept"  # 响应格式随 Accept 变化，避免共享缓存串用
+
         # 1. 查找PDF文件
         pdf_file = None
         
@@ -358,8 +1200,8 @@ async def pdf_page_preview(
             pdf_file = spec_files[0]
             logger.info(f"向后兼容模式：使用第一个文件 {pdf_file.file_name}")
         
-        # 检查文件是否存在
-        if not pdf_file or not os.path.exists(pdf_file.file_path):
+        # 检查文件是否存在（已采集元数据时使用索引信息，不访问文件系统）
+        if not pdf_file or (not pdf_file.has_metadata and not os.path.exists(pdf_file.file_path)):
             logger.error(f"File not found on disk: {pdf_file.file_path if pdf_file else 'None'}")
             return JSONResponse(
                 status_code=404,
@@ -370,67 +1212,55 @@ async def pdf_page_preview(
                 }
             )
         
-        pdf_path = pdf_file.file_path
-        
-        # 2. 检查缓存
-        cache_key = f"{spec_code}_{page_code or 'default'}_{page_number}_{dpi}"
-        cache_hash = hashlib.md5(cache_key.encode()).hexdigest()
-        cache_file = os.path.join(PREVIEW_CACHE_DIR, f"{cache_hash}.png")
+        # 使用索引中的页数校验页码，无需打开 PDF（文件在建索引后变化时元数据已过期，交由渲染校验）
+        if pdf_file.page_count and page_number > pdf_file.page_count and _metadata_current(pdf_file):
+            return JSONResponse(
+                status_code=400,
+                content={
+                    "success": False,
+                    "error_code": "INVALID_PAGE_NUMBER",
+                    "message": f"页码超出范围，PDF共有 {pdf_file.page_count} 页",
+                    "total_pages": pdf_file.page_count
+                }
+            )
         
-        # 如果缓存存在且未过期，直接返回
-        if os.path.exists(cache_file):
-            cache_age = time.time() - os.path.getmtime(cache_file)
-            if cache_age < PREVIEW_CACHE_MAX_AGE:
-                logger.info(f"使用缓存: {cache_key}")
-                return FileResponse(
-                    path=cache_file,
-                    media_type="image/png",
-                    headers={"Cache-Control": f"public, max-age={PREVIEW_CACHE_MAX_AGE}"}
-                )
+        pdf_path = pdf_file.file_path
         
-        # 3. 转换PDF页面为图片
-        logger.info(f"转换PDF页面: {spec_code} {page_code or '(第一个文件)'} 第{page_number}页 (文件: {pdf_file.file_name}, DPI: {dpi})")
+        # 2. 检查缓存（内存热层 -> 磁盘层索引，不访问文件系统元数据）
+        # 键使用索引中解析出的规范编号与页码，与离线预渲染一致
+        cache_key = preview_key(pdf_file.spec_code, pdf_file.page_code, page_number, dpi, fmt, quality)
+        cached, tier = await run_in_threadpool(preview_cache.get, cache_key)
+        metrics.PREVIEW_CACHE_LOOKUPS.inc(result=tier or "miss")
+        if cached is not None:
+            logger.info(f"使用缓存({tier}): {cache_key}")
+            return Response(content=cached, media_type=MEDIA_TYPES[fmt], headers=headers)
         
+        # 3. 转换PDF页面为图片（在线程池中渲染；相同键的并发请求共享一次渲染）
         try:
-            doc = fitz.open(pdf_path)
-            
-            # 检查页码是否有效
-            if page_number < 1 or page_number > len(doc):
-                doc.close()
-                return JSONResponse(
-                    status_code=400,
-                    content={
-                        "success": False,
-                        "error_code": "INVALID_PAGE_NUMBER",
-                        "message": f"页码超出范围，PDF共有 {len(doc)} 页",
-                        "total_pages": len(doc)
-                    }
-                )
-            
-            # 获取指定页面（索引从0开始）
-            page = doc.load_page(page_number - 1)
-            
-            # 设置缩放比例（DPI转换为缩放因子）
-            zoom = dpi / 72  # 72是PDF的默认DPI
-            mat = fitz.Matrix(zoom, zoom)
-            
-            # 渲染为图片
-            pix = page.get_pixmap(matrix=mat, alpha=False)
-            
-            # 保存到缓存
-            pix.save(cache_file)
-            
-            doc.close()
-            
-            logger.info(f"PDF页面转换成功: {cache_file}")
-            
+            image_bytes, shared = await preview_flight.do(
+                cache_key,
+                lambda: run_in_threadpool(_render_preview, cache_key, pdf_path, page_number, dpi, fmt, quality),
+            )
+            if shared:
+                logger.info(f"复用进行中的渲染: {cache_key}")
+            else:
+                logger.info(f"PDF页面转换成功: {spec_code} {page_code or '(第一个文件)'} 第{page_number}页 (文件: {pdf_file.file_name}, DPI: {dpi}, 格式: {fmt})")
+
             # 返回图片
-            return FileResponse(
-                path=cache_file,
-                media_type="image/png",
-                headers={"Cache-Control": f"public, max-age={PREVIEW_CACHE_MAX_AGE}"}
+            return Response(content=image_bytes, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+        except PageOutOfRangeError as e:
+            return JSONResponse(
+                status_code=400,
+                content={
+                    "success": False,
+                    "error_code": "INVALID_PAGE_NUMBER",
+                    "message": str(e),
+                    "total_pages": e.total_pages
+                }
             )
-            
+        except DocumentUnavailableError as e:
+            return _document_unavailable_response(e)
         except Exception as e:
             logger.error(f"PDF转换失败: {e}", exc_info=True)
             return JSONResponse(
@@ -456,15 +1286,332 @@ async def pdf_page_preview(
         )
 
 
+def _metadata_current(spec_file) -> bool:
+    """索引中的元数据是否仍与磁盘上的文件一致（文件被删除或替换后为 False）"""
+    try:
+        file_stat = os.stat(spec_file.file_path)
+    except OSError:
+        return False
+    return (spec_file.size, spec_file.mtime) == (file_stat.st_size, file_stat.st_mtime)
+
+
+def _document_unavailable_response(error: DocumentUnavailableError) -> JSONResponse:
+    """PDF 在建索引后被删除或无法打开时的 404 响应"""
+    logger.error(f"PDF 不可用: {error}")
+    return JSONResponse(
+        status_code=404,
+        content={
+            "success": False,
+            "error_code": "FILE_NOT_FOUND",
+            "message": "文件在服务器上不存在或无法打开",
+        },
+    )
+
+
+def _find_tile_file(spec_code: str, page_code: str):
+    """查找瓦片接口对应的 PDF 文件，未找到返回 (None, 404 响应)"""
+    pdf_file = pipeline.file_index.find_file(spec_code, page_code)
+    if pdf_file is None or (not pdf_file.has_metadata and not os.path.exists(pdf_file.file_path)):
+        return None, JSONResponse(
+            status_code=404,
+            content={
+                "success": False,
+                "error_code": "FILE_NOT_FOUND",
+                "message": f"未找到 {spec_code} 页码 {page_code} 对应的PDF文件",
+            }
+        )
+    return pdf_file, None
+
+
+def _render_tile(cache_key: str, pdf_path: str, page_number: int, zoom: int, x: int, y: int, fmt: str, quality: int) -> bytes:
+    """渲染瓦片并写入预览缓存（在线程池中执行）"""
+    scale = tile_scale(zoom, PreviewConfig.TILE_MAX_ZOOM, PreviewConfig.TILE_MAX_DPI)
+    image_bytes = render_tile(
+        pdf_path, page_number, scale, x, y, PreviewConfig.TILE_SIZE, fmt, quality, documents=preview_documents
+    )
+    preview_cache.put(cache_key, image_bytes, fmt)
+    return image_bytes
+
+
+@app.get("/api/pdf-page-tiles/info")
+async def pdf_page_tiles_info(
+    spec_code: str = Query(..., description="规范编号，如 12J2"),
+    page_code: str = Query(..., description="页码编号，如 C11"),
+    page_number: int = Query(default=1, ge=1, description="PDF内部页码，从1开始"),
+):
+    """
+    瓦片金字塔信息 - 供前端深度缩放（地图式浏览）初始化
+
+    Returns:
+        页面尺寸、瓦片边长，以及每个缩放级别的 DPI、像素尺寸与行列数
+    """
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="服务正在初始化中，请稍后重试")
+
+    pdf_file, error = _find_tile_file(spec_code, page_code)
+    if error is not None:
+        return error
+    try:
+        geometry = await run_in_threadpool(page_geometry, pdf_file.file_path, page_number, preview_documents)
+    except PageOutOfRangeError as e:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "success": False,
+                "error_code": "INVALID_PAGE_NUMBER",
+                "message": str(e),
+                "total_pages": e.total_pages,
+            }
+        )
+    except DocumentUnavailableError as e:
+        return _document_unavailable_response(e)
+
+    tile_size = PreviewConfig.TILE_SIZE
+    levels = []
+    for zoom in range(PreviewConfig.TILE_MAX_ZOOM + 1):
+        scale = tile_scale(zoom, PreviewConfig.TILE_MAX_ZOOM, PreviewConfig.TILE_MAX_DPI)
+        columns, rows = tile_grid(geometry["width"], geometry["height"], scale, tile_size)
+        levels.append({
+            "zoom": zoom,
+            "dpi": round(scale * 72, 2),
+            "width": round(geometry["width"] * scale),
+            "height": round(geometry["height"] * scale),
+            "columns": columns,
+            "rows": rows,
+        })
+    return {
+        "success": True,
+        "spec_code": pdf_file.spec_code,
+        "page_code": pdf_file.page_code,
+        "page_number": page_number,
+        "total_pages": geometry["total_pages"],
+        "page_width": geometry["width"],
+        "page_height": geometry["height"],
+        "tile_size": tile_size,
+        "max_zoom": PreviewConfig.TILE_MAX_ZOOM,
+        "levels": levels,
+    }
+
+
+@app.get("/api/pdf-page-tiles/{zoom}/{x}/{y}")
+async def pdf_page_tile(
+    zoom: int = Path(..., ge=0, le=PreviewConfig.TILE_MAX_ZOOM, description="缩放级别"),
+    x: int = Path(..., ge=0, description="瓦片列号，从0开始"),
+    y: int = Path(..., ge=0, description="瓦片行号，从0开始"),
+    spec_code: str = Query(..., description="规范编号，如 12J2"),
+    page_code: str = Query(..., description="页码编号，如 C11"),
+    page_number: int = Query(default=1, ge=1, description="PDF内部页码，从1开始"),
+    image_format: Optional[str] = Query(
+        default=None,
+        alias="format",
+        pattern="^(png|jpeg|jpg|webp)$",
+        description="输出格式 png/jpeg/webp，不指定时根据 Accept 头协商"
+    ),
+    quality: int = Query(default=PreviewConfig.QUALITY, ge=1, le=100, description="JPEG/WebP 质量（1-100）"),
+    accept: str = Header(default=""),
+):
+    """
+    PDF页面瓦片接口 - 只渲染页面的指定区域
+
+    使用 PyMuPDF 裁剪区域渲染，高缩放级别下无需光栅化整页；
+    每个瓦片单独缓存，前端可按需加载可见区域（地图式深度缩放）。
+
+    Args:
+        zoom: 缩放级别，最高级别对应 PREVIEW_TILE_MAX_DPI，每降低一级分辨率减半
+        x: 瓦片列号
+        y: 瓦片行号
+        spec_code: 规范编号
+        page_code: 页码编号
+        page_number: PDF内部页码
+        image_format: 输出格式（查询参数 format）
+        quality: 有损格式的质量
+
+    Returns:
+        图片文件
+    """
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="服务正在初始化中，请稍后重试")
+
+    fmt = _negotiate_preview_format(image_format, accept)
+    headers = {"Cache-Control": f"public, max-age={PREVIEW_CACHE_MAX_AGE}"}
+    if image_format is None:
+        headers["Vary"] = "Accept"
+
+    pdf_file, error = _find_tile_file(spec_code, page_code)
+    if error is not None:
+        return error
+
+    cache_key = tile_key(pdf_file.spec_code, pdf_file.page_code, page_number, zoom, x, y, fmt, quality)
+    cached, tier = await run_in_threadpool(preview_cache.get, cache_key)
+    metrics.PREVIEW_CACHE_LOOKUPS.inc(result=tier or "miss")
+    if cached is not None:
+        return Response(content=cached, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+    try:
+        image_bytes, _ = await preview_flight.do(
+            cache_key,
+            lambda: run_in_threadpool(
+                _render_tile, cache_key, pdf_file.file_path, page_number, zoom, x, y, fmt, quality
+            ),
+        )
+        return Response(content=image_bytes, media_type=MEDIA_TYPES[fmt], headers=headers)
+    except PageOutOfRangeError as e:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "success": False,
+                "error_code": "INVALID_PAGE_NUMBER",
+                "message": str(e),
+                "total_pages": e.total_pages,
+            }
+        )
+    except TileOutOfRangeError as e:
+        return JSONResponse(
+            status_code=404,
+            content={
+                "success": False,
+                "error_code": "TILE_OUT_OF_RANGE",
+                "message": str(e),
+            }
+        )
+    except DocumentUnavailableError as e:
+        return _document_unavailable_response(e)
+    except Exception as e:
+        logger.error(f"瓦片渲染失败: {e}", exc_info=True)
+        return JSONResponse(
+            status_code=500,
+            content={
+                "success": False,
+                "error_code": "CONVERSION_ERROR",
+                "message": f"瓦片渲染失败: {str(e)}",
+            }
+        )
+
+
+def _get_search_index() -> Optional[SearchIndex]:
+    """打开全文索引（只读）；服务启动后才建立的索引在首次查询时打开"""
+    global search_index
+    if search_index is None:
+        with search_index_lock:
+            if search_index is None and os.path.exists(SearchConfig.INDEX_PATH):
+                search_index = SearchIndex(SearchConfig.INDEX_PATH, readonly=True)
+                logger.info(f"全文索引: {SearchConfig.INDEX_PATH}")
+    return search_index
+
+
+@app.get("/api/search")
+def search_specs(
+    q: str = Query(..., min_length=1, max_length=100, description="关键词，如 女儿墙泛水"),
+    spec_code: Optional[str] = Query(default=None, description="只在指定规范内检索"),
+    limit: int = Query(default=20, ge=1, description="最多返回条数"),
+):
+    """
+    全文检索 - 按关键词查找规范页面
+
+    索引由 python -m spec_locator.search.indexer 离线建立（PDF 文本层，扫描页回退 OCR）。
+
+    Returns:
+        按相关度排序的命中页面，附摘要、下载与预览地址
+    """
+    index = _get_search_index()
+    if index is None:
+        return JSONResponse(
+            status_code=503,
+            content={
+                "success": False,
+                "error_code": "INDEX_NOT_READY",
+                "message": "全文索引尚未建立，请先运行 python -m spec_locator.search.indexer",
+            },
+        )
+
+    start = time.perf_counter()
+    hits = index.search(q, limit=min(limit, SearchConfig.MAX_RESULTS), spec_code=spec_code)
+    for hit in hits:
+        hit["download_url"] = f"/api/download/{hit['spec_code']}/{hit['page_code']}"
+        hit["preview_url"] = (
+            f"/api/pdf-page-preview?spec_code={hit['spec_code']}&page_code={hit['page_code']}"
+            f"&page_number={hit['page_number']}"
+        )
+    return {
+        "success": True,
+        "query": q,
+        "total": len(hits),
+        "results": hits,
+        "took_ms": round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def _is_cacheable(result: dict) -> bool:
+    """
+    判断识别结果是否可缓存：仅缓存成功结果，
+    且排除 auto 模式下大模型调用失败后降级得到的结果（可能只是暂时性失败）
+    """
+    if not result.get("success"):
+        return False
+    return not result.get("metadata", {}).get("llm_failed", False)
+
+
+def _allowed_file(filename: str) -> bool:
+    """检查文件扩展名是否允许"""
+    filename = filename.lower()
+    return any(filename.endswith(ext) for ext in APIConfig.ALLOWED_EXTENSIONS)
+
+
+async def _read_upload_capped(upload: UploadFile, max_size: int) -> Optional[bytearray]:
+    """
+    分块读取上传文件，超出上限立即停止
+
+    Returns:
+        文件内容，超出上限返回 None
+    """
+    contents = bytearray()
+    while True:
+        chunk = await upload.read(APIConfig.UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            return contents
+        contents.extend(chunk)
+        if len(contents) > max_size:
+            return None
+
+
+def _decode_image(contents: bytes) -> Optional[np.ndarray]:
+    """将上传内容解码为 BGR 图像，失败返回 None"""
+    try:
+        nparr = np.frombuffer(contents, np.uint8)
+        return cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    except Exception as e:
+        logger.error(f"Failed to decode image: {e}")
+        return None
+
+
+def _error_content(error_code: ErrorCode) -> dict:
+    """生成标准错误响应内容"""
+    return {
+        "success": False,
+        "error_code": error_code.value,
+        "message": ERROR_MESSAGES.get(error_code, "Unknown error"),
+    }
+
+
 def _error_response(error_code: ErrorCode):
     """生成标准错误响应"""
+    metrics.ERRORS.inc(error_code=error_code.value)
     return JSONResponse(
         status_code=200,  # 保持 200 OK，错误信息在 body 中
+        content=_error_content(error_code),
+    )
+
+
+def _busy_response():
+    """生成服务繁忙响应（429 + Retry-After）"""
+    return JSONResponse(
+        status_code=429,
         content={
             "success": False,
-            "error_code": error_code.value,
-            "message": ERROR_MESSAGES.get(error_code, "Unknown error"),
+            "error_code": "SERVER_BUSY",
+            "message": "服务繁忙，识别队列已满，请稍后重试",
         },
+        headers={"Retry-After": str(APIConfig.RETRY_AFTER_SECONDS)},
     )
 
 
@@ -487,12 +1634,33 @@ def run_server(
     port: int = APIConfig.PORT,
     workers: int = APIConfig.WORKERS,
 ):
-    """运行服务器"""
+    """
+    运行服务器
+
+    API_PREFORK=true 时主进程先建好文件索引再派生工作进程（见 api/prefork.py），
+    OCR 模型由各工作进程派生后加载；否则由 uvicorn 启动各自独立初始化的工作进程。
+    """
     import uvicorn
 
+    if APIConfig.PREFORK:
+        if hasattr(os, "fork"):
+            from spec_locator.api.prefork import PreforkServer
+
+            PreforkServer(
+                app,
+                host=host,
+                port=port,
+                workers=workers,
+                preload=preload_pipeline,
+                log_level=LOG_LEVEL.lower(),
+            ).run()
+            return
+        logger.warning("当前平台不支持 os.fork，忽略 API_PREFORK")
+
     logger.info(f"Starting server on {host}:{port}")
     uvicorn.run(
-        app,
+        # 多工作进程时 uvicorn 需要导入字符串
+        "spec_locator.api.server:app" if workers > 1 else app,
         host=host,
         port=port,
         workers=workers,
@@ -0,0 +1,52 @@
+"""
+请求合并（single-flight）
+- 相同键的并发请求只执行一次计算
+- 其余请求等待同一结果，减少重复的 OCR / 大模型调用
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """异步 single-flight 合并器（需在同一事件循环中使用）"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        执行或加入相同键的进行中计算
+
+        计算以独立任务运行，发起者取消等待不会影响其他等待者。
+
+        Args:
+            key: 合并键
+            fn: 返回可等待对象的无参函数
+
+        Returns:
+            (结果, 是否复用了进行中的计算)
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            logger.debug(f"Joining in-flight call: {key}")
+        return await asyncio.shield(task), shared
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # 所有等待者都已取消时，避免 "exception was never retrieved" 警告
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        """进行中的计算数"""
+        return len(self._calls)
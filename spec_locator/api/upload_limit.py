@@ -0,0 +1,87 @@
+"""
+上传大小限制中间件
+- 在 FastAPI 解析 multipart 之前按路径检查请求体大小
+- 声明了 Content-Length 的请求超限时立即返回 413，不读取请求体
+- 分块传输的请求在累计字节数超限时中止读取
+"""
+
+import json
+import logging
+from typing import Dict
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+
+class UploadSizeLimitMiddleware:
+    """按路径限制 POST 请求体大小的 ASGI 中间件"""
+
+    def __init__(self, app, limits: Dict[str, int]):
+        """
+        Args:
+            app: ASGI 应用
+            limits: 路径 -> 最大请求体字节数
+        """
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limits.get(scope["path"])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        # 1. 根据 Content-Length 提前拒绝
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    break
+                if declared > limit:
+                    logger.warning(f"Upload rejected: {scope['path']} declared {declared} > {limit} bytes")
+                    await self._reject(send)
+                    return
+                break
+
+        # 2. 边读边计数（分块传输或 Content-Length 不可信时）
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    logger.warning(f"Upload aborted: {scope['path']} exceeded {limit} bytes")
+                    raise HTTPException(status_code=413, detail="File too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    async def _reject(send):
+        body = json.dumps(
+            {
+                "success": False,
+                "error_code": "INVALID_REQUEST",
+                "message": "File too large",
+            }
+        ).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"connection", b"close"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
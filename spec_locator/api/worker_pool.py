@@ -0,0 +1,118 @@
+"""
+识别任务执行池
+- 将同步的识别流水线移出事件循环
+- 支持线程池 / 进程池两种模式
+- 有界队列：正在执行 + 排队的任务达到上限时立即拒绝
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class PoolFullError(Exception):
+    """执行池已满，调用方应返回 429"""
+
+
+class RecognitionPool:
+    """有界识别执行池"""
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        queue_size: int = 8,
+        executor: str = "thread",
+        initializer: Callable = None,
+        initargs: tuple = (),
+    ):
+        """
+        初始化执行池
+
+        Args:
+            max_workers: 并行执行的任务数
+            queue_size: 允许排队等待的任务数
+            executor: 执行器类型 ("thread" | "process")
+            initializer: 工作线程/进程初始化函数（进程模式用于加载流水线）
+            initargs: 初始化函数参数
+        """
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor type: {executor}")
+
+        self.executor_type = executor
+        self.max_workers = max(1, max_workers)
+        self.queue_size = max(0, queue_size)
+        self.capacity = self.max_workers + self.queue_size
+
+        self._in_flight = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+        if executor == "process":
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=initializer,
+                initargs=initargs,
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="recognition",
+                initializer=initializer,
+                initargs=initargs,
+            )
+
+        logger.info(
+            f"RecognitionPool 创建: executor={executor}, workers={self.max_workers}, "
+            f"queue_size={self.queue_size}"
+        )
+
+    def _acquire(self):
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._rejected += 1
+                raise PoolFullError(f"Recognition pool is full ({self._in_flight}/{self.capacity})")
+            self._in_flight += 1
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        在执行池中运行任务并等待结果
+
+        Raises:
+            PoolFullError: 执行池已满
+        """
+        self._acquire()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+
+        # 在底层任务真正结束时释放名额（即使调用方已取消等待）
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取执行池状态"""
+        with self._lock:
+            in_flight = self._in_flight
+            rejected = self._rejected
+        return {
+            "executor": self.executor_type,
+            "workers": self.max_workers,
+            "capacity": self.capacity,
+            "active": min(in_flight, self.max_workers),
+            "queue_depth": max(0, in_flight - self.max_workers),
+            "rejected": rejected,
+        }
+
+    def shutdown(self, wait: bool = False):
+        """关闭执行池"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
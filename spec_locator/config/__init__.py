@@ -14,6 +14,10 @@ from spec_locator.config.config import (
     ConfidenceConfig,
     APIConfig,
     PathConfig,
+    IndexConfig,
+    CacheConfig,
+    PreviewConfig,
+    SearchConfig,
     LOG_LEVEL,
     LLMConfig,  # 新增
 )
@@ -30,6 +34,10 @@ __all__ = [
     "ConfidenceConfig",
     "APIConfig",
     "PathConfig",
+    "IndexConfig",
+    "CacheConfig",
+    "PreviewConfig",
+    "SearchConfig",
     "LOG_LEVEL",
     "LLMConfig",  # 新增
 ]
@@ -105,6 +105,41 @@ class OCRConfig:
     LAZY_LOAD = os.getenv("OCR_LAZY_LOAD", "true").lower() == "true"
     WARMUP_ON_STARTUP = os.getenv("OCR_WARMUP_ON_STARTUP", "false").lower() == "true"
 
+    # 引擎副本（进程内并行推理）：副本数 × 线程数 ≈ vCPU 数
+    REPLICAS = int(os.getenv("OCR_REPLICAS", 1))  # 大于 1 时启用 OCREnginePool
+    CPU_THREADS = int(os.getenv("OCR_CPU_THREADS", 0))  # 每个副本的算子内线程数，0 表示自动（副本池按核数平分）
+
+    # 推理后端：paddle（PaddleOCR）| onnx（onnxruntime 运行转换后的 PP-OCR 模型）
+    BACKEND = os.getenv("OCR_BACKEND", "paddle").lower()
+    _ONNX_MODEL_DIR = os.getenv(
+        "OCR_ONNX_MODEL_DIR",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "onnx"),
+    )
+    ONNX_DET_MODEL = os.getenv("OCR_ONNX_DET_MODEL", os.path.join(_ONNX_MODEL_DIR, "det.onnx"))
+    ONNX_REC_MODEL = os.getenv("OCR_ONNX_REC_MODEL", os.path.join(_ONNX_MODEL_DIR, "rec.onnx"))
+    ONNX_REC_DICT = os.getenv("OCR_ONNX_REC_DICT", os.path.join(_ONNX_MODEL_DIR, "ppocr_keys_v1.txt"))
+    ONNX_CLS_MODEL = os.getenv("OCR_ONNX_CLS_MODEL", "")  # 方向分类模型（可选）
+    ONNX_QUANTIZE = os.getenv("OCR_ONNX_QUANTIZE", "false").lower() == "true"  # int8 动态量化
+    ONNX_DET_LIMIT_SIDE = int(os.getenv("OCR_ONNX_DET_LIMIT_SIDE", 960))  # 检测输入最长边
+
+    # 大图分块识别：最长边超过阈值时切分为重叠分块分别检测识别，再合并回全图坐标
+    TILE_THRESHOLD = int(os.getenv("OCR_TILE_THRESHOLD", 2560))  # 0 表示不分块
+    TILE_SIZE = int(os.getenv("OCR_TILE_SIZE", 1280))  # 分块边长
+    TILE_OVERLAP = int(os.getenv("OCR_TILE_OVERLAP", 160))  # 相邻分块重叠宽度（应大于常见文本行长度）
+
+    # 选择性识别：先检测，按几何特征（高度、宽高比、与索引圆的距离）筛选文本框后只识别保留的文本行
+    SELECTIVE = os.getenv("OCR_SELECTIVE", "false").lower() == "true"
+    SELECTIVE_MIN_HEIGHT = float(os.getenv("OCR_SELECTIVE_MIN_HEIGHT", 6))  # 最小文本高度（像素）
+    SELECTIVE_MAX_HEIGHT = float(os.getenv("OCR_SELECTIVE_MAX_HEIGHT", 150))  # 最大文本高度（像素）
+    SELECTIVE_MAX_ASPECT = float(os.getenv("OCR_SELECTIVE_MAX_ASPECT", 15))  # 最大宽高比（过滤长说明文字）
+    SELECTIVE_CIRCLES = os.getenv("OCR_SELECTIVE_CIRCLES", "true").lower() == "true"  # 只保留索引圆附近的文本框
+    SELECTIVE_CIRCLE_REACH = float(os.getenv("OCR_SELECTIVE_CIRCLE_REACH", 6))  # 保留距离（索引圆半径的倍数）
+
+    # 微批处理配置（将短时间窗口内的并发请求合并为一次推理）
+    BATCH_ENABLED = os.getenv("OCR_BATCH_ENABLED", "false").lower() == "true"
+    BATCH_WINDOW_MS = float(os.getenv("OCR_BATCH_WINDOW_MS", 10))  # 收集窗口（毫秒）
+    BATCH_MAX_SIZE = int(os.getenv("OCR_BATCH_MAX_SIZE", 8))  # 单批最大图像数
+
 
 # ===== 图像预处理配置 =====
 class PreprocessConfig:
@@ -137,9 +172,21 @@ class APIConfig:
     HOST = os.getenv("API_HOST", "0.0.0.0")
     PORT = int(os.getenv("API_PORT", 8000))
     WORKERS = int(os.getenv("API_WORKERS", 4))
+    # 预派生模式：主进程建好文件索引后再派生工作进程，索引内存写时复制共享；OCR 模型由工作进程各自加载（仅 Linux/macOS）
+    PREFORK = os.getenv("API_PREFORK", "false").lower() == "true"
     MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
     ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg"}
 
+    # 识别任务执行池（将识别移出事件循环）
+    RECOGNITION_EXECUTOR = os.getenv("API_RECOGNITION_EXECUTOR", "thread").lower()  # thread/process
+    RECOGNITION_WORKERS = int(os.getenv("API_RECOGNITION_WORKERS", 2))
+    RECOGNITION_QUEUE_SIZE = int(os.getenv("API_RECOGNITION_QUEUE_SIZE", 8))  # 排队上限，超出返回 429
+    RETRY_AFTER_SECONDS = int(os.getenv("API_RETRY_AFTER", 5))  # 429 响应的 Retry-After
+    MAX_BATCH_FILES = int(os.getenv("API_MAX_BATCH_FILES", 200))  # 批量识别单次最多图片数
+    MAX_BUNDLE_FILES = int(os.getenv("API_MAX_BUNDLE_FILES", 200))  # 打包下载单次最多文件数
+    MAX_BATCH_UPLOAD_SIZE = int(os.getenv("API_MAX_BATCH_UPLOAD_SIZE", 200 * 1024 * 1024))  # 批量请求体上限 200MB
+    UPLOAD_CHUNK_SIZE = 64 * 1024  # 分块读取上传文件的块大小
+
 
 # ===== 文件路径配置 =====
 class PathConfig:
@@ -186,6 +233,76 @@ class PathConfig:
             )
 
 
+# ===== 文件索引配置 =====
+class IndexConfig:
+    """文件索引配置"""
+    METADATA_ENABLED = os.getenv("INDEX_METADATA_ENABLED", "false").lower() == "true"  # 建索引时采集大小/页数/哈希（读取全部文件）
+    METADATA_WORKERS = int(os.getenv("INDEX_METADATA_WORKERS", 8))  # 并行采集线程数
+
+
+# ===== 识别结果缓存配置 =====
+class CacheConfig:
+    """识别结果缓存配置"""
+    ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+    MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", 1024))  # 内存层最大条目数
+    TTL = int(os.getenv("RESULT_CACHE_TTL", 3600))  # 过期时间（秒）
+
+    # 磁盘层（SQLite，位于临时目录）
+    DISK_ENABLED = os.getenv("RESULT_CACHE_DISK_ENABLED", "false").lower() == "true"
+    DISK_PATH = os.getenv(
+        "RESULT_CACHE_DISK_PATH",
+        os.path.join(PathConfig.TEMP_DIR, "result_cache.sqlite3")
+    )
+
+    # 近似重复截图复用（感知哈希 + 汉明距离，命中后核对标注区域）
+    NEAR_DUP_ENABLED = os.getenv("NEAR_DUP_ENABLED", "false").lower() == "true"
+    NEAR_DUP_MAX_DISTANCE = int(os.getenv("NEAR_DUP_MAX_DISTANCE", 8))  # 256 位 dHash 的最大汉明距离
+    NEAR_DUP_MIN_CONFIDENCE = float(os.getenv("NEAR_DUP_MIN_CONFIDENCE", 0.8))  # 只复用高置信度结果
+    NEAR_DUP_MAX_ENTRIES = int(os.getenv("NEAR_DUP_MAX_ENTRIES", 2048))
+
+
+# ===== PDF 页面预览配置 =====
+class PreviewConfig:
+    """PDF 页面预览缓存配置"""
+    CACHE_DIR = os.getenv("PREVIEW_CACHE_DIR", os.path.join(PathConfig.TEMP_DIR, "pdf_previews"))
+    CACHE_MAX_AGE = int(os.getenv("PREVIEW_CACHE_MAX_AGE", 3600))  # 浏览器缓存时间（Cache-Control，秒）
+    CACHE_TTL = int(os.getenv("PREVIEW_CACHE_TTL", 30 * 24 * 3600))  # 服务端缓存过期时间（秒），规范 PDF 基本不变
+    MEMORY_BYTES = int(os.getenv("PREVIEW_CACHE_MEMORY_MB", 64)) * 1024 * 1024  # 内存热层字节预算
+    DISK_BYTES = int(os.getenv("PREVIEW_CACHE_DISK_MB", 1024)) * 1024 * 1024  # 磁盘层总大小上限
+    DOCUMENT_POOL_SIZE = int(os.getenv("PREVIEW_DOCUMENT_POOL_SIZE", 32))  # 保持打开的 PDF 文档数，0 表示不复用
+    QUALITY = int(os.getenv("PREVIEW_QUALITY", 80))  # JPEG/WebP 默认质量（1-100）
+
+    # 瓦片（深度缩放）：最高级别对应 TILE_MAX_DPI，每降低一级分辨率减半
+    TILE_SIZE = int(os.getenv("PREVIEW_TILE_SIZE", 256))  # 瓦片边长（像素）
+    TILE_MAX_DPI = int(os.getenv("PREVIEW_TILE_MAX_DPI", 300))
+    TILE_MAX_ZOOM = int(os.getenv("PREVIEW_TILE_MAX_ZOOM", 4))
+
+    # 识别成功后后台预取命中页面及前后相邻页面的预览图
+    PREFETCH_ENABLED = os.getenv("PREVIEW_PREFETCH_ENABLED", "false").lower() == "true"
+    PREFETCH_NEIGHBORS = int(os.getenv("PREVIEW_PREFETCH_NEIGHBORS", 2))  # 前后各预取多少页
+    PREFETCH_DPI = int(os.getenv("PREVIEW_PREFETCH_DPI", 150))  # 与前端默认请求一致
+    PREFETCH_FORMAT = os.getenv("PREVIEW_PREFETCH_FORMAT", "webp").lower()
+    PREFETCH_QUEUE_SIZE = int(os.getenv("PREVIEW_PREFETCH_QUEUE_SIZE", 64))  # 队列满时丢弃新请求
+    PREFETCH_INTERVAL_MS = int(os.getenv("PREVIEW_PREFETCH_INTERVAL_MS", 50))  # 两次渲染之间的最小间隔
+
+    # 离线预渲染（python -m spec_locator.preview.prerender），默认只渲染前端默认请求的 DPI 与格式
+    PRERENDER_DPIS = [int(d) for d in os.getenv("PREVIEW_PRERENDER_DPIS", "150").split(",") if d.strip()]
+    PRERENDER_FORMATS = [f.strip() for f in os.getenv("PREVIEW_PRERENDER_FORMATS", "webp").split(",") if f.strip()]
+    PRERENDER_WORKERS = int(os.getenv("PREVIEW_PRERENDER_WORKERS", os.cpu_count() or 1))
+
+
+# ===== 全文检索配置 =====
+class SearchConfig:
+    """规范 PDF 全文检索配置"""
+    INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", os.path.join(PathConfig.TEMP_DIR, "search_index.sqlite3"))
+    MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", 100))  # 单次查询最多返回条数
+
+    # 离线建索引（python -m spec_locator.search.indexer）
+    OCR_FALLBACK = os.getenv("SEARCH_OCR_FALLBACK", "true").lower() == "true"  # 无文本层的页面用 OCR 识别
+    OCR_MIN_CHARS = int(os.getenv("SEARCH_OCR_MIN_CHARS", 10))  # 文本层少于该字数时回退到 OCR
+    OCR_DPI = int(os.getenv("SEARCH_OCR_DPI", 200))  # OCR 渲染 DPI
+
+
 # ===== 大模型配置 =====
 class LLMConfig:
     """大模型配置"""
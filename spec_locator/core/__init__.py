@@ -3,5 +3,14 @@
 """
 
 from spec_locator.core.pipeline import SpecLocatorPipeline
+from spec_locator.core.result_cache import ResultCache, image_digest
+from spec_locator.core.near_duplicate import NearDuplicateIndex, callout_signature, perceptual_hash
 
-__all__ = ["SpecLocatorPipeline"]
+__all__ = [
+    "SpecLocatorPipeline",
+    "ResultCache",
+    "image_digest",
+    "NearDuplicateIndex",
+    "callout_signature",
+    "perceptual_hash",
+]
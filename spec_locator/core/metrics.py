@@ -0,0 +1,323 @@
+"""
+运行指标采集
+- 轻量级 Counter / Gauge / Histogram，输出 Prometheus 文本格式
+- 请求级阶段计时（RequestTrace），流水线各阶段通过 stage() 记录耗时
+- 未开启追踪时 stage() 只有一次 ContextVar 读取，对热路径几乎无开销
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = "") -> str:
+    parts = []
+    for name, value in zip(labelnames, labelvalues):
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """指标基类"""
+
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    """瞬时值，可直接设置或在采集时通过回调读取"""
+
+    metric_type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], float]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, callback: Optional[Callable[[], float]]):
+        """设置采集回调（仅适用于无标签指标）"""
+        self._callback = callback
+
+    def _samples(self) -> List[str]:
+        if self._callback is not None:
+            try:
+                value = self._callback()
+            except Exception:
+                return []
+            return [] if value is None else [f"{self.name} {_format_value(value)}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    """分桶直方图"""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values: Dict[Tuple[str, ...], List[float]] = {}  # [各桶计数..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def get_count(self, **labels) -> float:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[-1] if state else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), callback=None) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """输出 Prometheus 文本格式（version 0.0.4）"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# ===== 流水线指标 =====
+STAGE_DURATION = REGISTRY.histogram(
+    "spec_locator_stage_duration_seconds",
+    "Duration of spec locator pipeline stages.",
+    ["stage", "method"],
+)
+ERRORS = REGISTRY.counter(
+    "spec_locator_errors_total",
+    "Recognition responses by error code.",
+    ["error_code"],
+)
+OCR_BOXES = REGISTRY.histogram(
+    "spec_locator_ocr_boxes",
+    "Number of OCR text boxes per recognized image.",
+    buckets=(0, 1, 5, 10, 20, 50, 100, 200, 500),
+)
+LLM_FALLBACKS = REGISTRY.counter(
+    "spec_locator_llm_fallbacks_total",
+    "LLM fallbacks in auto mode by outcome.",
+    ["outcome"],
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "spec_locator_cache_lookups_total",
+    "Result cache lookups by tier and outcome.",
+    ["tier", "result"],
+)
+PREVIEW_CACHE_LOOKUPS = REGISTRY.counter(
+    "spec_locator_preview_cache_lookups_total",
+    "PDF page preview cache lookups by outcome (memory, disk, miss).",
+    ["result"],
+)
+
+
+# ===== 请求级阶段计时 =====
+class RequestTrace:
+    """单次识别请求的阶段耗时与事件（可序列化，支持进程池回传）"""
+
+    def __init__(self, method: str):
+        self.method = method
+        self.stages: Dict[str, float] = {}  # 阶段 -> 秒
+        self.events: Dict[str, Any] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """记录一个阶段的耗时，同名阶段累加"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    def timings_ms(self) -> Dict[str, float]:
+        """各阶段耗时（毫秒）"""
+        return {stage: round(seconds * 1000, 2) for stage, seconds in self.stages.items()}
+
+    def server_timing(self) -> str:
+        """生成 Server-Timing 响应头（浏览器开发者工具可直接展示）"""
+        return ", ".join(f"{stage};dur={ms}" for stage, ms in self.timings_ms().items())
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("spec_locator_trace", default=None)
+
+
+@contextmanager
+def trace(method: str) -> Iterator[RequestTrace]:
+    """在当前上下文中开启请求追踪（需在执行识别的线程/进程内开启）"""
+    request_trace = RequestTrace(method)
+    token = _current_trace.set(request_trace)
+    try:
+        yield request_trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """记录当前请求追踪中一个流水线阶段的耗时"""
+    request_trace = _current_trace.get()
+    if request_trace is None:
+        yield
+        return
+    with request_trace.stage(name):
+        yield
+
+
+def record_event(name: str, value: Any):
+    """记录请求级事件（如 OCR 文本框数量、大模型降级结果）"""
+    request_trace = _current_trace.get()
+    if request_trace is not None:
+        request_trace.events[name] = value
+
+
+def observe_trace(request_trace: RequestTrace):
+    """将请求追踪汇总到全局指标（在主进程中调用，进程池模式同样适用）"""
+    for stage_name, seconds in request_trace.stages.items():
+        STAGE_DURATION.observe(seconds, stage=stage_name, method=request_trace.method)
+    ocr_boxes = request_trace.events.get("ocr_boxes")
+    if ocr_boxes is not None:
+        OCR_BOXES.observe(ocr_boxes)
+    fallback = request_trace.events.get("llm_fallback")
+    if fallback is not None:
+        LLM_FALLBACKS.inc(outcome=fallback)
+
+
+def observe_result(result: Dict[str, Any]):
+    """按错误码统计识别响应"""
+    if result.get("success"):
+        return
+    error_code = result.get("error_code", "UNKNOWN")
+    ERRORS.inc(error_code=getattr(error_code, "value", error_code))
@@ -0,0 +1,331 @@
+"""
+近似重复截图识别
+- 基于归一化缩略图的差值哈希（dHash）
+- BK 树按汉明距离检索近期识别过的相似截图
+- 整图哈希分辨不出只差一两个字符的标注（如 C11 与 C12），命中后还需核对标注区域：
+  收录时保存规范编号与页码所在区域的原分辨率二值图，复用前在新截图的对应位置比对
+- 核对通过的高置信度结果直接复用，跳过 OCR / 大模型
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def perceptual_hash(image: np.ndarray, hash_size: int = 16) -> int:
+    """
+    计算差值哈希（dHash）
+
+    将图像灰度化并缩放到 (hash_size + 1) x hash_size 的缩略图，
+    比较水平相邻像素的明暗关系得到 hash_size * hash_size 位哈希。
+    对轻微平移、缩放与压缩差异不敏感。
+
+    Args:
+        image: 输入图像（BGR 或灰度格式）
+        hash_size: 哈希边长
+
+    Returns:
+        整数形式的哈希值
+    """
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    thumbnail = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (thumbnail[:, 1:] > thumbnail[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+@dataclass
+class CalloutSignature:
+    """标注区域指纹：原分辨率二值图（按位压缩）及其在原截图中的位置"""
+    bits: bytes  # np.packbits 压缩的墨迹掩码
+    shape: Tuple[int, int]  # 掩码 (高, 宽)
+    origin: Tuple[int, int]  # 掩码左上角在原截图中的 (x, y)
+    image_shape: Tuple[int, int]  # 原截图 (高, 宽)
+
+    def mask(self) -> np.ndarray:
+        count = self.shape[0] * self.shape[1]
+        return np.unpackbits(np.frombuffer(self.bits, dtype=np.uint8), count=count).reshape(self.shape)
+
+
+def _ink_mask(gray: np.ndarray) -> np.ndarray:
+    """二值化为墨迹掩码（墨迹为 1），Otsu 阈值对压缩噪声不敏感"""
+    _, binary = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    return binary.astype(np.uint8)
+
+
+def _gray(image: np.ndarray) -> np.ndarray:
+    return image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def callout_signature(image: np.ndarray, bbox: Sequence[int], pad: int = 8) -> Optional[CalloutSignature]:
+    """
+    提取标注区域指纹
+
+    Args:
+        image: 截图（BGR 或灰度格式）
+        bbox: 规范编号与页码所在区域 [x0, y0, x1, y1]
+        pad: 区域外扩像素
+
+    Returns:
+        指纹，区域无效时返回 None
+    """
+    gray = _gray(image)
+    height, width = gray.shape
+    x0, y0 = max(0, int(bbox[0]) - pad), max(0, int(bbox[1]) - pad)
+    x1, y1 = min(width, int(bbox[2]) + pad), min(height, int(bbox[3]) + pad)
+    if x1 - x0 < 4 or y1 - y0 < 4:
+        return None
+    mask = _ink_mask(gray[y0:y1, x0:x1])
+    return CalloutSignature(
+        bits=np.packbits(mask).tobytes(),
+        shape=mask.shape,
+        origin=(x0, y0),
+        image_shape=(height, width),
+    )
+
+
+def verify_callout(
+    image: np.ndarray,
+    signature: CalloutSignature,
+    search_margin: float = 0.05,
+    window: int = 16,
+    max_mismatch: int = 24,
+) -> bool:
+    """
+    核对新截图中对应位置的标注区域是否与指纹一致
+
+    在原位置附近搜索最佳对齐位置，比较双方墨迹（容忍 1 像素的笔画抖动），
+    任一 window × window 窗口内不匹配的墨迹像素超过 max_mismatch 即判定不一致，
+    单个字符的差异（C11 / C12）也会被发现。
+
+    Args:
+        image: 新截图
+        signature: 已收录截图的标注区域指纹
+        search_margin: 对齐搜索范围（占图像边长的比例）
+        window: 局部比较窗口边长（像素）
+        max_mismatch: 单个窗口内允许的不匹配墨迹像素数
+
+    Returns:
+        是否一致
+    """
+    gray = _gray(image)
+    old_h, old_w = signature.image_shape
+    scale_x, scale_y = gray.shape[1] / old_w, gray.shape[0] / old_h
+    if abs(scale_x - scale_y) > 0.02:
+        return False  # 宽高比变化，不是同一张截图的轻微变体
+    if abs(scale_x - 1) > 0.02:
+        gray = cv2.resize(gray, (old_w, old_h), interpolation=cv2.INTER_AREA)
+
+    expected = signature.mask()
+    mask_h, mask_w = expected.shape
+    margin = int(max(old_h, old_w) * search_margin) + 4
+    x0 = max(0, signature.origin[0] - margin)
+    y0 = max(0, signature.origin[1] - margin)
+    x1 = min(gray.shape[1], signature.origin[0] + mask_w + margin)
+    y1 = min(gray.shape[0], signature.origin[1] + mask_h + margin)
+    if x1 - x0 < mask_w or y1 - y0 < mask_h:
+        return False
+
+    search = _ink_mask(gray[y0:y1, x0:x1])
+    if not expected.any():
+        return not search.any()
+    scores = cv2.matchTemplate(search.astype(np.float32), expected.astype(np.float32), cv2.TM_CCORR_NORMED)
+    _, _, _, (dx, dy) = cv2.minMaxLoc(scores)
+    actual = search[dy:dy + mask_h, dx:dx + mask_w]
+
+    kernel = np.ones((3, 3), dtype=np.uint8)
+    mismatch = (expected & (1 - cv2.dilate(actual, kernel))) | (actual & (1 - cv2.dilate(expected, kernel)))
+    local = cv2.boxFilter(mismatch.astype(np.float32), -1, (window, window), normalize=False)
+    return float(local.max()) <= max_mismatch
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """计算两个哈希的汉明距离"""
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """汉明距离 BK 树"""
+
+    def __init__(self):
+        self._root = None  # 节点结构: [hash, value, {distance: child}]
+
+    def add(self, hash_value: int, value: Any):
+        """插入节点"""
+        if self._root is None:
+            self._root = [hash_value, value, {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming_distance(hash_value, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [hash_value, value, {}]
+                return
+            node = child
+
+    def search(self, hash_value: int, max_distance: int) -> List[Tuple[int, Any]]:
+        """
+        查找距离不超过 max_distance 的所有节点
+
+        Returns:
+            [(distance, value)]，按距离升序
+        """
+        if self._root is None:
+            return []
+        results = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming_distance(hash_value, node[0])
+            if distance <= max_distance:
+                results.append((distance, node[1]))
+            # 三角不等式剪枝
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        results.sort(key=lambda item: item[0])
+        return results
+
+
+class NearDuplicateIndex:
+    """近似重复截图索引"""
+
+    def __init__(
+        self,
+        max_distance: int = 8,
+        min_confidence: float = 0.8,
+        max_entries: int = 2048,
+        ttl: float = 3600,
+    ):
+        """
+        初始化索引
+
+        Args:
+            max_distance: 判定为近似重复的最大汉明距离
+            min_confidence: 只收录置信度不低于该值的成功结果
+            max_entries: 最大收录条目数（超出后淘汰最早的条目）
+            ttl: 过期时间（秒）
+        """
+        self.max_distance = max_distance
+        self.min_confidence = min_confidence
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+
+        self._entries: "OrderedDict[int, Tuple[int, str, float, Dict[str, Any], Optional[CalloutSignature]]]" = OrderedDict()
+        self._tree = BKTree()
+        self._tree_size = 0  # 树中节点数（含已淘汰条目）
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._rejected = 0
+
+    def lookup(
+        self,
+        hash_value: int,
+        scope: str,
+        image: Optional[np.ndarray] = None,
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+        """
+        查找近似重复截图的识别结果
+
+        收录时带有标注区域指纹的条目，须在 image 上核对通过才会命中。
+
+        Args:
+            hash_value: 感知哈希
+            scope: 结果作用域（识别方式 + 流水线配置版本），不同作用域互不复用
+            image: 当前截图（用于核对标注区域）
+
+        Returns:
+            (结果字典, 汉明距离)，未命中返回 (None, None)
+        """
+        now = time.time()
+        with self._lock:
+            candidates = []
+            for distance, entry_id in self._tree.search(hash_value, self.max_distance):
+                entry = self._entries.get(entry_id)
+                if entry is None:
+                    continue
+                _, entry_scope, created, result, signature = entry
+                if entry_scope != scope or now - created >= self.ttl:
+                    continue
+                candidates.append((distance, result, signature))
+
+        # 核对在锁外进行（图像比对耗时，且条目内容不可变）
+        for distance, result, signature in candidates:
+            if signature is not None and (image is None or not verify_callout(image, signature)):
+                with self._lock:
+                    self._rejected += 1
+                continue
+            with self._lock:
+                self._hits += 1
+            return dict(result), distance
+        with self._lock:
+            self._misses += 1
+        return None, None
+
+    def add(
+        self,
+        hash_value: int,
+        scope: str,
+        result: Dict[str, Any],
+        signature: Optional[CalloutSignature] = None,
+    ) -> bool:
+        """
+        收录识别结果（仅收录高置信度的成功结果）
+
+        Args:
+            hash_value: 感知哈希
+            scope: 结果作用域
+            result: 识别结果
+            signature: 标注区域指纹，提供时复用前须核对通过
+
+        Returns:
+            是否收录
+        """
+        if not result.get("success"):
+            return False
+        confidence = result.get("spec", {}).get("confidence", 0.0)
+        if confidence < self.min_confidence:
+            return False
+
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (hash_value, scope, time.time(), dict(result), signature)
+            self._tree.add(hash_value, entry_id)
+            self._tree_size += 1
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+            # BK 树不支持删除，淘汰条目过多时重建
+            if self._tree_size > 2 * self.max_entries:
+                self._rebuild()
+        return True
+
+    def _rebuild(self):
+        """用现存条目重建 BK 树，调用方需持有锁"""
+        self._tree = BKTree()
+        for entry_id, entry in self._entries.items():
+            self._tree.add(entry[0], entry_id)
+        self._tree_size = len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取索引统计信息"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_distance": self.max_distance,
+                "hits": self._hits,
+                "misses": self._misses,
+                "rejected": self._rejected,  # 哈希相近但标注区域核对不一致
+            }
@@ -5,16 +5,19 @@
 - 对异常情况进行统一处理
 """
 
+import hashlib
+import json
 import logging
 import numpy as np
 from typing import List, Optional, Dict, Any
 
-from spec_locator.config import ErrorCode, ERROR_MESSAGES, PathConfig, LLMConfig
+from spec_locator.config import ErrorCode, ERROR_MESSAGES, PathConfig, LLMConfig, OCRConfig
 from spec_locator.preprocess import ImagePreprocessor
-from spec_locator.ocr import OCREngine
+from spec_locator.ocr import BoxFilter, OCREngine, OCRBatchScheduler, OCREnginePool, TextBox
 from spec_locator.parser import SpecCodeParser, PageCodeParser
 from spec_locator.postprocess import ConfidenceEvaluator, ResultFilter, SpecMatch
 from spec_locator.database import FileIndex
+from spec_locator.core import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -22,6 +25,9 @@ logger = logging.getLogger(__name__)
 class SpecLocatorPipeline:
     """规范定位流水线（支持多种识别方式）"""
 
+    # 识别逻辑版本号：解析/评估规则变化导致结果不同时递增，使旧的缓存结果失效
+    PIPELINE_VERSION = 1
+
     def __init__(
         self,
         use_gpu: bool = False,
@@ -31,6 +37,7 @@ class SpecLocatorPipeline:
         lazy_ocr: bool = True,
         recognition_method: str = "ocr",  # 新增参数：识别方式
         llm_api_key: str = None,          # 新增参数：大模型API密钥
+        collect_metadata: bool = None,
     ):
         """
         初始化流水线
@@ -41,19 +48,75 @@ class SpecLocatorPipeline:
             max_distance: 最大邻近距离
             data_dir: 数据目录路径，默认使用配置中的 SPEC_DATA_DIR
             lazy_ocr: 是否使用懒加载OCR（默认True）
-            recognition_method: 识别方式 ("ocr" | "llm" | "auto")
+            recognition_method: 默认识别方式 ("ocr" | "llm" | "auto")，
+                同时决定是否初始化大模型引擎；单次请求可通过 process(method=...) 覆盖
             llm_api_key: 大模型API密钥
+            collect_metadata: 文件索引是否采集元数据，默认使用配置 INDEX_METADATA_ENABLED
         """
         self.preprocessor = ImagePreprocessor()
-        self.ocr_engine = OCREngine(use_gpu=use_gpu, conf_threshold=ocr_threshold, lazy_load=lazy_ocr)
+        # 可选：选择性识别，检测后只识别可能是规范编号、页码的文本框
+        box_filter = None
+        if OCRConfig.SELECTIVE:
+            box_filter = BoxFilter(
+                min_height=OCRConfig.SELECTIVE_MIN_HEIGHT,
+                max_height=OCRConfig.SELECTIVE_MAX_HEIGHT,
+                max_aspect=OCRConfig.SELECTIVE_MAX_ASPECT,
+                use_circles=OCRConfig.SELECTIVE_CIRCLES,
+                circle_reach=OCRConfig.SELECTIVE_CIRCLE_REACH,
+            )
+        if OCRConfig.REPLICAS > 1:
+            # 多个独立的引擎副本，并发请求各借一个副本并行推理
+            self.ocr_engine = OCREnginePool(
+                replicas=OCRConfig.REPLICAS,
+                cpu_threads=OCRConfig.CPU_THREADS or None,
+                use_gpu=use_gpu,
+                conf_threshold=ocr_threshold,
+                lazy_load=lazy_ocr,
+                backend=OCRConfig.BACKEND,
+                tile_threshold=OCRConfig.TILE_THRESHOLD,
+                tile_size=OCRConfig.TILE_SIZE,
+                tile_overlap=OCRConfig.TILE_OVERLAP,
+                box_filter=box_filter,
+            )
+        else:
+            self.ocr_engine = OCREngine(
+                use_gpu=use_gpu,
+                conf_threshold=ocr_threshold,
+                lazy_load=lazy_ocr,
+                cpu_threads=OCRConfig.CPU_THREADS or None,
+                backend=OCRConfig.BACKEND,
+                tile_threshold=OCRConfig.TILE_THRESHOLD,
+                tile_size=OCRConfig.TILE_SIZE,
+                tile_overlap=OCRConfig.TILE_OVERLAP,
+                box_filter=box_filter,
+            )
+        # 可选：微批处理调度器，合并并发请求的 OCR 推理
+        self.ocr_scheduler = None
+        if OCRConfig.BATCH_ENABLED:
+            self.ocr_scheduler = OCRBatchScheduler(
+                self.ocr_engine,
+                window_ms=OCRConfig.BATCH_WINDOW_MS,
+                max_batch_size=OCRConfig.BATCH_MAX_SIZE,
+            )
         self.spec_parser = SpecCodeParser()
         self.page_parser = PageCodeParser(max_distance=max_distance)
         self.confidence_evaluator = ConfidenceEvaluator()
         if data_dir is None:
             data_dir = PathConfig.SPEC_DATA_DIR
-        self.file_index = FileIndex(data_dir=data_dir)
+        self.file_index = FileIndex(data_dir=data_dir, collect_metadata=collect_metadata)
+
+        # 配置版本：影响识别结果的配置摘要，用于结果缓存键
+        self.config_version = self._compute_config_version(
+            ocr_threshold=ocr_threshold,
+            max_distance=max_distance,
+            data_dir=str(data_dir),
+            ocr_backend=OCRConfig.BACKEND,
+            ocr_quantized=OCRConfig.BACKEND == "onnx" and OCRConfig.ONNX_QUANTIZE,
+            ocr_tiling=[OCRConfig.TILE_THRESHOLD, OCRConfig.TILE_SIZE, OCRConfig.TILE_OVERLAP],
+            ocr_selective=vars(box_filter) if box_filter is not None else None,
+        )
         
-        # 新增：识别方式配置
+        # 默认识别方式（只读配置，请求级识别方式通过 process 参数传入）
         self.recognition_method = recognition_method
         
         # 新增：初始化LLM引擎（如果需要）
@@ -97,47 +160,71 @@ class SpecLocatorPipeline:
                 if recognition_method == "llm":
                     raise  # llm模式必须成功初始化
     
+    def _compute_config_version(self, **params) -> str:
+        """计算影响识别结果的配置摘要"""
+        config = {
+            "pipeline_version": self.PIPELINE_VERSION,
+            "llm_provider": LLMConfig.PROVIDER,
+            "llm_model": LLMConfig.MODEL,
+            "llm_prompt_version": LLMConfig.PROMPT_VERSION,
+            "ocr_confidence_threshold": LLMConfig.OCR_CONFIDENCE_THRESHOLD,
+            **params,
+        }
+        payload = json.dumps(config, sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
     def warmup(self):
         """预热流水线：加载OCR模型"""
         logger.info("Pipeline 预热中...")
         self.ocr_engine.warmup()
         logger.info("✓ Pipeline 预热完成")
 
-    def process(self, image: np.ndarray) -> Dict[str, Any]:
+    def process(self, image: np.ndarray, method: Optional[str] = None) -> Dict[str, Any]:
         """
         处理图像并返回识别结果（支持多种识别方式）
 
+        流水线对象不保存任何请求级状态，可被多个并发请求共享。
+
         Args:
             image: 输入图像（BGR 格式）
+            method: 本次请求的识别方式 ("ocr" | "llm" | "auto")，默认使用初始化时的 recognition_method
 
         Returns:
             包含结果或错误的字典
         """
+        method = method or self.recognition_method
+
         # 根据识别方式路由
-        if self.recognition_method == "llm":
-            return self._process_with_llm(image)
-        elif self.recognition_method == "auto":
-            return self._process_hybrid(image)
-        else:  # "ocr" 或默认
-            return self._process_with_ocr(image)
+        with metrics.stage("total"):
+            if method == "llm":
+                return self._process_with_llm(image)
+            elif method == "auto":
+                return self._process_hybrid(image)
+            else:  # "ocr" 或默认
+                return self._process_with_ocr(image)
 
     def _process_with_ocr(self, image: np.ndarray) -> Dict[str, Any]:
         """OCR识别流程（原process方法逻辑）"""
         try:
             # 1. 图像预处理
             logger.debug("Starting preprocessing...")
-            processed_image = self.preprocessor.preprocess(image)
+            with metrics.stage("preprocess"):
+                processed_image = self.preprocessor.preprocess(image)
 
             # 2. OCR 识别
             logger.debug("Starting OCR...")
-            text_boxes = self.ocr_engine.recognize(image)  # 使用原图而非处理后的图
+            ocr = self.ocr_scheduler or self.ocr_engine
+            with metrics.stage("ocr"):
+                text_boxes = ocr.recognize(image)  # 使用原图而非处理后的图
+            metrics.record_event("ocr_boxes", len(text_boxes))
 
             if not text_boxes:
                 return self._error_response(ErrorCode.NO_TEXT, ocr_texts=[])
 
             # 3. 规范编号识别
             logger.debug("Parsing spec codes...")
-            spec_codes = self.spec_parser.parse(text_boxes)
+            with metrics.stage("spec_parse"):
+                spec_codes = self.spec_parser.parse(text_boxes)
 
             # 提取OCR识别到的所有文本（用于错误提示）
             ocr_texts = [box.text for box in text_boxes]
@@ -151,7 +238,8 @@ class SpecLocatorPipeline:
 
             # 4. 页码识别
             logger.debug("Parsing page codes...")
-            page_codes = self.page_parser.parse(text_boxes)
+            with metrics.stage("page_parse"):
+                page_codes = self.page_parser.parse(text_boxes)
 
             if not page_codes:
                 return self._error_response(
@@ -162,7 +250,8 @@ class SpecLocatorPipeline:
 
             # 5. 置信度评估与结果排序
             logger.debug("Evaluating confidence...")
-            matches = self.confidence_evaluator.evaluate(spec_codes, page_codes)
+            with metrics.stage("evaluate"):
+                matches = self.confidence_evaluator.evaluate(spec_codes, page_codes)
 
             if not matches:
                 return self._error_response(
@@ -173,19 +262,44 @@ class SpecLocatorPipeline:
                 )
 
             # 6. 生成返回结果
-            return self._success_response(matches)
+            response = self._success_response(matches)
+            # 内部字段：供 API 层核对近似重复截图，返回客户端前移除
+            response["callout_bbox"] = self._callout_bbox(text_boxes, spec_codes, page_codes, matches[0])
+            return response
 
         except Exception as e:
             logger.error(f"Pipeline error: {e}", exc_info=True)
             return self._error_response(ErrorCode.INTERNAL_ERROR)
 
+    @staticmethod
+    def _callout_bbox(
+        text_boxes: List[TextBox],
+        spec_codes: List[Any],
+        page_codes: List[Any],
+        match: SpecMatch,
+    ) -> Optional[List[int]]:
+        """
+        最佳匹配的规范编号与页码所在文本框的外接矩形 [x0, y0, x1, y1]（图像坐标）
+
+        近似重复复用前用该区域核对新截图中的标注文字是否一致。
+        """
+        indices = [s.source_idx for s in spec_codes if s.code == match.spec_code]
+        indices += [i for p in page_codes if p.page == match.page_code for i in p.source_indices]
+        points = [point for i in indices if 0 <= i < len(text_boxes) for point in text_boxes[i].bbox]
+        if not points:
+            return None
+        xs = [int(x) for x, _ in points]
+        ys = [int(y) for _, y in points]
+        return [min(xs), min(ys), max(xs), max(ys)]
+
     def _success_response(self, matches: List[SpecMatch]) -> Dict[str, Any]:
         """生成成功响应"""
         best_match = matches[0]
         candidates = ResultFilter.get_top_n(matches, n=5)
 
         # 查找对应的PDF文件
-        pdf_file = self.file_index.find_file(best_match.spec_code, best_match.page_code)
+        with metrics.stage("file_lookup"):
+            pdf_file = self.file_index.find_file(best_match.spec_code, best_match.page_code)
 
         response = {
             "success": True,
@@ -273,7 +387,8 @@ class SpecLocatorPipeline:
                 return self._error_response(ErrorCode.LLM_NOT_CONFIGURED)
             
             logger.info("Processing with LLM...")
-            llm_result = self.llm_engine.recognize(image)
+            with metrics.stage("llm"):
+                llm_result = self.llm_engine.recognize(image)
             
             # 🔍 测试：打印LLM最终返回结果
             print("\n" + "="*80)
@@ -296,10 +411,11 @@ class SpecLocatorPipeline:
                 }
             
             # 查找对应的PDF文件
-            pdf_file = self.file_index.find_file(
-                llm_result["spec_code"],
-                llm_result["page_code"]
-            )
+            with metrics.stage("file_lookup"):
+                pdf_file = self.file_index.find_file(
+                    llm_result["spec_code"],
+                    llm_result["page_code"]
+                )
             
             response = {
                 "success": True,
@@ -356,11 +472,15 @@ class SpecLocatorPipeline:
             llm_result = self._process_with_llm(image)
             
             if llm_result["success"]:
+                metrics.record_event("llm_fallback", "success")
                 if "metadata" not in llm_result:
                     llm_result["metadata"] = {}
                 llm_result["metadata"]["ocr_confidence"] = ocr_confidence
                 llm_result["metadata"]["fallback_reason"] = "low_ocr_confidence"
                 return llm_result
+            metrics.record_event("llm_fallback", "failed")
+        else:
+            metrics.record_event("llm_fallback", "unavailable")
         
         # 5. LLM也失败，返回OCR结果（带降级标记）
         logger.warning("LLM also failed, returning OCR result")
@@ -0,0 +1,139 @@
+"""
+识别结果缓存
+- 以解码后图像内容的哈希、识别方式与流水线配置版本作为键
+- 内存 LRU 层（带 TTL）
+- 可选 SQLite 磁盘层，服务重启后仍可命中
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def image_digest(image: np.ndarray) -> str:
+    """计算解码后图像内容的哈希（包含尺寸与数据类型）"""
+    hasher = hashlib.sha256()
+    hasher.update(f"{image.shape}|{image.dtype}".encode())
+    hasher.update(np.ascontiguousarray(image).data)
+    return hasher.hexdigest()
+
+
+class ResultCache:
+    """两级识别结果缓存（内存 LRU + 可选磁盘）"""
+
+    # 磁盘层每写入多少次清理一次过期记录
+    PRUNE_INTERVAL = 256
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600, disk_path: Optional[str] = None):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 内存层最大条目数
+            ttl: 过期时间（秒）
+            disk_path: SQLite 文件路径，为 None 时不启用磁盘层
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = {"memory": 0, "disk": 0}
+        self._misses = 0
+
+        self._db = None
+        self._writes = 0
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+            logger.info(f"识别结果磁盘缓存: {disk_path}")
+
+    @staticmethod
+    def make_key(digest: str, method: str, config_version: str) -> str:
+        """组合缓存键"""
+        return f"{config_version}:{method}:{digest}"
+
+    def get(self, key: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        查询缓存
+
+        Returns:
+            (结果字典, 命中层级 "memory" | "disk")，未命中返回 (None, None)
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if now - created < self.ttl:
+                    self._memory.move_to_end(key)
+                    self._hits["memory"] += 1
+                    return json.loads(value), "memory"
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] < self.ttl:
+                    value, created = row
+                    self._remember(key, created, value)
+                    self._hits["disk"] += 1
+                    return json.loads(value), "disk"
+
+            self._misses += 1
+            return None, None
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """写入缓存"""
+        value = json.dumps(result, ensure_ascii=False)
+        created = time.time()
+        with self._lock:
+            self._remember(key, created, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, created) VALUES (?, ?, ?)",
+                    (key, value, created),
+                )
+                self._writes += 1
+                if self._writes % self.PRUNE_INTERVAL == 0:
+                    self._db.execute("DELETE FROM results WHERE created < ?", (created - self.ttl,))
+                self._db.commit()
+
+    def _remember(self, key: str, created: float, value: str):
+        """写入内存层并按 LRU 淘汰，调用方需持有锁"""
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            return {
+                "entries": len(self._memory),
+                "max_entries": self.max_entries,
+                "disk_enabled": self._db is not None,
+                "hits": dict(self._hits),
+                "misses": self._misses,
+            }
+
+    def close(self):
+        """关闭磁盘层连接"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
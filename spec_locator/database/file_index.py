@@ -3,16 +3,24 @@
 - 扫描 output_pages 目录
 - 建立规范编号到文件的映射
 - 提供文件查找功能
+- 并行采集文件元数据（大小、修改时间、页数、内容哈希）
 """
 
 import os
 import re
+import hashlib
 import logging
-from typing import List, Optional, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Tuple
 from dataclasses import dataclass
 from pathlib import Path
 
-from spec_locator.config import PathConfig
+from spec_locator.config import PathConfig, IndexConfig
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:  # 未安装时页数未知（0）
+    fitz = None
 
 logger = logging.getLogger(__name__)
 
@@ -25,24 +33,66 @@ class SpecFile:
     file_path: str  # 文件路径
     file_name: str  # 文件名
     directory: str  # 所在目录名
+    size: int = 0  # 文件大小（字节），0 表示元数据未采集
+    mtime: float = 0.0  # 修改时间
+    page_count: int = 0  # PDF 页数，0 表示未知
+    content_hash: str = ""  # 内容 SHA-256
+
+    @property
+    def has_metadata(self) -> bool:
+        """是否已采集元数据"""
+        return bool(self.content_hash)
+
+    @property
+    def etag(self) -> str:
+        """基于内容哈希的强 ETag"""
+        return f'"{self.content_hash}"'
+
+
+def _file_metadata(file_path: str) -> Tuple[int, float, int, str]:
+    """
+    采集单个文件的元数据
+
+    Returns:
+        (大小, 修改时间, 页数, 内容 SHA-256)
+    """
+    stat = os.stat(file_path)
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+
+    page_count = 0
+    if fitz is not None:
+        try:
+            with fitz.open(file_path) as doc:
+                page_count = len(doc)
+        except Exception as e:
+            logger.warning(f"Failed to read page count: {file_path}: {e}")
+    return stat.st_size, stat.st_mtime, page_count, hasher.hexdigest()
 
 
 class FileIndex:
     """文件索引"""
 
-    def __init__(self, data_dir: str = None):
+    def __init__(self, data_dir: str = None, collect_metadata: bool = None):
         """
         初始化文件索引
 
         Args:
             data_dir: 数据目录路径，默认使用配置中的 SPEC_DATA_DIR
+            collect_metadata: 是否采集文件元数据，默认使用配置 INDEX_METADATA_ENABLED
         """
         if data_dir is None:
             data_dir = PathConfig.SPEC_DATA_DIR
+        if collect_metadata is None:
+            collect_metadata = IndexConfig.METADATA_ENABLED
         
         self.data_dir = Path(data_dir)
         self.index: Dict[str, List[SpecFile]] = {}
         self._build_index()
+        if collect_metadata:
+            self._collect_metadata()
 
     def _build_index(self):
         """构建文件索引"""
@@ -85,8 +135,37 @@ class FileIndex:
                     self.index[spec_code].append(spec_file)
                     file_count += 1
 
+        # 按页码自然顺序排列（C2 < C11），相邻页面即图集中的相邻图纸
+        for spec_files in self.index.values():
+            spec_files.sort(key=lambda f: self._page_sort_key(f.page_code))
+
         logger.info(f"Index built: {len(self.index)} spec codes, {file_count} files")
 
+    def _collect_metadata(self):
+        """并行采集所有文件的元数据（文件读取与哈希计算释放 GIL）"""
+        files = [spec_file for spec_files in self.index.values() for spec_file in spec_files]
+        if not files:
+            return
+
+        def collect(spec_file: SpecFile):
+            try:
+                spec_file.size, spec_file.mtime, spec_file.page_count, spec_file.content_hash = _file_metadata(
+                    spec_file.file_path
+                )
+            except OSError as e:
+                logger.warning(f"Failed to collect metadata: {spec_file.file_path}: {e}")
+
+        with ThreadPoolExecutor(max_workers=IndexConfig.METADATA_WORKERS) as executor:
+            list(executor.map(collect, files))
+
+        collected = sum(1 for spec_file in files if spec_file.has_metadata)
+        logger.info(f"Metadata collected: {collected}/{len(files)} files")
+
+    @staticmethod
+    def _page_sort_key(page_code: str) -> tuple:
+        """页码自然排序键：数字部分按数值比较"""
+        return tuple(int(part) if part.isdigit() else part.upper() for part in re.split(r'(\d+)', page_code))
+
     def _extract_spec_from_dirname(self, dirname: str) -> Optional[str]:
         """
         从目录名提取规范编号
@@ -244,4 +323,5 @@ class FileIndex:
         return {
             "spec_codes": len(self.index),
             "total_files": total_files,
+            "total_bytes": sum(f.size for files in self.index.values() for f in files),
         }
@@ -3,5 +3,8 @@ OCR 模块初始化
 """
 
 from spec_locator.ocr.ocr_engine import OCREngine, TextBox
+from spec_locator.ocr.batch_scheduler import OCRBatchScheduler
+from spec_locator.ocr.engine_pool import OCREnginePool
+from spec_locator.ocr.box_filter import BoxFilter
 
-__all__ = ["OCREngine", "TextBox"]
+__all__ = ["OCREngine", "TextBox", "OCRBatchScheduler", "OCREnginePool", "BoxFilter"]
@@ -0,0 +1,102 @@
+"""
+OCR 微批处理调度器
+- 收集短时间窗口内到达的并发识别请求
+- 合并为一次 OCREngine.recognize_batch 推理
+- 将结果分发回各自的调用方
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Tuple
+
+import numpy as np
+
+from spec_locator.ocr.ocr_engine import OCREngine, TextBox
+
+logger = logging.getLogger(__name__)
+
+
+class OCRBatchScheduler:
+    """OCR 微批处理调度器，对外提供与 OCREngine 相同的 recognize 接口"""
+
+    def __init__(self, engine: OCREngine, window_ms: float = 10, max_batch_size: int = 8):
+        """
+        初始化调度器
+
+        Args:
+            engine: 底层 OCR 引擎
+            window_ms: 收集窗口（毫秒），首个请求到达后最多等待该时长凑批
+            max_batch_size: 单批最大图像数，达到后立即执行
+        """
+        self.engine = engine
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+
+        self._queue: "queue.Queue[Tuple[np.ndarray, Future]]" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        logger.info(f"OCRBatchScheduler 创建: window={window_ms}ms, max_batch_size={self.max_batch_size}")
+
+    def recognize(self, image: np.ndarray) -> List[TextBox]:
+        """
+        提交一张图像并阻塞等待其识别结果
+
+        Args:
+            image: 输入图像（BGR 或灰度格式）
+
+        Returns:
+            文本框列表
+        """
+        self._ensure_started()
+        future: Future = Future()
+        self._queue.put((image, future))
+        return future.result()
+
+    def warmup(self):
+        """预热底层引擎"""
+        self.engine.warmup()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ocr-batch", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> List[Tuple[np.ndarray, Future]]:
+        """阻塞等待首个请求，然后在窗口期内继续收集直到凑满一批"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            images = [image for image, _ in batch]
+            try:
+                if len(images) == 1:
+                    results = [self.engine.recognize(images[0])]
+                else:
+                    results = self.engine.recognize_batch(images)
+                logger.debug(f"OCR micro-batch executed: size={len(images)}")
+            except Exception as e:
+                logger.error(f"OCR micro-batch failed: {e}", exc_info=True)
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), text_boxes in zip(batch, results):
+                future.set_result(text_boxes)
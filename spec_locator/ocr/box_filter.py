@@ -0,0 +1,126 @@
+"""
+检测框几何筛选（先检测、后选择性识别）
+- CAD 截图中大量文本框是尺寸数字与说明文字，与规范编号、页码无关
+- 检测后按几何特征筛选文本框，只对保留的文本行做识别：
+  - 高度：过小的多为噪点，过大的多为图名等标题
+  - 宽高比：规范编号、页码是短文本，长说明文字宽高比很大
+  - 与索引圆的距离：规范编号和页码标注在索引符号（圆圈）内或引出线旁，
+    检测到圆圈时只保留其附近的文本框
+- 筛选偏保守：按索引圆筛选后一个文本框都不剩时退回只按形状筛选的结果
+"""
+
+import logging
+from typing import List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def box_size(box: np.ndarray) -> Tuple[float, float]:
+    """四边形文本框的 (宽, 高)（按边长计算，兼容倾斜文本框）"""
+    points = np.asarray(box, dtype=np.float32)
+    width = (np.linalg.norm(points[0] - points[1]) + np.linalg.norm(points[3] - points[2])) / 2
+    height = (np.linalg.norm(points[0] - points[3]) + np.linalg.norm(points[1] - points[2])) / 2
+    return float(width), float(height)
+
+
+class BoxFilter:
+    """检测框几何筛选器（无状态，可在多个引擎副本间共享）"""
+
+    def __init__(
+        self,
+        min_height: float = 6,
+        max_height: float = 150,
+        min_aspect: float = 0.3,
+        max_aspect: float = 15.0,
+        use_circles: bool = True,
+        circle_reach: float = 6.0,
+        min_circle_radius: int = 8,
+        max_circle_radius: int = 80,
+        circle_detect_side: int = 1600,
+    ):
+        """
+        Args:
+            min_height: 最小文本高度（像素）
+            max_height: 最大文本高度（像素）
+            min_aspect: 最小宽高比（竖排文本按旋转后计算）
+            max_aspect: 最大宽高比
+            use_circles: 是否按与索引圆的距离筛选
+            circle_reach: 文本框中心与圆心距离不超过 半径 × 该值 时保留
+            min_circle_radius: 索引圆最小半径（像素）
+            max_circle_radius: 索引圆最大半径（像素）
+            circle_detect_side: 圆检测前将图像缩放到的最长边（降低霍夫变换耗时）
+        """
+        self.min_height = min_height
+        self.max_height = max_height
+        self.min_aspect = min_aspect
+        self.max_aspect = max_aspect
+        self.use_circles = use_circles
+        self.circle_reach = circle_reach
+        self.min_circle_radius = min_circle_radius
+        self.max_circle_radius = max_circle_radius
+        self.circle_detect_side = circle_detect_side
+
+    def _shape_ok(self, box: np.ndarray) -> bool:
+        width, height = box_size(box)
+        if height > width * 1.5:  # 竖排文本（识别前会旋转为横排）
+            width, height = height, width
+        if not self.min_height <= height <= self.max_height:
+            return False
+        aspect = width / max(height, 1e-6)
+        return self.min_aspect <= aspect <= self.max_aspect
+
+    def detect_circles(self, image: np.ndarray) -> np.ndarray:
+        """
+        检测索引圆
+
+        Returns:
+            (K, 3) 数组，每行为原图坐标下的 (x, y, 半径)
+        """
+        gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        scale = min(1.0, self.circle_detect_side / max(gray.shape[:2]))
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        min_radius = max(3, int(self.min_circle_radius * scale))
+        circles = cv2.HoughCircles(
+            cv2.medianBlur(gray, 3),
+            cv2.HOUGH_GRADIENT,
+            dp=1,
+            minDist=2 * min_radius,
+            param1=100,
+            param2=30,
+            minRadius=min_radius,
+            maxRadius=max(min_radius + 1, int(self.max_circle_radius * scale)),
+        )
+        if circles is None:
+            return np.zeros((0, 3), dtype=np.float32)
+        return circles[0].astype(np.float32) / scale
+
+    def filter(self, image: np.ndarray, boxes: Sequence[np.ndarray]) -> List[np.ndarray]:
+        """
+        筛选检测框
+
+        Args:
+            image: 检测所用的图像
+            boxes: 检测框（四点坐标）
+
+        Returns:
+            保留的检测框（保持原顺序）
+        """
+        kept = [box for box in boxes if self._shape_ok(box)]
+        if not kept or not self.use_circles:
+            return kept
+
+        circles = self.detect_circles(image)
+        if len(circles) == 0:
+            return kept
+
+        centers = np.array([np.asarray(box, dtype=np.float32).mean(axis=0) for box in kept])
+        distances = np.linalg.norm(centers[:, np.newaxis, :] - circles[np.newaxis, :, :2], axis=2)
+        near = (distances <= circles[np.newaxis, :, 2] * self.circle_reach).any(axis=1)
+        if not near.any():
+            logger.debug(f"{len(circles)} 个圆附近没有文本框，只按形状筛选")
+            return kept
+        return [box for box, keep in zip(kept, near) if keep]
@@ -0,0 +1,216 @@
+"""
+OCR 后端对比（延迟 / 一致性 / 准确率）
+- 对同一批图片依次运行 paddle、onnx、onnx-int8 后端
+- 延迟：每张图片重复 N 次，统计均值、P50、P95（首次调用作为预热不计入）
+- 一致性：与第一个后端（参考后端）识别文本的字符级相似度
+- 准确率：提供标注文件时，统计期望文本（如规范编号、页码）被识别出的比例
+
+使用方法：
+    python -m spec_locator.ocr.compare_backends samples/ --runs 5
+    python -m spec_locator.ocr.compare_backends samples/ --labels labels.json --json report.json
+
+标注文件格式：{"图片文件名": ["12J2", "C11"], ...}
+"""
+
+import argparse
+import difflib
+import json
+import logging
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+import cv2
+import numpy as np
+
+from spec_locator.config import OCRConfig
+from spec_locator.ocr.ocr_engine import OCREngine, TextBox
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+BACKENDS = ("paddle", "onnx", "onnx-int8")
+
+
+def collect_images(paths: Sequence[str]) -> List[str]:
+    """展开文件与目录为图片路径列表"""
+    images = []
+    for path in paths:
+        if os.path.isdir(path):
+            images.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+        else:
+            images.append(path)
+    return images
+
+
+def create_engine(backend: str, cpu_threads: Optional[int] = None) -> OCREngine:
+    """按后端名称创建并加载 OCR 引擎（onnx-int8 为启用 int8 动态量化的 onnx 后端）"""
+    engine = OCREngine(
+        use_gpu=False,
+        conf_threshold=OCRConfig.CONF_THRESHOLD,
+        lazy_load=True,
+        cpu_threads=cpu_threads,
+        backend="paddle" if backend == "paddle" else "onnx",
+    )
+    if backend == "onnx-int8":
+        from spec_locator.ocr.onnx_backend import OnnxOCR
+
+        with engine._init_lock:
+            engine.recognizer = OnnxOCR.from_files(
+                det_model=OCRConfig.ONNX_DET_MODEL,
+                rec_model=OCRConfig.ONNX_REC_MODEL,
+                rec_dict=OCRConfig.ONNX_REC_DICT,
+                cls_model=OCRConfig.ONNX_CLS_MODEL or None,
+                quantize=True,
+                cpu_threads=cpu_threads,
+                det_limit_side=OCRConfig.ONNX_DET_LIMIT_SIDE,
+            )
+            engine._initialized = True
+    else:
+        engine.warmup()
+    if engine.recognizer is None:
+        raise RuntimeError(f"OCR 后端 {backend} 初始化失败")
+    return engine
+
+
+def joined_text(text_boxes: List[TextBox]) -> str:
+    """按阅读顺序拼接识别文本"""
+    return "\n".join(tb.text for tb in text_boxes)
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def run_backend(engine: OCREngine, images: Dict[str, np.ndarray], runs: int) -> Dict[str, Dict]:
+    """
+    运行一个后端
+
+    Returns:
+        {图片名: {"latencies_ms": [...], "text": 识别文本, "boxes": 文本框数}}
+    """
+    results = {}
+    for name, image in images.items():
+        engine.recognize(image)  # 预热（首次推理的内存分配、算子选择等）
+        latencies = []
+        text_boxes: List[TextBox] = []
+        for _ in range(max(1, runs)):
+            start = time.perf_counter()
+            text_boxes = engine.recognize(image)
+            latencies.append((time.perf_counter() - start) * 1000)
+        results[name] = {"latencies_ms": latencies, "text": joined_text(text_boxes), "boxes": len(text_boxes)}
+    return results
+
+
+def summarize(
+    backend_results: Dict[str, Dict[str, Dict]],
+    labels: Optional[Dict[str, List[str]]] = None,
+) -> Dict[str, Dict]:
+    """
+    汇总各后端的延迟、与参考后端的一致性及标注准确率
+
+    Args:
+        backend_results: {后端: run_backend 的返回值}，第一个后端作为参考
+        labels: {图片名: 期望出现的文本列表}
+
+    Returns:
+        {后端: 汇总指标}
+    """
+    reference = next(iter(backend_results))
+    summary = {}
+    for backend, results in backend_results.items():
+        latencies = [ms for result in results.values() for ms in result["latencies_ms"]]
+        similarities = [
+            difflib.SequenceMatcher(None, backend_results[reference][name]["text"], result["text"]).ratio()
+            for name, result in results.items()
+        ]
+        row = {
+            "images": len(results),
+            "mean_ms": round(float(np.mean(latencies)), 1) if latencies else 0.0,
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "boxes": sum(result["boxes"] for result in results.values()),
+            "agreement": round(float(np.mean(similarities)), 4) if similarities else 0.0,
+        }
+        if labels:
+            expected = [
+                (name, text) for name in results for text in labels.get(name, [])
+            ]
+            found = sum(
+                1 for name, text in expected
+                if text.replace(" ", "").upper() in results[name]["text"].replace(" ", "").upper()
+            )
+            row["label_recall"] = round(found / len(expected), 4) if expected else None
+        summary[backend] = row
+    return summary
+
+
+def format_table(summary: Dict[str, Dict], reference: str) -> str:
+    """格式化为文本表格"""
+    columns = ["mean_ms", "p50_ms", "p95_ms", "boxes", "agreement"]
+    if any("label_recall" in row for row in summary.values()):
+        columns.append("label_recall")
+    header = f"{'backend':<12}" + "".join(f"{column:>14}" for column in columns)
+    lines = [header, "-" * len(header)]
+    for backend, row in summary.items():
+        lines.append(f"{backend:<12}" + "".join(f"{str(row.get(column)):>14}" for column in columns))
+    lines.append(f"agreement: 与参考后端 {reference} 识别文本的字符级相似度")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="对比 OCR 推理后端的延迟与识别一致性")
+    parser.add_argument("images", nargs="+", help="图片文件或目录")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS), help="参与对比的后端，第一个为参考")
+    parser.add_argument("--runs", type=int, default=3, help="每张图片的计时次数")
+    parser.add_argument("--threads", type=int, default=OCRConfig.CPU_THREADS or None, help="算子内线程数")
+    parser.add_argument("--labels", help="标注文件（JSON：图片文件名 -> 期望文本列表）")
+    parser.add_argument("--json", help="将明细与汇总写入 JSON 文件")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    images = {}
+    for path in collect_images(args.images):
+        image = cv2.imread(path)
+        if image is None:
+            logger.warning(f"无法读取图片: {path}")
+            continue
+        images[os.path.basename(path)] = image
+    if not images:
+        parser.error("没有可用的图片")
+
+    labels = None
+    if args.labels:
+        with open(args.labels, "r", encoding="utf-8") as f:
+            labels = json.load(f)
+
+    backend_results = {}
+    for backend in args.backends:
+        try:
+            engine = create_engine(backend, args.threads)
+        except Exception as e:
+            logger.error(f"跳过后端 {backend}: {e}")
+            continue
+        logger.info(f"运行后端 {backend}（{len(images)} 张图片 × {args.runs} 次）")
+        backend_results[backend] = run_backend(engine, images, args.runs)
+    if not backend_results:
+        logger.error("没有可用的 OCR 后端")
+        return 1
+
+    summary = summarize(backend_results, labels)
+    print(format_table(summary, next(iter(backend_results))))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "results": backend_results}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+OCR 引擎副本池
+- PaddleOCR 实例不支持并发调用，单个 OCREngine 同一时刻只能执行一次识别
+- 池内持有 N 个独立初始化的 OCREngine，每个请求借出一个副本，实现进程内并行推理
+- 每个副本可单独设置算子内线程数，按 "副本数 × 线程数 ≈ vCPU 数" 调优
+- 需要分块识别的大图，各分块分摊到多个副本上并行识别
+"""
+
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from spec_locator.ocr.ocr_engine import OCREngine, TextBox
+from spec_locator.ocr.tiling import merge_tile_results, needs_tiling, split_image
+
+logger = logging.getLogger(__name__)
+
+
+def default_cpu_threads(replicas: int) -> int:
+    """按 CPU 核数平分给各副本的线程数（至少 1）"""
+    return max(1, (os.cpu_count() or 1) // max(1, replicas))
+
+
+class OCREnginePool:
+    """OCR 引擎副本池，对外提供与 OCREngine 相同的识别接口"""
+
+    def __init__(
+        self,
+        replicas: int = 2,
+        cpu_threads: Optional[int] = None,
+        use_gpu: bool = False,
+        conf_threshold: float = 0.3,
+        lazy_load: bool = True,
+        engine_factory: Optional[Callable[[], Any]] = None,
+        backend: str = "paddle",
+        tile_threshold: int = 0,
+        tile_size: int = 1280,
+        tile_overlap: int = 160,
+        box_filter: Optional[Any] = None,
+    ):
+        """
+        初始化副本池
+
+        副本按后进先出借出：负载较低时总是复用最近使用过的副本，懒加载模式下
+        只有并发真正升高时才会加载更多模型。
+
+        Args:
+            replicas: 副本数
+            cpu_threads: 每个副本的算子内线程数，None 时按 CPU 核数平分
+            use_gpu: 是否使用 GPU
+            conf_threshold: 置信度阈值
+            lazy_load: 是否懒加载（False 时立即并行加载全部副本）
+            engine_factory: 副本构造函数（测试用），默认创建 OCREngine
+            backend: 推理后端 ("paddle" | "onnx")
+            tile_threshold: 图像最长边超过该值时分块识别，0 表示不分块
+            tile_size: 分块边长
+            tile_overlap: 相邻分块的重叠宽度
+            box_filter: 检测框筛选器（各副本共享）
+        """
+        self.replicas = max(1, replicas)
+        self.cpu_threads = cpu_threads or default_cpu_threads(self.replicas)
+        self.conf_threshold = conf_threshold
+        self.tile_threshold = tile_threshold
+        self.tile_size = min(tile_size, tile_threshold) if tile_threshold > 0 else tile_size
+        self.tile_overlap = tile_overlap
+
+        if engine_factory is None:
+            def engine_factory():
+                return OCREngine(
+                    use_gpu=use_gpu,
+                    conf_threshold=conf_threshold,
+                    lazy_load=True,
+                    cpu_threads=self.cpu_threads,
+                    backend=backend,
+                    tile_threshold=tile_threshold,
+                    tile_size=tile_size,
+                    tile_overlap=tile_overlap,
+                    box_filter=box_filter,
+                )
+
+        self.engines: List[Any] = [engine_factory() for _ in range(self.replicas)]
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        for engine in reversed(self.engines):
+            self._idle.put(engine)
+
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._checkouts = 0
+
+        logger.info(f"OCREnginePool 创建: replicas={self.replicas}, cpu_threads={self.cpu_threads}")
+        if not lazy_load:
+            self.warmup()
+
+    @contextmanager
+    def checkout(self) -> Iterator[Any]:
+        """借出一个空闲副本（全部忙碌时阻塞等待），退出时归还"""
+        with self._lock:
+            self._waiting += 1
+        try:
+            engine = self._idle.get()
+        finally:
+            with self._lock:
+                self._waiting -= 1
+                self._checkouts += 1
+        try:
+            yield engine
+        finally:
+            self._idle.put(engine)
+
+    def recognize(self, image: np.ndarray) -> List[TextBox]:
+        """借出一个副本识别单张图像（需要分块的大图由多个副本并行识别）"""
+        if self.replicas > 1 and needs_tiling(image, self.tile_threshold):
+            return self._recognize_tiled(image)
+        with self.checkout() as engine:
+            return engine.recognize(image)
+
+    def _recognize_tiled(self, image: np.ndarray) -> List[TextBox]:
+        """分块后按副本数分组，每组借出一个副本批量识别，最后合并回全图坐标"""
+        tiles = split_image(image, self.tile_size, self.tile_overlap)
+        workers = min(self.replicas, len(tiles))
+        groups = [list(range(i, len(tiles), workers)) for i in range(workers)]
+
+        def run(indices: List[int]) -> List[List[TextBox]]:
+            with self.checkout() as engine:
+                return engine.recognize_batch([tiles[i][1] for i in indices])
+
+        tile_results: List[List[TextBox]] = [[] for _ in tiles]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr-tile") as executor:
+            for indices, results in zip(groups, executor.map(run, groups)):
+                for i, result in zip(indices, results):
+                    tile_results[i] = result
+        return merge_tile_results([rect for rect, _ in tiles], tile_results, image.shape[:2])
+
+    def recognize_batch(self, images: List[np.ndarray]) -> List[List[TextBox]]:
+        """借出一个副本批量识别"""
+        with self.checkout() as engine:
+            return engine.recognize_batch(images)
+
+    def warmup(self):
+        """并行加载全部副本的模型"""
+        threads = [
+            threading.Thread(target=engine.warmup, name=f"ocr-warmup-{i}", daemon=True)
+            for i, engine in enumerate(self.engines)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    @property
+    def _initialized(self) -> bool:
+        """至少一个副本已加载模型（与 OCREngine 的同名属性含义一致）"""
+        return any(getattr(engine, "_initialized", False) for engine in self.engines)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取副本池状态"""
+        with self._lock:
+            waiting = self._waiting
+            checkouts = self._checkouts
+        idle = self._idle.qsize()
+        return {
+            "replicas": self.replicas,
+            "cpu_threads": self.cpu_threads,
+            "loaded": sum(1 for engine in self.engines if getattr(engine, "_initialized", False)),
+            "busy": self.replicas - idle,
+            "waiting": waiting,
+            "checkouts": checkouts,
+        }
@@ -7,7 +7,8 @@ OCR 引擎封装模块
 
 import logging
 import threading
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Optional
+import cv2
 import numpy as np
 from dataclasses import dataclass
 
@@ -39,7 +40,18 @@ class TextBox:
 class OCREngine:
     """OCR 引擎（支持懒加载）"""
 
-    def __init__(self, use_gpu: bool = True, conf_threshold: float = 0.3, lazy_load: bool = True):
+    def __init__(
+        self,
+        use_gpu: bool = True,
+        conf_threshold: float = 0.3,
+        lazy_load: bool = True,
+        cpu_threads: Optional[int] = None,
+        backend: str = "paddle",
+        tile_threshold: int = 0,
+        tile_size: int = 1280,
+        tile_overlap: int = 160,
+        box_filter: Optional[Any] = None,
+    ):
         """
         初始化 OCR 引擎（懒加载模式）
 
@@ -47,12 +59,28 @@ class OCREngine:
             use_gpu: 是否使用 GPU
             conf_threshold: 置信度阈值
             lazy_load: 是否使用懒加载（默认True，首次使用时才加载模型）
+            cpu_threads: CPU 推理的算子内线程数，None 时使用推理库默认值
+            backend: 推理后端 ("paddle" | "onnx")，onnx 使用 OCRConfig 中配置的 ONNX 模型
+            tile_threshold: 图像最长边超过该值时分块识别，0 表示不分块
+            tile_size: 分块边长（不超过 tile_threshold）
+            tile_overlap: 相邻分块的重叠宽度（应大于常见文本行长度，使多数文本完整落在某一分块内）
+            box_filter: 检测框筛选器（如 BoxFilter），设置后先检测、筛选，只识别保留的文本行；
+                需要识别器暴露分阶段接口，否则不生效
         """
+        if backend not in ("paddle", "onnx"):
+            raise ValueError(f"Unknown OCR backend: {backend}")
         self.use_gpu = use_gpu
         self.conf_threshold = conf_threshold
+        self.cpu_threads = cpu_threads
+        self.backend = backend
+        self.tile_threshold = tile_threshold
+        self.tile_size = min(tile_size, tile_threshold) if tile_threshold > 0 else tile_size
+        self.tile_overlap = tile_overlap
+        self.box_filter = box_filter
         self.recognizer = None
         self._initialized = False  # 标记是否已初始化
         self._init_lock = threading.Lock()  # 线程锁，确保线程安全
+        self._infer_lock = threading.Lock()  # 推理锁：PaddleOCR 实例不支持并发调用
         
         if lazy_load:
             logger.info("OCREngine 创建（懒加载模式，模型将在首次使用时加载）")
@@ -62,6 +90,36 @@ class OCREngine:
             self._initialized = True
 
     def _initialize_ocr(self):
+        """按配置的后端初始化识别器"""
+        if self.backend == "onnx":
+            self._initialize_onnx()
+        else:
+            self._initialize_paddle()
+
+    def _initialize_onnx(self):
+        """初始化 ONNX Runtime 后端（转换后的 PP-OCR 模型），失败时识别器为 None"""
+        from spec_locator.config import OCRConfig
+
+        try:
+            from spec_locator.ocr.onnx_backend import OnnxOCR
+
+            self.recognizer = OnnxOCR.from_files(
+                det_model=OCRConfig.ONNX_DET_MODEL,
+                rec_model=OCRConfig.ONNX_REC_MODEL,
+                rec_dict=OCRConfig.ONNX_REC_DICT,
+                cls_model=OCRConfig.ONNX_CLS_MODEL or None,
+                quantize=OCRConfig.ONNX_QUANTIZE,
+                cpu_threads=self.cpu_threads,
+                det_limit_side=OCRConfig.ONNX_DET_LIMIT_SIDE,
+            )
+        except ImportError:
+            logger.warning("onnxruntime not installed. Install with: pip install onnxruntime")
+            self.recognizer = None
+        except Exception as e:
+            logger.error(f"ONNX OCR initialization failed: {e}")
+            self.recognizer = None
+
+    def _initialize_paddle(self):
         """
         初始化 PaddleOCR，包含多层降级策略
         
@@ -80,6 +138,7 @@ class OCREngine:
                 self.recognizer = PaddleOCR(
                     use_angle_cls=True,
                     lang="ch",
+                    **self._thread_kwargs(),
                     device='gpu' if self.use_gpu else 'cpu',
                     enable_mkldnn=False,  # 禁用OneDNN/MKL-DNN优化，避免PIR兼容性问题
                     use_mp=False,  # 禁用多进程
@@ -97,6 +156,7 @@ class OCREngine:
                 self.recognizer = PaddleOCR(
                     use_angle_cls=False,
                     lang="ch",
+                    **self._thread_kwargs(),
                     device='gpu' if self.use_gpu else 'cpu',
                 )
                 logger.warning("⚠ PaddleOCR initialized with new API - angle classification disabled")
@@ -112,6 +172,7 @@ class OCREngine:
                 self.recognizer = PaddleOCR(
                     use_angle_cls=True,
                     lang="ch",
+                    **self._thread_kwargs(),
                     use_gpu=self.use_gpu,
                 )
                 logger.info("✓ PaddleOCR initialized with old API (<v2.7.0) + angle_cls")
@@ -127,6 +188,7 @@ class OCREngine:
                 self.recognizer = PaddleOCR(
                     use_angle_cls=False,
                     lang="ch",
+                    **self._thread_kwargs(),
                     use_gpu=self.use_gpu,
                 )
                 logger.warning("⚠ PaddleOCR initialized with old API - angle classification disabled")
@@ -147,6 +209,10 @@ class OCREngine:
             logger.error(f"Unexpected error during PaddleOCR initialization: {e}")
             self.recognizer = None
 
+    def _thread_kwargs(self) -> Dict[str, Any]:
+        """CPU 线程数参数（未配置时不传，沿用 PaddleOCR 默认值）"""
+        return {"cpu_threads": self.cpu_threads} if self.cpu_threads else {}
+
     def _ensure_initialized(self):
         """
         确保 OCR 已初始化（懒加载入口点）
@@ -191,11 +257,16 @@ class OCREngine:
             logger.error("OCR engine 初始化失败")
             return []
 
+        # 分块识别与选择性识别都在批量识别的分阶段流程中完成
+        if self._needs_tiling(image) or (self.box_filter is not None and self._supports_stage_api()):
+            return self.recognize_batch([image])[0]
+
         try:
             # PaddleOCR API 注意：
             # - 旧版本：ocr(image, cls=True)
             # - 新版本（2.7.0+）：直接调用，cls 参数在初始化时设置
-            results = self.recognizer.ocr(image)
+            with self._infer_lock:
+                results = self.recognizer.ocr(image)
             print(f"DEBUG: PaddleOCR 原始返回内容: {results}")
             text_boxes = self._parse_results(results)
             logger.info(f"OCR recognized {len(text_boxes)} text boxes")
@@ -209,6 +280,148 @@ class OCREngine:
             logger.warning("  4. Try CPU mode by initializing with use_gpu=False")
             return []
 
+    def recognize_batch(self, images: List[np.ndarray]) -> List[List[TextBox]]:
+        """
+        批量识别多张图像
+
+        检测阶段逐张执行（PP-OCR 检测模型按单图推理），随后将所有图像的文本行
+        裁剪合并为一次识别（及方向分类）推理，再按图像拆分结果。
+        设置了检测框筛选器时，只裁剪识别筛选后保留的文本行。
+        若当前 PaddleOCR 版本不暴露分阶段接口，则逐张调用 recognize。
+
+        Args:
+            images: 输入图像列表（BGR 或灰度格式）
+
+        Returns:
+            与输入一一对应的文本框列表
+        """
+        self._ensure_initialized()
+
+        if self.recognizer is None:
+            logger.error("OCR engine 初始化失败")
+            return [[] for _ in images]
+
+        if any(self._needs_tiling(image) for image in images):
+            return self._recognize_batch_tiled(images)
+
+        if not self._supports_stage_api():
+            return [self.recognize(image) for image in images]
+
+        try:
+            with self._infer_lock:
+                # 1. 逐张检测并裁剪文本行
+                boxes_per_image = []
+                crops = []
+                for image in images:
+                    if image.ndim == 2:
+                        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+                    dt_boxes, _ = self.recognizer.text_detector(image)
+                    dt_boxes = [] if dt_boxes is None else list(dt_boxes)
+                    if self.box_filter is not None and dt_boxes:
+                        detected = len(dt_boxes)
+                        dt_boxes = self.box_filter.filter(image, dt_boxes)
+                        logger.debug(f"OCR selective recognition: {len(dt_boxes)}/{detected} boxes kept")
+                    boxes_per_image.append(dt_boxes)
+                    crops.extend(self._crop_box(image, box) for box in dt_boxes)
+
+                # 2. 合并识别
+                rec_res = self._recognize_crops(crops)
+
+            # 3. 按图像拆分，转换为 PaddleOCR 原始返回格式后复用解析逻辑
+            batch_results = []
+            offset = 0
+            for dt_boxes in boxes_per_image:
+                lines = [
+                    [box.tolist(), (text, score)]
+                    for box, (text, score) in zip(dt_boxes, rec_res[offset:offset + len(dt_boxes)])
+                ]
+                offset += len(dt_boxes)
+                batch_results.append(self._parse_results([lines]))
+
+            logger.info(
+                f"OCR batch recognized {len(images)} images, "
+                f"{sum(len(r) for r in batch_results)} text boxes"
+            )
+            return batch_results
+        except Exception as e:
+            logger.error(f"OCR batch recognition failed: {e}")
+            return [[] for _ in images]
+
+    def _needs_tiling(self, image: np.ndarray) -> bool:
+        from spec_locator.ocr.tiling import needs_tiling
+
+        return needs_tiling(image, self.tile_threshold)
+
+    def _recognize_batch_tiled(self, images: List[np.ndarray]) -> List[List[TextBox]]:
+        """
+        大图切分为重叠分块后与其余图像一起批量识别，再将各分块结果合并回全图坐标
+
+        分块的检测逐块执行，识别阶段与批内其他文本行合并为一次推理。
+        """
+        from spec_locator.ocr.tiling import merge_tile_results, split_image
+
+        flat_images = []
+        layout = []  # 每张输入图像: None（未分块）或分块区域列表
+        for image in images:
+            if self._needs_tiling(image):
+                tiles = split_image(image, self.tile_size, self.tile_overlap)
+                layout.append([rect for rect, _ in tiles])
+                flat_images.extend(tile for _, tile in tiles)
+            else:
+                layout.append(None)
+                flat_images.append(image)
+
+        flat_results = self.recognize_batch(flat_images)
+
+        batch_results = []
+        offset = 0
+        for image, rects in zip(images, layout):
+            if rects is None:
+                batch_results.append(flat_results[offset])
+                offset += 1
+            else:
+                tile_results = flat_results[offset:offset + len(rects)]
+                offset += len(rects)
+                merged = merge_tile_results(rects, tile_results, image.shape[:2])
+                logger.info(f"OCR tiled {image.shape[1]}x{image.shape[0]} into {len(rects)} tiles, {len(merged)} text boxes")
+                batch_results.append(merged)
+        return batch_results
+
+    def _supports_stage_api(self) -> bool:
+        """PaddleOCR 2.x 的 PaddleOCR 对象继承 TextSystem，暴露检测/识别子模型"""
+        return hasattr(self.recognizer, "text_detector") and hasattr(self.recognizer, "text_recognizer")
+
+    def _recognize_crops(self, crops: List[np.ndarray]) -> List[Tuple[str, float]]:
+        """对文本行裁剪图执行（方向分类 +）识别，调用方需持有推理锁"""
+        if not crops:
+            return []
+        if getattr(self.recognizer, "use_angle_cls", False):
+            crops, _, _ = self.recognizer.text_classifier(crops)
+        rec_res, _ = self.recognizer.text_recognizer(crops)
+        return [(text, score) for text, score in rec_res]
+
+    @staticmethod
+    def _crop_box(image: np.ndarray, box: np.ndarray) -> np.ndarray:
+        """按四边形文本框透视裁剪文本行（与 PaddleOCR get_rotate_crop_image 一致）"""
+        points = np.array(box, dtype=np.float32)
+        crop_width = int(max(np.linalg.norm(points[0] - points[1]), np.linalg.norm(points[2] - points[3])))
+        crop_height = int(max(np.linalg.norm(points[0] - points[3]), np.linalg.norm(points[1] - points[2])))
+        crop_width = max(crop_width, 1)
+        crop_height = max(crop_height, 1)
+        pts_std = np.float32([[0, 0], [crop_width, 0], [crop_width, crop_height], [0, crop_height]])
+        matrix = cv2.getPerspectiveTransform(points, pts_std)
+        crop = cv2.warpPerspective(
+            image,
+            matrix,
+            (crop_width, crop_height),
+            borderMode=cv2.BORDER_REPLICATE,
+            flags=cv2.INTER_CUBIC,
+        )
+        # 竖排文本旋转为横排
+        if crop.shape[0] * 1.0 / crop.shape[1] >= 1.5:
+            crop = np.rot90(crop)
+        return crop
+
     def _parse_results(self, results: List[Any]) -> List[TextBox]:
         """
         解析 PaddleOCR 返回结果，支持多种返回格式以兼容不同版本
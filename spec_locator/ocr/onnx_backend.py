@@ -0,0 +1,420 @@
+"""
+ONNX Runtime OCR 后端
+- 使用 onnxruntime 运行转换后的 PP-OCR 检测（DB）与识别（CTC）模型，可选方向分类模型
+- 可选 int8 动态量化（首次加载时生成并缓存量化模型）
+- 对外接口与 PaddleOCR 2.x 一致：ocr(image) 返回 [[box, (text, score)], ...]，
+  并暴露 text_detector / text_recognizer 分阶段接口，OCREngine 的解析与批量识别逻辑无需改动
+
+模型转换（需安装 paddle2onnx）：
+    paddle2onnx --model_dir ch_PP-OCRv4_det_infer --model_filename inference.pdmodel \\
+        --params_filename inference.pdiparams --save_file det.onnx --opset_version 14
+    （识别模型同理；字典使用 PaddleOCR 的 ppocr_keys_v1.txt）
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyclipper
+except ImportError:  # 未安装时按最小外接矩形外扩
+    pyclipper = None
+
+# 检测预处理（与 PaddleOCR 一致，输入为 BGR 图像）
+DET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+DET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+# 识别输入高度与默认宽度（PP-OCRv3/v4: 3 x 48 x 320）
+REC_HEIGHT = 48
+REC_WIDTH = 320
+
+# 识别批大小（按宽高比排序后分批，减少填充）
+REC_BATCH_SIZE = 6
+
+
+# 量化模型生成锁：多个引擎副本并行预热时只量化一次，其余副本等待后直接复用
+_quantize_lock = threading.Lock()
+
+
+# ===== 模型与会话 =====
+
+def _is_fresh(output_path: str, model_path: str) -> bool:
+    """量化模型已存在且不早于原始模型"""
+    return os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(model_path)
+
+
+def quantize_model(model_path: str, output_path: Optional[str] = None) -> str:
+    """
+    int8 动态量化（权重量化，激活运行时量化），已存在时直接返回
+
+    Args:
+        model_path: 原始 ONNX 模型
+        output_path: 输出路径，默认在原文件名后加 .int8
+
+    Returns:
+        量化模型路径
+    """
+    if output_path is None:
+        root, ext = os.path.splitext(model_path)
+        output_path = f"{root}.int8{ext}"
+    if _is_fresh(output_path, model_path):
+        return output_path
+
+    with _quantize_lock:
+        if _is_fresh(output_path, model_path):  # 等待期间已由其他副本生成
+            return output_path
+
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        # 先写入同目录的临时文件再原子替换，其他进程不会读到写了一半的模型
+        root, ext = os.path.splitext(output_path)
+        tmp_path = f"{root}.{os.getpid()}.tmp{ext}"
+        logger.info(f"量化模型: {model_path} -> {output_path}")
+        try:
+            quantize_dynamic(model_path, tmp_path, weight_type=QuantType.QUInt8)
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return output_path
+
+
+def create_session(model_path: str, cpu_threads: Optional[int] = None) -> Any:
+    """创建 CPU 推理会话"""
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if cpu_threads:
+        options.intra_op_num_threads = cpu_threads
+        options.inter_op_num_threads = 1
+    return ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+
+def load_charset(dict_path: str, use_space_char: bool = True) -> List[str]:
+    """
+    读取识别字典（每行一个字符），索引 0 为 CTC 空白符
+
+    Returns:
+        字符表
+    """
+    with open(dict_path, "r", encoding="utf-8") as f:
+        chars = [line.rstrip("\r\n") for line in f]
+    if use_space_char:
+        chars.append(" ")
+    return ["<blank>"] + chars
+
+
+# ===== 检测 =====
+
+def resize_for_detection(image: np.ndarray, limit_side: int = 960) -> Tuple[np.ndarray, float, float]:
+    """
+    缩放至最长边不超过 limit_side，宽高取 32 的倍数
+
+    Returns:
+        (缩放后的图像, 高度缩放比, 宽度缩放比)
+    """
+    height, width = image.shape[:2]
+    ratio = min(1.0, limit_side / max(height, width))
+    resized_h = max(32, int(round(height * ratio / 32)) * 32)
+    resized_w = max(32, int(round(width * ratio / 32)) * 32)
+    resized = cv2.resize(image, (resized_w, resized_h))
+    return resized, resized_h / height, resized_w / width
+
+
+def normalize_for_detection(image: np.ndarray) -> np.ndarray:
+    """HWC BGR uint8 -> NCHW float32"""
+    data = (image.astype(np.float32) / 255.0 - DET_MEAN) / DET_STD
+    return data.transpose(2, 0, 1)[np.newaxis].astype(np.float32)
+
+
+def order_points(points: np.ndarray) -> np.ndarray:
+    """四个顶点排序为 左上、右上、右下、左下"""
+    points = points[np.argsort(points[:, 0])]
+    left = points[:2][np.argsort(points[:2, 1])]
+    right = points[2:][np.argsort(points[2:, 1])]
+    return np.array([left[0], right[0], right[1], left[1]], dtype=np.float32)
+
+
+def _box_score(prob_map: np.ndarray, box: np.ndarray) -> float:
+    """框内平均概率"""
+    height, width = prob_map.shape
+    xmin = int(np.clip(np.floor(box[:, 0].min()), 0, width - 1))
+    xmax = int(np.clip(np.ceil(box[:, 0].max()), 0, width - 1))
+    ymin = int(np.clip(np.floor(box[:, 1].min()), 0, height - 1))
+    ymax = int(np.clip(np.ceil(box[:, 1].max()), 0, height - 1))
+    mask = np.zeros((ymax - ymin + 1, xmax - xmin + 1), dtype=np.uint8)
+    shifted = (box - np.array([xmin, ymin])).astype(np.int32)
+    cv2.fillPoly(mask, [shifted], 1)
+    return float(cv2.mean(prob_map[ymin:ymax + 1, xmin:xmax + 1], mask)[0])
+
+
+def _unclip(box: np.ndarray, ratio: float) -> np.ndarray:
+    """按 DB 论文的方式外扩文本框（距离 = 面积 × ratio / 周长）"""
+    area = cv2.contourArea(box)
+    length = cv2.arcLength(box, True)
+    if length == 0:
+        return box
+    distance = area * ratio / length
+    if pyclipper is not None:
+        offset = pyclipper.PyclipperOffset()
+        offset.AddPath(box.astype(np.int64).tolist(), pyclipper.JT_ROUND, pyclipper.ET_CLOSEDPOLYGON)
+        expanded = offset.Execute(distance)
+        if expanded:
+            return np.array(expanded[0], dtype=np.float32)
+    (cx, cy), (w, h), angle = cv2.minAreaRect(box.astype(np.float32))
+    return cv2.boxPoints(((cx, cy), (w + 2 * distance, h + 2 * distance), angle))
+
+
+def db_postprocess(
+    prob_map: np.ndarray,
+    scale_h: float,
+    scale_w: float,
+    image_shape: Tuple[int, int],
+    thresh: float = 0.3,
+    box_thresh: float = 0.6,
+    unclip_ratio: float = 1.5,
+    max_candidates: int = 1000,
+    min_size: float = 3,
+) -> np.ndarray:
+    """
+    DB 概率图后处理：二值化 → 轮廓 → 最小外接矩形 → 评分过滤 → 外扩 → 映射回原图
+
+    Args:
+        prob_map: 概率图 (H, W)
+        scale_h: 检测输入相对原图的高度缩放比
+        scale_w: 检测输入相对原图的宽度缩放比
+        image_shape: 原图 (高, 宽)
+
+    Returns:
+        文本框数组 (N, 4, 2)，顶点顺序 左上、右上、右下、左下
+    """
+    bitmap = (prob_map > thresh).astype(np.uint8)
+    contours, _ = cv2.findContours(bitmap, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+    height, width = image_shape
+    boxes = []
+    for contour in contours[:max_candidates]:
+        rect = cv2.minAreaRect(contour)
+        if min(rect[1]) < min_size:
+            continue
+        box = cv2.boxPoints(rect)
+        if _box_score(prob_map, box) < box_thresh:
+            continue
+        rect = cv2.minAreaRect(_unclip(box, unclip_ratio).astype(np.float32))
+        if min(rect[1]) < min_size + 2:
+            continue
+        box = order_points(cv2.boxPoints(rect))
+        box[:, 0] = np.clip(np.round(box[:, 0] / scale_w), 0, width - 1)
+        box[:, 1] = np.clip(np.round(box[:, 1] / scale_h), 0, height - 1)
+        boxes.append(box)
+    if not boxes:
+        return np.zeros((0, 4, 2), dtype=np.float32)
+    boxes = np.array(boxes, dtype=np.float32)
+    # 从上到下、从左到右
+    order = np.lexsort((boxes[:, 0, 0], boxes[:, 0, 1]))
+    return boxes[order]
+
+
+# ===== 识别 =====
+
+def normalize_for_recognition(crops: Sequence[np.ndarray], height: int = REC_HEIGHT, width: int = REC_WIDTH) -> np.ndarray:
+    """
+    文本行缩放到固定高度并右侧补零，批内宽度取最大宽高比
+
+    Returns:
+        NCHW float32，像素归一化到 [-1, 1]
+    """
+    max_ratio = max([width / height] + [crop.shape[1] / max(1, crop.shape[0]) for crop in crops])
+    batch_width = int(math.ceil(height * max_ratio))
+    batch = np.zeros((len(crops), 3, height, batch_width), dtype=np.float32)
+    for i, crop in enumerate(crops):
+        if crop.ndim == 2:
+            crop = cv2.cvtColor(crop, cv2.COLOR_GRAY2BGR)
+        resized_w = min(batch_width, max(1, int(math.ceil(height * crop.shape[1] / max(1, crop.shape[0])))))
+        resized = cv2.resize(np.ascontiguousarray(crop), (resized_w, height)).astype(np.float32)
+        batch[i, :, :, :resized_w] = ((resized / 255.0 - 0.5) / 0.5).transpose(2, 0, 1)
+    return batch
+
+
+def ctc_decode(probs: np.ndarray, charset: Sequence[str]) -> List[Tuple[str, float]]:
+    """
+    CTC 贪心解码（去重复、去空白）
+
+    Args:
+        probs: (N, T, C) 每个时间步的字符概率
+        charset: 字符表，索引 0 为空白符
+
+    Returns:
+        [(文本, 平均置信度)]
+    """
+    indices = probs.argmax(axis=2)
+    scores = probs.max(axis=2)
+    results = []
+    for index_row, score_row in zip(indices, scores):
+        keep = index_row != 0
+        keep[1:] &= index_row[1:] != index_row[:-1]
+        chars = [charset[i] for i in index_row[keep] if i < len(charset)]
+        results.append(("".join(chars), float(score_row[keep].mean()) if keep.any() else 0.0))
+    return results
+
+
+class OnnxTextDetector:
+    """DB 文本检测（接口与 PaddleOCR TextDetector 一致）"""
+
+    def __init__(self, session: Any, limit_side: int = 960, box_thresh: float = 0.6, unclip_ratio: float = 1.5):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+        self.limit_side = limit_side
+        self.box_thresh = box_thresh
+        self.unclip_ratio = unclip_ratio
+
+    def __call__(self, image: np.ndarray) -> Tuple[np.ndarray, float]:
+        start = time.perf_counter()
+        resized, scale_h, scale_w = resize_for_detection(image, self.limit_side)
+        output = self.session.run(None, {self.input_name: normalize_for_detection(resized)})[0]
+        boxes = db_postprocess(
+            output[0, 0], scale_h, scale_w, image.shape[:2],
+            box_thresh=self.box_thresh, unclip_ratio=self.unclip_ratio,
+        )
+        return boxes, time.perf_counter() - start
+
+
+class OnnxTextRecognizer:
+    """CTC 文本识别（接口与 PaddleOCR TextRecognizer 一致）"""
+
+    def __init__(self, session: Any, charset: Sequence[str], batch_size: int = REC_BATCH_SIZE):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+        self.charset = charset
+        self.batch_size = max(1, batch_size)
+
+    def __call__(self, crops: List[np.ndarray]) -> Tuple[List[Tuple[str, float]], float]:
+        start = time.perf_counter()
+        results: List[Tuple[str, float]] = [("", 0.0)] * len(crops)
+        # 按宽高比排序，相近宽度的文本行同批推理
+        order = np.argsort([crop.shape[1] / max(1, crop.shape[0]) for crop in crops])
+        for offset in range(0, len(order), self.batch_size):
+            indices = order[offset:offset + self.batch_size]
+            batch = normalize_for_recognition([crops[i] for i in indices])
+            probs = self.session.run(None, {self.input_name: batch})[0]
+            for i, result in zip(indices, ctc_decode(probs, self.charset)):
+                results[i] = result
+        return results, time.perf_counter() - start
+
+
+class OnnxTextClassifier:
+    """方向分类（0° / 180°），置信度足够高时将文本行旋转 180°"""
+
+    def __init__(self, session: Any, thresh: float = 0.9):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+        self.thresh = thresh
+
+    def __call__(self, crops: List[np.ndarray]) -> Tuple[List[np.ndarray], List[Tuple[str, float]], float]:
+        start = time.perf_counter()
+        if not crops:
+            return crops, [], 0.0
+        batch = normalize_for_recognition(crops, height=48, width=192)
+        probs = self.session.run(None, {self.input_name: batch})[0]
+        labels = []
+        crops = list(crops)
+        for i, prob in enumerate(probs):
+            label = int(prob.argmax())
+            labels.append(("180" if label else "0", float(prob[label])))
+            if label == 1 and prob[label] > self.thresh:
+                crops[i] = cv2.rotate(crops[i], cv2.ROTATE_180)
+        return crops, labels, time.perf_counter() - start
+
+
+class OnnxOCR:
+    """
+    基于 ONNX Runtime 的 PP-OCR 系统
+
+    对外与 PaddleOCR 2.x 的 PaddleOCR 对象兼容：ocr(image) 与 text_detector / text_recognizer /
+    text_classifier 分阶段接口。
+    """
+
+    def __init__(
+        self,
+        detector: OnnxTextDetector,
+        recognizer: OnnxTextRecognizer,
+        classifier: Optional[OnnxTextClassifier] = None,
+        crop: Optional[Callable[[np.ndarray, np.ndarray], np.ndarray]] = None,
+    ):
+        """
+        Args:
+            detector: 文本检测
+            recognizer: 文本识别
+            classifier: 方向分类，为 None 时不做方向分类
+            crop: 文本行裁剪函数 (image, box) -> crop
+        """
+        self.text_detector = detector
+        self.text_recognizer = recognizer
+        self.text_classifier = classifier
+        self.use_angle_cls = classifier is not None
+        if crop is None:
+            from spec_locator.ocr.ocr_engine import OCREngine
+
+            crop = OCREngine._crop_box
+        self._crop = crop
+
+    @classmethod
+    def from_files(
+        cls,
+        det_model: str,
+        rec_model: str,
+        rec_dict: str,
+        cls_model: Optional[str] = None,
+        quantize: bool = False,
+        cpu_threads: Optional[int] = None,
+        det_limit_side: int = 960,
+    ) -> "OnnxOCR":
+        """
+        从模型文件创建
+
+        Args:
+            det_model: 检测模型（.onnx）
+            rec_model: 识别模型（.onnx）
+            rec_dict: 识别字典
+            cls_model: 方向分类模型（可选）
+            quantize: 是否使用 int8 动态量化模型
+            cpu_threads: 每个会话的算子内线程数
+            det_limit_side: 检测输入最长边
+        """
+        paths = [det_model, rec_model] + ([cls_model] if cls_model else [])
+        for path in paths + [rec_dict]:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"ONNX OCR 模型文件不存在: {path}")
+        if quantize:
+            det_model, rec_model = quantize_model(det_model), quantize_model(rec_model)
+            cls_model = quantize_model(cls_model) if cls_model else None
+
+        detector = OnnxTextDetector(create_session(det_model, cpu_threads), limit_side=det_limit_side)
+        recognizer = OnnxTextRecognizer(create_session(rec_model, cpu_threads), load_charset(rec_dict))
+        classifier = OnnxTextClassifier(create_session(cls_model, cpu_threads)) if cls_model else None
+        logger.info(f"✓ ONNX OCR 初始化完成（int8 量化: {quantize}, 方向分类: {classifier is not None}）")
+        return cls(detector, recognizer, classifier)
+
+    def ocr(self, image: np.ndarray, **_kwargs) -> List[List[Any]]:
+        """
+        检测 + （方向分类 +）识别
+
+        Returns:
+            [[[box, (text, score)], ...]]（与 PaddleOCR 2.x 单图返回格式一致）
+        """
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        boxes, _ = self.text_detector(image)
+        crops = [self._crop(image, box) for box in boxes]
+        if self.text_classifier is not None and crops:
+            crops, _, _ = self.text_classifier(crops)
+        rec_res, _ = self.text_recognizer(crops) if crops else ([], 0.0)
+        return [[[box.tolist(), (text, score)] for box, (text, score) in zip(boxes, rec_res)]]
@@ -0,0 +1,187 @@
+"""
+大图分块识别
+- 超过阈值的图像切分为相互重叠的分块，分块尺寸与检测模型的输入尺寸相当，小字不会被整体缩放丢失
+- 各分块的识别结果平移回全图坐标后合并：
+  - 重叠区域内被重复识别的文本框按 IoU / 包含关系做非极大值抑制，优先保留未被分块边界截断的文本框
+  - 长于重叠宽度、在两个分块中都被截断的同一行文本，按文本首尾重叠拼接为一个文本框
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from spec_locator.ocr.ocr_engine import TextBox
+
+# 分块区域 (x0, y0, x1, y1)，右、下边界不含
+Rect = Tuple[int, int, int, int]
+
+
+def needs_tiling(image: np.ndarray, threshold: int) -> bool:
+    """图像最长边超过阈值时分块（阈值为 0 时不分块）"""
+    return threshold > 0 and max(image.shape[:2]) > threshold
+
+
+def _axis_starts(length: int, tile_size: int, overlap: int) -> List[int]:
+    """单个方向上各分块的起点，分块均匀分布且最后一块与边缘对齐"""
+    if length <= tile_size:
+        return [0]
+    stride = max(1, tile_size - overlap)
+    count = int(np.ceil((length - tile_size) / stride)) + 1
+    return [int(round(i * (length - tile_size) / (count - 1))) for i in range(count)]
+
+
+def compute_tiles(height: int, width: int, tile_size: int, overlap: int) -> List[Rect]:
+    """
+    计算分块区域（从上到下、从左到右）
+
+    Args:
+        height: 图像高度
+        width: 图像宽度
+        tile_size: 分块边长
+        overlap: 相邻分块的最小重叠宽度
+
+    Returns:
+        分块区域列表
+    """
+    return [
+        (x0, y0, min(width, x0 + tile_size), min(height, y0 + tile_size))
+        for y0 in _axis_starts(height, tile_size, overlap)
+        for x0 in _axis_starts(width, tile_size, overlap)
+    ]
+
+
+def split_image(image: np.ndarray, tile_size: int, overlap: int) -> List[Tuple[Rect, np.ndarray]]:
+    """切分图像，返回 [(分块区域, 分块图像)]（分块为原图视图，不复制）"""
+    height, width = image.shape[:2]
+    return [
+        ((x0, y0, x1, y1), image[y0:y1, x0:x1])
+        for x0, y0, x1, y1 in compute_tiles(height, width, tile_size, overlap)
+    ]
+
+
+class _Candidate:
+    """合并过程中的文本框（全图坐标）"""
+
+    __slots__ = ("text", "confidence", "rect", "cut")
+
+    def __init__(self, text: str, confidence: float, rect: Tuple[float, float, float, float], cut: bool):
+        self.text = text
+        self.confidence = confidence
+        self.rect = rect
+        self.cut = cut  # 是否贴着分块内部边界（可能被截断）
+
+    @property
+    def area(self) -> float:
+        x0, y0, x1, y1 = self.rect
+        return max(0.0, x1 - x0) * max(0.0, y1 - y0)
+
+    def to_text_box(self) -> TextBox:
+        x0, y0, x1, y1 = (int(round(v)) for v in self.rect)
+        return TextBox(text=self.text, confidence=self.confidence, bbox=((x0, y0), (x1, y0), (x1, y1), (x0, y1)))
+
+
+def _intersection(a: _Candidate, b: _Candidate) -> float:
+    w = min(a.rect[2], b.rect[2]) - max(a.rect[0], b.rect[0])
+    h = min(a.rect[3], b.rect[3]) - max(a.rect[1], b.rect[1])
+    return max(0.0, w) * max(0.0, h)
+
+
+def _is_seam_fragment_pair(a: _Candidate, b: _Candidate) -> bool:
+    """两个被截断的文本框是否为同一行文本在接缝两侧的片段（横排，纵向基本重合，横向交错）"""
+    if not (a.cut and b.cut):
+        return False
+    left, right = (a, b) if a.rect[0] <= b.rect[0] else (b, a)
+    if not (left.rect[0] < right.rect[0] < left.rect[2] < right.rect[2]):
+        return False
+    overlap_h = min(a.rect[3], b.rect[3]) - max(a.rect[1], b.rect[1])
+    return overlap_h >= 0.5 * min(a.rect[3] - a.rect[1], b.rect[3] - b.rect[1])
+
+
+def _join_fragments(a: _Candidate, b: _Candidate) -> _Candidate:
+    """拼接接缝两侧的片段：优先按文本首尾重叠去重，否则按重叠宽度估算重复的字符数"""
+    left, right = (a, b) if a.rect[0] <= b.rect[0] else (b, a)
+    for k in range(min(len(left.text), len(right.text)), 0, -1):
+        if left.text.endswith(right.text[:k]):
+            text = left.text + right.text[k:]
+            break
+    else:
+        right_width = max(1.0, right.rect[2] - right.rect[0])
+        duplicated = int(round((left.rect[2] - right.rect[0]) / right_width * len(right.text)))
+        text = left.text + right.text[duplicated:]
+    rect = (
+        min(a.rect[0], b.rect[0]),
+        min(a.rect[1], b.rect[1]),
+        max(a.rect[2], b.rect[2]),
+        max(a.rect[3], b.rect[3]),
+    )
+    return _Candidate(text, min(a.confidence, b.confidence), rect, cut=True)
+
+
+def merge_tile_results(
+    tiles: Sequence[Rect],
+    results: Sequence[List[TextBox]],
+    image_shape: Tuple[int, int],
+    iou_threshold: float = 0.5,
+    containment_threshold: float = 0.7,
+    seam_margin: int = 3,
+) -> List[TextBox]:
+    """
+    合并各分块的识别结果
+
+    Args:
+        tiles: 分块区域
+        results: 与分块一一对应的识别结果（分块内坐标）
+        image_shape: 原图 (高, 宽)
+        iou_threshold: IoU 不低于该值视为同一文本
+        containment_threshold: 交集占较小框面积的比例不低于该值视为同一文本（截断的片段落在完整文本框内）
+        seam_margin: 距分块内部边界不超过该像素数的文本框视为可能被截断
+
+    Returns:
+        全图坐标的文本框列表（从上到下、从左到右）
+    """
+    height, width = image_shape
+    candidates: List[_Candidate] = []
+    for (tx0, ty0, tx1, ty1), text_boxes in zip(tiles, results):
+        # 只有位于图像内部的分块边界才会截断文本
+        seams = (
+            tx0 > 0 and tx0 + seam_margin,
+            ty0 > 0 and ty0 + seam_margin,
+            tx1 < width and tx1 - seam_margin,
+            ty1 < height and ty1 - seam_margin,
+        )
+        for tb in text_boxes:
+            xs = [p[0] + tx0 for p in tb.bbox]
+            ys = [p[1] + ty0 for p in tb.bbox]
+            rect = (min(xs), min(ys), max(xs), max(ys))
+            cut = bool(
+                (seams[0] and rect[0] <= seams[0])
+                or (seams[1] and rect[1] <= seams[1])
+                or (seams[2] and rect[2] >= seams[2])
+                or (seams[3] and rect[3] >= seams[3])
+            )
+            candidates.append(_Candidate(tb.text, tb.confidence, rect, cut))
+
+    # 完整的文本框优先，其次面积大、置信度高
+    candidates.sort(key=lambda c: (c.cut, -c.area, -c.confidence))
+
+    kept: List[_Candidate] = []
+    for candidate in candidates:
+        duplicate_of: Optional[int] = None
+        for i, other in enumerate(kept):
+            if _is_seam_fragment_pair(candidate, other):
+                kept[i] = _join_fragments(candidate, other)
+                duplicate_of = i
+                break
+            inter = _intersection(candidate, other)
+            if inter <= 0:
+                continue
+            union = candidate.area + other.area - inter
+            if inter / union >= iou_threshold or inter / max(1e-6, min(candidate.area, other.area)) >= containment_threshold:
+                duplicate_of = i
+                break
+        if duplicate_of is None:
+            kept.append(candidate)
+
+    text_boxes = [candidate.to_text_box() for candidate in kept]
+    text_boxes.sort(key=lambda tb: (tb.get_center()[1], tb.get_center()[0]))
+    return text_boxes
@@ -0,0 +1,39 @@
+"""
+PDF 页面预览模块初始化
+"""
+
+from spec_locator.preview.cache import PreviewCache, preview_key, tile_key
+from spec_locator.preview.documents import DocumentPool, DocumentUnavailableError, open_document
+from spec_locator.preview.prefetch import PreviewPrefetcher
+from spec_locator.preview.renderer import (
+    MEDIA_TYPES,
+    PageOutOfRangeError,
+    TileOutOfRangeError,
+    encode_pixmap,
+    page_geometry,
+    render_document,
+    render_page,
+    render_tile,
+    tile_grid,
+    tile_scale,
+)
+
+__all__ = [
+    "PreviewCache",
+    "preview_key",
+    "tile_key",
+    "DocumentPool",
+    "DocumentUnavailableError",
+    "open_document",
+    "PreviewPrefetcher",
+    "MEDIA_TYPES",
+    "PageOutOfRangeError",
+    "TileOutOfRangeError",
+    "encode_pixmap",
+    "page_geometry",
+    "render_document",
+    "render_page",
+    "render_tile",
+    "tile_grid",
+    "tile_scale",
+]
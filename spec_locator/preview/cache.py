@@ -0,0 +1,335 @@
+"""
+PDF 页面预览缓存
+- 内存 LRU 热层（按字节预算淘汰）
+- 磁盘层（总大小上限，LRU + TTL 淘汰）
+- 磁盘层维护内存索引，命中时不访问文件系统元数据
+- 多个工作进程（及离线预渲染）共享同一缓存目录：
+  - 索引未命中时检查磁盘上是否已有其他进程写入的文件，有则纳入索引
+  - 写入时定期重新扫描目录，按目录实际总大小执行上限淘汰，而不是各进程各自计数
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def preview_key(
+    spec_code: str,
+    page_code: str,
+    page_number: int,
+    dpi: int,
+    fmt: str = "png",
+    quality: Optional[int] = None,
+) -> str:
+    """组合预览缓存键（服务与离线预渲染共用，PNG 沿用原有键格式）"""
+    key = f"{spec_code}_{page_code}_{page_number}_{dpi}"
+    if fmt != "png":
+        key += f"_{fmt}{quality}"
+    return key
+
+
+def tile_key(
+    spec_code: str,
+    page_code: str,
+    page_number: int,
+    zoom: int,
+    x: int,
+    y: int,
+    fmt: str,
+    quality: Optional[int] = None,
+) -> str:
+    """组合瓦片缓存键"""
+    return f"{spec_code}_{page_code}_{page_number}_t{zoom}_{x}_{y}_{fmt}{quality if fmt != 'png' else ''}"
+
+
+class PreviewCache:
+    """两级预览图缓存（内存 LRU + 磁盘）"""
+
+    # 磁盘层识别的文件扩展名
+    EXTENSIONS = ("png", "jpeg", "webp")
+
+    # 写入时重新扫描缓存目录的最小间隔（秒），期间其他进程写入的文件不计入总大小
+    RESCAN_INTERVAL = 30.0
+
+    def __init__(
+        self,
+        cache_dir: str,
+        memory_bytes: int = 64 * 1024 * 1024,
+        disk_bytes: int = 1024 * 1024 * 1024,
+        ttl: float = 3600,
+    ):
+        """
+        初始化缓存
+
+        启动时扫描缓存目录重建索引；之后命中只访问内存索引，
+        未命中时检查磁盘上是否有其他进程写入的文件，写入时定期重新扫描目录。
+
+        Args:
+            cache_dir: 磁盘缓存目录
+            memory_bytes: 内存层字节预算，为 0 时不启用内存层
+            disk_bytes: 磁盘层总大小上限
+            ttl: 过期时间（秒）
+        """
+        self.cache_dir = cache_dir
+        self.memory_bytes = max(0, memory_bytes)
+        self.disk_bytes = max(0, disk_bytes)
+        self.ttl = ttl
+
+        self._memory: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._memory_size = 0
+        # 文件哈希 -> (创建时间, 大小, 扩展名, 最近访问时间)，按最近访问排序
+        self._disk: "OrderedDict[str, Tuple[float, int, str, float]]" = OrderedDict()
+        self._disk_size = 0
+        self._last_scan = 0.0
+        self._lock = threading.Lock()
+        self._hits = {"memory": 0, "disk": 0}
+        self._misses = 0
+        self._evictions = {"memory": 0, "disk": 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _scan(self) -> Dict[str, Tuple[float, int, str]]:
+        """扫描缓存目录，返回 {文件哈希: (修改时间, 大小, 扩展名)}"""
+        files = {}
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                file_hash, _, extension = entry.name.partition(".")
+                if extension not in self.EXTENSIONS:
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:  # 扫描期间被其他进程淘汰
+                    continue
+                files[file_hash] = (stat.st_mtime, stat.st_size, extension)
+        return files
+
+    def _load_index(self):
+        """扫描缓存目录重建磁盘索引"""
+        with self._lock:
+            self._rescan_disk()
+        logger.info(
+            f"预览缓存索引: {len(self._disk)} 个文件, {self._disk_size / 1024 / 1024:.1f} MB ({self.cache_dir})"
+        )
+
+    def _rescan_disk(self):
+        """
+        按目录实际内容重建磁盘索引并执行上限淘汰，调用方需持有锁
+
+        本进程访问过的文件保留最近访问时间，其他文件以修改时间作为最近访问时间，
+        合并后排序作为 LRU 顺序。
+        """
+        files = self._scan()
+        entries = []
+        for file_hash, (mtime, size, extension) in files.items():
+            known = self._disk.get(file_hash)
+            used = known[3] if known is not None and known[2] == extension else mtime
+            entries.append((used, file_hash, mtime, size, extension))
+        entries.sort()
+
+        self._disk.clear()
+        self._disk_size = 0
+        for used, file_hash, mtime, size, extension in entries:
+            self._disk[file_hash] = (mtime, size, extension, used)
+            self._disk_size += size
+        self._last_scan = time.time()
+        self._evict_disk()
+
+    def _adopt(self, file_hash: str) -> Optional[Tuple[float, int, str, float]]:
+        """索引未命中时检查磁盘上是否有其他进程写入的文件，有则纳入索引"""
+        for extension in self.EXTENSIONS:
+            try:
+                stat = os.stat(self._path(file_hash, extension))
+            except OSError:
+                continue
+            with self._lock:
+                entry = self._disk.get(file_hash)
+                if entry is None:
+                    entry = (stat.st_mtime, stat.st_size, extension, time.time())
+                    self._disk[file_hash] = entry
+                    self._disk_size += stat.st_size
+            return entry
+        return None
+
+    @staticmethod
+    def _hash(key: str) -> str:
+        return hashlib.md5(key.encode()).hexdigest()
+
+    def _path(self, file_hash: str, extension: str) -> str:
+        return os.path.join(self.cache_dir, f"{file_hash}.{extension}")
+
+    def get(self, key: str) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        查询缓存
+
+        Returns:
+            (图片字节, 命中层级 "memory" | "disk")，未命中返回 (None, None)
+        """
+        now = time.time()
+        file_hash = self._hash(key)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, data = entry
+                if now - created < self.ttl:
+                    self._memory.move_to_end(key)
+                    self._hits["memory"] += 1
+                    return data, "memory"
+                self._drop_memory(key)
+
+            entry = self._disk.get(file_hash)
+
+        if entry is None:
+            entry = self._adopt(file_hash)
+
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None, None
+            created, size, extension, _ = entry
+            if now - created >= self.ttl:
+                if file_hash in self._disk:
+                    self._drop_disk(file_hash)
+                self._misses += 1
+                return None, None
+            if file_hash in self._disk:
+                self._disk[file_hash] = (created, size, extension, now)
+                self._disk.move_to_end(file_hash)
+
+        try:
+            with open(self._path(file_hash, extension), "rb") as f:
+                data = f.read()
+        except OSError:
+            # 文件被外部删除或刚被淘汰
+            with self._lock:
+                if file_hash in self._disk:
+                    self._drop_disk(file_hash, remove_file=False)
+                self._misses += 1
+            return None, None
+
+        with self._lock:
+            self._hits["disk"] += 1
+            self._put_memory(key, data, created)
+        return data, "disk"
+
+    def put(self, key: str, data: bytes, extension: str = "png"):
+        """
+        写入缓存（内存层与磁盘层）
+
+        Args:
+            key: 缓存键
+            data: 图片字节
+            extension: 磁盘文件扩展名（png/jpeg/webp）
+        """
+        now = time.time()
+        file_hash = self._hash(key)
+        path = self._path(file_hash, extension)
+        # 先写临时文件再原子替换，并发写入同一键或读取方不会看到半个文件
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"写入预览缓存失败: {e}")
+            path = None
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+        with self._lock:
+            self._put_memory(key, data, now)
+            if path is None:
+                return
+            if file_hash in self._disk:
+                self._disk_size -= self._disk.pop(file_hash)[1]
+            self._disk[file_hash] = (now, len(data), extension, now)
+            self._disk_size += len(data)
+            if now - self._last_scan >= self.RESCAN_INTERVAL:
+                self._rescan_disk()
+            else:
+                self._evict_disk()
+
+    def _put_memory(self, key: str, data: bytes, created: float):
+        """写入内存层并按字节预算淘汰，调用方需持有锁"""
+        if key in self._memory:
+            self._drop_memory(key)
+        # 单个条目超过预算的 1/4 时不进入内存层，避免冲刷热点
+        if len(data) > self.memory_bytes // 4:
+            return
+        self._memory[key] = (created, data)
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_bytes:
+            oldest = next(iter(self._memory))
+            self._drop_memory(oldest)
+            self._evictions["memory"] += 1
+
+    def _drop_memory(self, key: str):
+        self._memory_size -= len(self._memory.pop(key)[1])
+
+    def _evict_disk(self):
+        """按总大小上限淘汰最久未访问的文件，调用方需持有锁"""
+        while self._disk and self._disk_size > self.disk_bytes:
+            oldest = next(iter(self._disk))
+            self._drop_disk(oldest)
+            self._evictions["disk"] += 1
+
+    def _drop_disk(self, file_hash: str, remove_file: bool = True):
+        _, size, extension, _ = self._disk.pop(file_hash)
+        self._disk_size -= size
+        if remove_file:
+            try:
+                os.remove(self._path(file_hash, extension))
+            except OSError:
+                pass
+
+    def contains(self, key: str) -> bool:
+        """磁盘层是否有未过期的条目（不计入命中统计）"""
+        file_hash = self._hash(key)
+        with self._lock:
+            entry = self._disk.get(file_hash)
+        if entry is None:
+            entry = self._adopt(file_hash)
+        return entry is not None and time.time() - entry[0] < self.ttl
+
+    def hit_ratio(self) -> float:
+        """命中率（内存层 + 磁盘层）"""
+        with self._lock:
+            hits = self._hits["memory"] + self._hits["disk"]
+            total = hits + self._misses
+        return hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            hits = self._hits["memory"] + self._hits["disk"]
+            total = hits + self._misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_size,
+                "memory_budget": self.memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_size,
+                "disk_budget": self.disk_bytes,
+                "hits": dict(self._hits),
+                "misses": self._misses,
+                "hit_ratio": round(hits / total, 4) if total else 0.0,
+                "evictions": dict(self._evictions),
+            }
+
+    def memory_size(self) -> int:
+        with self._lock:
+            return self._memory_size
+
+    def disk_size(self) -> int:
+        with self._lock:
+            return self._disk_size
@@ -0,0 +1,177 @@
+"""
+PyMuPDF 文档句柄池
+- 按文件路径复用已打开的 fitz.Document，热门页面重复渲染时跳过打开与解析 PDF 结构
+- 句柄数量有上限，按最近使用淘汰
+- 每次借出前比对文件修改时间与大小，文件被替换后自动重新打开
+- fitz.Document 不支持多线程并发访问，同一文档的借用者串行执行，不同文档之间互不影响
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import fitz  # PyMuPDF
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentUnavailableError(FileNotFoundError):
+    """PDF 文件不存在或无法打开（建索引后被删除、替换为损坏文件等）"""
+
+
+def _open_pdf(pdf_path: str) -> "fitz.Document":
+    """打开 PDF，文件不存在或无法解析时抛出 DocumentUnavailableError"""
+    try:
+        return fitz.open(pdf_path)
+    except (OSError, RuntimeError) as e:  # PyMuPDF 的 FileNotFoundError / FileDataError 继承自 RuntimeError
+        raise DocumentUnavailableError(f"无法打开 PDF: {pdf_path}: {e}") from e
+
+
+class _Handle:
+    """池中的一个已打开文档"""
+
+    __slots__ = ("doc", "mtime", "size", "lock", "users", "retired")
+
+    def __init__(self, doc: "fitz.Document", stat: os.stat_result):
+        self.doc = doc
+        self.mtime = stat.st_mtime
+        self.size = stat.st_size
+        self.lock = threading.Lock()  # 串行化对同一文档的访问
+        self.users = 0  # 已借出（含等待锁）的次数
+        self.retired = False  # 已被淘汰或失效，归还后关闭
+
+    def matches(self, stat: os.stat_result) -> bool:
+        return self.mtime == stat.st_mtime and self.size == stat.st_size
+
+
+class DocumentPool:
+    """有上限、线程安全的 fitz.Document 句柄池"""
+
+    def __init__(self, max_documents: int = 32):
+        """
+        Args:
+            max_documents: 最多保持打开的文档数，为 0 时不复用（每次借出都重新打开）
+        """
+        self.max_documents = max(0, max_documents)
+        self._handles: "OrderedDict[str, _Handle]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @contextmanager
+    def open(self, pdf_path: str) -> Iterator["fitz.Document"]:
+        """
+        借出文档句柄（上下文管理器，退出时归还，不要在外部关闭）
+
+        Args:
+            pdf_path: PDF 文件路径
+
+        Yields:
+            已打开的 fitz.Document
+
+        Raises:
+            DocumentUnavailableError: 文件不存在或无法打开
+        """
+        if self.max_documents == 0:
+            doc = _open_pdf(pdf_path)
+            try:
+                yield doc
+            finally:
+                doc.close()
+            return
+
+        handle = self._acquire(pdf_path)
+        try:
+            with handle.lock:
+                yield handle.doc
+        finally:
+            with self._lock:
+                handle.users -= 1
+                if handle.retired and handle.users == 0:
+                    handle.doc.close()
+
+    def _acquire(self, pdf_path: str) -> _Handle:
+        """取得句柄并登记借用，必要时打开文件"""
+        path = os.path.abspath(pdf_path)
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            raise DocumentUnavailableError(f"PDF 文件不存在: {path}") from e
+        with self._lock:
+            handle = self._handles.get(path)
+            if handle is not None and not handle.matches(stat):
+                logger.debug(f"PDF 文件已变化，重新打开: {path}")
+                self._retire(path)
+                self._stats["invalidations"] += 1
+                handle = None
+            if handle is not None:
+                self._handles.move_to_end(path)
+                self._stats["hits"] += 1
+                handle.users += 1
+                return handle
+            self._stats["misses"] += 1
+
+        # 在锁外打开文件，避免解析大文件时阻塞其他文档的借用
+        opened = _Handle(_open_pdf(path), stat)
+        with self._lock:
+            handle = self._handles.get(path)
+            if handle is not None and handle.matches(stat):
+                # 其他线程已先打开同一文件
+                opened.doc.close()
+            else:
+                if handle is not None:
+                    self._retire(path)
+                handle = opened
+                self._handles[path] = handle
+                while len(self._handles) > self.max_documents:
+                    self._retire(next(iter(self._handles)))
+                    self._stats["evictions"] += 1
+            handle.users += 1
+            return handle
+
+    def _retire(self, path: str):
+        """移出池，无人借用时立即关闭，否则由最后一个借用者归还时关闭。调用方需持有锁"""
+        handle = self._handles.pop(path)
+        handle.retired = True
+        if handle.users == 0:
+            handle.doc.close()
+
+    def invalidate(self, pdf_path: str):
+        """移除指定文件的句柄"""
+        with self._lock:
+            path = os.path.abspath(pdf_path)
+            if path in self._handles:
+                self._retire(path)
+
+    def clear(self):
+        """关闭全部句柄（借用中的句柄在归还时关闭）"""
+        with self._lock:
+            for path in list(self._handles):
+                self._retire(path)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取句柄池统计信息"""
+        with self._lock:
+            total = self._stats["hits"] + self._stats["misses"]
+            return {
+                "open_documents": len(self._handles),
+                "max_documents": self.max_documents,
+                **self._stats,
+                "hit_ratio": round(self._stats["hits"] / total, 4) if total else 0.0,
+            }
+
+
+@contextmanager
+def open_document(pdf_path: str, pool: Optional[DocumentPool] = None) -> Iterator["fitz.Document"]:
+    """从句柄池借出文档；未提供句柄池时直接打开并在退出时关闭（文件不可用时抛出 DocumentUnavailableError）"""
+    if pool is not None:
+        with pool.open(pdf_path) as doc:
+            yield doc
+        return
+    doc = _open_pdf(pdf_path)
+    try:
+        yield doc
+    finally:
+        doc.close()
@@ -0,0 +1,160 @@
+"""
+相邻页面预览预取
+- 识别成功后，后台渲染命中页面及同一规范内前后 N 页的预览图
+- 单个低优先级后台线程，有界队列（满时丢弃），渲染间隔限流
+- 前台识别繁忙时暂停，不与识别争抢 CPU
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from spec_locator.database.file_index import FileIndex, SpecFile
+from spec_locator.preview.cache import PreviewCache, preview_key
+
+logger = logging.getLogger(__name__)
+
+# 前台繁忙时的轮询间隔（秒）
+BUSY_POLL_INTERVAL = 0.05
+
+
+class PreviewPrefetcher:
+    """相邻页面预览预取器"""
+
+    def __init__(
+        self,
+        file_index: FileIndex,
+        cache: PreviewCache,
+        render: Callable[[str, str, int, int, str, int], Any],
+        neighbors: int = 2,
+        dpi: int = 150,
+        fmt: str = "webp",
+        quality: int = 80,
+        queue_size: int = 64,
+        interval: float = 0.05,
+        busy: Optional[Callable[[], bool]] = None,
+    ):
+        """
+        初始化预取器并启动后台线程
+
+        Args:
+            file_index: 规范文件索引
+            cache: 预览缓存（已缓存的页面跳过）
+            render: 渲染并写入缓存的函数 (cache_key, pdf_path, page_number, dpi, fmt, quality)，
+                应与前台预览请求共用同一 single-flight 键，避免重复渲染同一页面
+            neighbors: 预取命中页面前后各多少页
+            dpi: 预取的 DPI（应与前端默认请求一致）
+            fmt: 预取的输出格式
+            quality: 有损格式的质量
+            queue_size: 待处理请求上限，超出时丢弃新请求
+            interval: 两次渲染之间的最小间隔（秒）
+            busy: 返回前台是否繁忙的回调，繁忙时暂停预取
+        """
+        self.file_index = file_index
+        self.cache = cache
+        self.render = render
+        self.neighbors = max(0, neighbors)
+        self.dpi = dpi
+        self.fmt = fmt
+        self.quality = quality
+        self.interval = interval
+        self.busy = busy
+
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max(1, queue_size))
+        self._stats = {"submitted": 0, "dropped": 0, "rendered": 0, "skipped": 0, "failed": 0}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="preview-prefetch", daemon=True)
+        self._thread.start()
+
+    def submit(self, spec_code: str, file_path: str) -> bool:
+        """
+        提交预取请求（不阻塞）
+
+        Args:
+            spec_code: 规范编号
+            file_path: 命中的 PDF 文件路径
+
+        Returns:
+            是否入队（队列已满时丢弃）
+        """
+        try:
+            self._queue.put_nowait((spec_code, file_path))
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+            return False
+        with self._lock:
+            self._stats["submitted"] += 1
+        return True
+
+    def targets(self, spec_code: str, file_path: str) -> List[SpecFile]:
+        """命中页面及其相邻页面，按与命中页面的距离排序（先后一页，再前一页……）"""
+        files = self.file_index.get_spec_files(spec_code)
+        index = next((i for i, f in enumerate(files) if f.file_path == file_path), None)
+        if index is None:
+            return []
+        ordered = [files[index]]
+        for offset in range(1, self.neighbors + 1):
+            for neighbor in (index + offset, index - offset):
+                if 0 <= neighbor < len(files):
+                    ordered.append(files[neighbor])
+        return ordered
+
+    def _run(self):
+        # 降低后台线程的调度优先级（Linux 下线程有独立的 nice 值）
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+
+        while not self._stopped.is_set():
+            item = self._queue.get()
+            if item is None:
+                break
+            spec_code, file_path = item
+            for spec_file in self.targets(spec_code, file_path):
+                if self._stopped.is_set():
+                    break
+                self._prefetch(spec_file)
+
+    def _prefetch(self, spec_file: SpecFile):
+        cache_key = preview_key(spec_file.spec_code, spec_file.page_code, 1, self.dpi, self.fmt, self.quality)
+        if self.cache.contains(cache_key):
+            with self._lock:
+                self._stats["skipped"] += 1
+            return
+
+        while self.busy is not None and self.busy() and not self._stopped.is_set():
+            time.sleep(BUSY_POLL_INTERVAL)
+        # 等待期间前台请求可能已渲染该页面
+        if self.cache.contains(cache_key):
+            with self._lock:
+                self._stats["skipped"] += 1
+            return
+
+        try:
+            self.render(cache_key, spec_file.file_path, 1, self.dpi, self.fmt, self.quality)
+            with self._lock:
+                self._stats["rendered"] += 1
+        except Exception as e:
+            logger.debug(f"预取失败: {spec_file.file_path}: {e}")
+            with self._lock:
+                self._stats["failed"] += 1
+        time.sleep(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        """获取预取统计信息"""
+        with self._lock:
+            return {**self._stats, "queued": self._queue.qsize()}
+
+    def shutdown(self):
+        """停止后台线程（不等待进行中的渲染）"""
+        self._stopped.set()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
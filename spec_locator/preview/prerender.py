@@ -0,0 +1,287 @@
+"""
+离线批量预渲染 PDF 页面预览图
+- 遍历 FileIndex 中的全部规范文件，按 DPI 阶梯与输出格式渲染每一页并写入预览缓存
+- 多进程渲染，主进程统一写入缓存；同时在途的文件数有上限，渲染结果写入后即释放
+- 清单文件记录源 PDF 的修改时间与大小，可中断后续跑，未变化的文件直接跳过
+- 开始前抽样估算输出总大小，超出磁盘缓存上限（PREVIEW_CACHE_DISK_MB）时拒绝执行：
+  否则任务会淘汰自己刚写入的预览图，下次续跑又判定为未完成而反复重渲染
+
+使用方法：
+    python -m spec_locator.preview.prerender --dpi 72 150 300 --format png webp --workers 8
+
+预渲染写入服务使用的同一缓存目录（PREVIEW_CACHE_DIR），运行中的服务无需重启：
+预览缓存索引未命中时会检查磁盘文件，首次查看即直接读取预渲染结果；
+磁盘总大小上限按目录实际大小执行，预渲染与服务进程共用同一预算。
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from spec_locator.config import PathConfig, PreviewConfig
+from spec_locator.database.file_index import FileIndex, SpecFile
+from spec_locator.preview.cache import PreviewCache, preview_key
+from spec_locator.preview.renderer import render_document
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "prerender_manifest.json"
+
+# 每完成多少个文件保存一次清单（中断后从此处续跑）
+MANIFEST_SAVE_INTERVAL = 50
+
+# 每个渲染进程最多排队的文件数（限制主进程中等待写入的渲染结果占用的内存）
+IN_FLIGHT_PER_WORKER = 2
+
+# 估算输出大小时抽样渲染的文件数
+ESTIMATE_SAMPLE_FILES = 3
+
+
+def _render_file(
+    pdf_path: str, dpis: Sequence[int], formats: Sequence[str], quality: int
+) -> List[Tuple[int, int, str, bytes]]:
+    """子进程：渲染单个 PDF 的所有页面"""
+    return list(render_document(pdf_path, dpis, formats, quality))
+
+
+class Prerenderer:
+    """预览图离线预渲染任务"""
+
+    def __init__(
+        self,
+        file_index: FileIndex,
+        cache: PreviewCache,
+        dpis: Sequence[int],
+        formats: Sequence[str] = ("png",),
+        quality: int = PreviewConfig.QUALITY,
+    ):
+        """
+        Args:
+            file_index: 规范文件索引
+            cache: 预览缓存（建议关闭内存层）
+            dpis: 渲染 DPI 阶梯
+            formats: 输出格式（png/jpeg/webp）
+            quality: 有损格式的质量，需与服务端 PREVIEW_QUALITY 一致才能命中
+        """
+        self.file_index = file_index
+        self.cache = cache
+        self.dpis = sorted(set(dpis))
+        self.formats = sorted(set(formats))
+        self.quality = quality
+        self.manifest_path = os.path.join(cache.cache_dir, MANIFEST_NAME)
+        self.manifest: Dict[str, Dict] = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self):
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
+    def is_up_to_date(self, spec_file: SpecFile) -> bool:
+        """源文件未变化且所有 DPI 与格式的预览图仍在缓存中"""
+        record = self.manifest.get(spec_file.file_path)
+        if record is None:
+            return False
+        try:
+            stat = os.stat(spec_file.file_path)
+        except OSError:
+            return False
+        if record.get("mtime") != stat.st_mtime or record.get("size") != stat.st_size:
+            return False
+        return all(
+            self.cache.contains(self._key(spec_file, page, dpi, fmt))
+            for page in range(1, record.get("pages", 0) + 1)
+            for dpi in self.dpis
+            for fmt in self.formats
+        )
+
+    def _key(self, spec_file: SpecFile, page_number: int, dpi: int, fmt: str) -> str:
+        return preview_key(spec_file.spec_code, spec_file.page_code, page_number, dpi, fmt, self.quality)
+
+    def pending_files(self, spec_codes: Optional[Sequence[str]] = None, force: bool = False) -> List[SpecFile]:
+        """需要渲染的文件列表"""
+        codes = [code.upper() for code in spec_codes] if spec_codes else self.file_index.get_all_specs()
+        files = [spec_file for code in codes for spec_file in self.file_index.get_spec_files(code)]
+        if force:
+            return files
+        return [spec_file for spec_file in files if not self.is_up_to_date(spec_file)]
+
+    def estimate_bytes(self, files: List[SpecFile], sample: int = ESTIMATE_SAMPLE_FILES) -> int:
+        """
+        估算渲染全部文件的输出总大小：在当前进程中抽样渲染若干文件，按平均每个文件的输出大小外推
+
+        Returns:
+            估算的字节数（抽样文件全部渲染失败时为 0）
+        """
+        if not files:
+            return 0
+        step = max(1, len(files) // sample)
+        sizes = []
+        for spec_file in files[::step][:sample]:
+            try:
+                images = _render_file(spec_file.file_path, self.dpis, self.formats, self.quality)
+            except Exception as e:
+                logger.warning(f"估算输出大小时渲染失败: {spec_file.file_path}: {e}")
+                continue
+            sizes.append(sum(len(data) for _, _, _, data in images))
+        if not sizes:
+            return 0
+        return int(sum(sizes) / len(sizes) * len(files))
+
+    def run(self, files: List[SpecFile], workers: int) -> Dict[str, int]:
+        """
+        多进程渲染并写入缓存
+
+        本次写入的总大小超过磁盘缓存上限时停止提交新文件（继续写入只会淘汰本次的输出）。
+
+        Returns:
+            统计信息 {"files", "pages", "images", "bytes", "failed", "skipped"}，
+            skipped 为因超出磁盘缓存上限而未渲染的文件数
+        """
+        stats = {"files": 0, "pages": 0, "images": 0, "bytes": 0, "failed": 0, "skipped": 0}
+        if not files:
+            return stats
+
+        workers = max(1, workers)
+        max_in_flight = workers * IN_FLIGHT_PER_WORKER
+        start = time.time()
+        done = 0
+        pending = iter(files)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            while True:
+                while len(futures) < max_in_flight and stats["bytes"] <= self.cache.disk_bytes:
+                    spec_file = next(pending, None)
+                    if spec_file is None:
+                        break
+                    try:
+                        stat = os.stat(spec_file.file_path)  # 渲染前记录，渲染期间被修改的文件下次会重新渲染
+                    except OSError as e:
+                        logger.error(f"无法读取文件: {spec_file.file_path}: {e}")
+                        stats["failed"] += 1
+                        done += 1
+                        continue
+                    future = executor.submit(_render_file, spec_file.file_path, self.dpis, self.formats, self.quality)
+                    futures[future] = (spec_file, stat)
+                if not futures:
+                    break
+
+                completed, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    spec_file, stat = futures.pop(future)
+                    done += 1
+                    self._store(future, spec_file, stat, stats)
+                    if done % MANIFEST_SAVE_INTERVAL == 0:
+                        self._save_manifest()
+                        logger.info(f"进度: {done}/{len(files)} 个文件, 用时 {time.time() - start:.1f}s")
+
+        stats["skipped"] = sum(1 for _ in pending)
+        if stats["skipped"]:
+            logger.error(
+                f"本次输出已超过磁盘缓存上限 {self.cache.disk_bytes // 1024 // 1024} MB，"
+                f"停止渲染，剩余 {stats['skipped']} 个文件未处理"
+            )
+        self._save_manifest()
+        return stats
+
+    def _store(self, future, spec_file: SpecFile, stat: os.stat_result, stats: Dict[str, int]):
+        """写入单个文件的渲染结果并更新清单"""
+        try:
+            images = future.result()
+        except Exception as e:
+            logger.error(f"渲染失败: {spec_file.file_path}: {e}")
+            stats["failed"] += 1
+            return
+
+        for page_number, dpi, fmt, data in images:
+            self.cache.put(self._key(spec_file, page_number, dpi, fmt), data, fmt)
+            stats["images"] += 1
+            stats["bytes"] += len(data)
+        pages = len({page_number for page_number, _, _, _ in images})
+        stats["files"] += 1
+        stats["pages"] += pages
+
+        self.manifest[spec_file.file_path] = {
+            "mtime": stat.st_mtime,
+            "size": stat.st_size,
+            "pages": pages,
+        }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="离线批量预渲染 PDF 页面预览图")
+    parser.add_argument("--data-dir", default=PathConfig.SPEC_DATA_DIR, help="规范 PDF 数据目录")
+    parser.add_argument("--cache-dir", default=PreviewConfig.CACHE_DIR, help="预览缓存目录")
+    parser.add_argument("--dpi", type=int, nargs="+", default=PreviewConfig.PRERENDER_DPIS, help="DPI 阶梯")
+    parser.add_argument(
+        "--format", nargs="+", choices=["png", "jpeg", "webp"], default=PreviewConfig.PRERENDER_FORMATS,
+        help="输出格式",
+    )
+    parser.add_argument("--quality", type=int, default=PreviewConfig.QUALITY, help="JPEG/WebP 质量")
+    parser.add_argument("--workers", type=int, default=PreviewConfig.PRERENDER_WORKERS, help="渲染进程数")
+    parser.add_argument("--spec", nargs="*", help="只渲染指定规范编号")
+    parser.add_argument("--force", action="store_true", help="忽略清单，全部重新渲染")
+    parser.add_argument("--skip-estimate", action="store_true", help="跳过输出大小估算（不检查磁盘缓存上限）")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    invalid = [dpi for dpi in args.dpi if not 72 <= dpi <= 300]
+    if invalid:
+        parser.error(f"DPI 超出预览接口支持的范围 72-300: {invalid}")
+
+    file_index = FileIndex(args.data_dir, collect_metadata=False)
+    cache = PreviewCache(
+        cache_dir=args.cache_dir,
+        memory_bytes=0,
+        disk_bytes=PreviewConfig.DISK_BYTES,
+        ttl=PreviewConfig.CACHE_TTL,
+    )
+    prerenderer = Prerenderer(file_index, cache, args.dpi, args.format, args.quality)
+
+    files = prerenderer.pending_files(args.spec, force=args.force)
+    total = file_index.get_stats()["total_files"]
+    logger.info(f"待渲染 {len(files)} 个文件（共 {total} 个），DPI: {prerenderer.dpis}，格式: {prerenderer.formats}，进程数: {args.workers}")
+
+    if not args.skip_estimate:
+        estimate = prerenderer.estimate_bytes(files)
+        logger.info(f"预计输出 {estimate / 1024 / 1024:.1f} MB，磁盘缓存上限 {cache.disk_bytes / 1024 / 1024:.0f} MB")
+        if estimate > cache.disk_bytes:
+            logger.error(
+                "预计输出超出磁盘缓存上限，写入的预览图会被相互淘汰：请调大 PREVIEW_CACHE_DISK_MB，"
+                "或减少 --dpi / --format，或用 --spec 分批渲染"
+            )
+            return 2
+
+    start = time.time()
+    stats = prerenderer.run(files, args.workers)
+    logger.info(
+        f"预渲染完成: {stats['files']} 个文件, {stats['pages']} 页, {stats['images']} 张图片, "
+        f"{stats['bytes'] / 1024 / 1024:.1f} MB, 失败 {stats['failed']}, 未处理 {stats['skipped']}, "
+        f"用时 {time.time() - start:.1f}s"
+    )
+
+    cache_stats = cache.stats()
+    if cache_stats["evictions"]["disk"]:
+        logger.warning(
+            f"磁盘缓存超出上限，已淘汰 {cache_stats['evictions']['disk']} 个文件，"
+            f"请调大 PREVIEW_CACHE_DISK_MB（当前 {PreviewConfig.DISK_BYTES // 1024 // 1024} MB）"
+        )
+    return 1 if stats["failed"] or stats["skipped"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
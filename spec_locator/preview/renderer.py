@@ -0,0 +1,231 @@
+"""
+PDF 页面渲染
+- 将 PDF 指定页面渲染为图片字节（同步函数，需在线程池或进程池中调用）
+- 支持 PNG / JPEG / WebP 输出
+- 瓦片渲染：按裁剪区域只渲染页面的一部分，用于高 DPI 缩放浏览
+- 在线渲染可传入 DocumentPool 复用已打开的文档
+"""
+
+import logging
+import math
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+
+from spec_locator.preview.documents import DocumentPool, open_document
+
+logger = logging.getLogger(__name__)
+
+# 输出格式 -> MIME 类型
+MEDIA_TYPES = {
+    "png": "image/png",
+    "jpeg": "image/jpeg",
+    "webp": "image/webp",
+}
+
+DEFAULT_QUALITY = 80
+
+
+class PageOutOfRangeError(ValueError):
+    """页码超出 PDF 页数范围"""
+
+    def __init__(self, page_number: int, total_pages: int):
+        super().__init__(f"页码超出范围，PDF共有 {total_pages} 页")
+        self.page_number = page_number
+        self.total_pages = total_pages
+
+
+class TileOutOfRangeError(ValueError):
+    """瓦片坐标超出页面范围"""
+
+
+def encode_pixmap(pix: "fitz.Pixmap", fmt: str = "png", quality: Optional[int] = None) -> bytes:
+    """
+    将渲染结果编码为图片字节
+
+    PNG 由 PyMuPDF 直接编码；JPEG / WebP 通过 OpenCV 编码（有损，quality 1-100）。
+
+    Args:
+        pix: PyMuPDF 渲染结果（RGB，无 alpha）
+        fmt: 输出格式 png/jpeg/webp
+        quality: 有损格式的质量，PNG 忽略
+
+    Returns:
+        图片字节
+    """
+    if fmt == "png":
+        return pix.tobytes("png")
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"不支持的图片格式: {fmt}")
+
+    quality = DEFAULT_QUALITY if quality is None else quality
+    image = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+    image = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+    if fmt == "jpeg":
+        ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    else:
+        ok, encoded = cv2.imencode(".webp", image, [cv2.IMWRITE_WEBP_QUALITY, quality])
+    if not ok:
+        raise RuntimeError(f"图片编码失败: {fmt}")
+    return encoded.tobytes()
+
+
+def _render_pixmap(page: "fitz.Page", dpi: int) -> "fitz.Pixmap":
+    # 设置缩放比例（DPI转换为缩放因子，72是PDF的默认DPI）
+    zoom = dpi / 72
+    return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+
+
+def render_page(
+    pdf_path: str,
+    page_number: int,
+    dpi: int,
+    fmt: str = "png",
+    quality: Optional[int] = None,
+    documents: Optional[DocumentPool] = None,
+) -> bytes:
+    """
+    渲染 PDF 页面为图片
+
+    Args:
+        pdf_path: PDF 文件路径
+        page_number: 页码（从1开始）
+        dpi: 渲染 DPI
+        fmt: 输出格式 png/jpeg/webp
+        quality: 有损格式的质量（1-100）
+        documents: 文档句柄池，为 None 时每次打开文件
+
+    Returns:
+        图片字节
+
+    Raises:
+        PageOutOfRangeError: 页码超出范围
+    """
+    with open_document(pdf_path, documents) as doc:
+        if page_number < 1 or page_number > len(doc):
+            raise PageOutOfRangeError(page_number, len(doc))
+
+        # 获取指定页面（索引从0开始）
+        page = doc.load_page(page_number - 1)
+        pix = _render_pixmap(page, dpi)
+    # 编码不需要访问文档，归还句柄后进行
+    return encode_pixmap(pix, fmt, quality)
+
+
+def render_document(
+    pdf_path: str,
+    dpis: Sequence[int],
+    formats: Sequence[str] = ("png",),
+    quality: Optional[int] = None,
+) -> Iterator[Tuple[int, int, str, bytes]]:
+    """
+    按 DPI 阶梯渲染 PDF 的所有页面（文件只打开一次，每个 DPI 只渲染一次）
+
+    Args:
+        pdf_path: PDF 文件路径
+        dpis: 渲染 DPI 列表
+        formats: 输出格式列表
+        quality: 有损格式的质量（1-100）
+
+    Yields:
+        (页码（从1开始）, DPI, 格式, 图片字节)
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        for index in range(len(doc)):
+            page = doc.load_page(index)
+            for dpi in dpis:
+                pix = _render_pixmap(page, dpi)
+                for fmt in formats:
+                    yield index + 1, dpi, fmt, encode_pixmap(pix, fmt, quality)
+    finally:
+        doc.close()
+
+
+def tile_scale(zoom: int, max_zoom: int, max_dpi: int) -> float:
+    """
+    瓦片缩放级别对应的缩放因子
+
+    最高级别 max_zoom 对应 max_dpi，每降低一级分辨率减半。
+    """
+    return max_dpi / 72 / (2 ** (max_zoom - zoom))
+
+
+def page_geometry(
+    pdf_path: str, page_number: int, documents: Optional[DocumentPool] = None
+) -> Dict[str, float]:
+    """
+    获取页面尺寸（PDF 点，1/72 英寸）
+
+    Raises:
+        PageOutOfRangeError: 页码超出范围
+    """
+    with open_document(pdf_path, documents) as doc:
+        if page_number < 1 or page_number > len(doc):
+            raise PageOutOfRangeError(page_number, len(doc))
+        rect = doc.load_page(page_number - 1).rect
+        return {"width": rect.width, "height": rect.height, "total_pages": len(doc)}
+
+
+def tile_grid(width: float, height: float, scale: float, tile_size: int) -> Tuple[int, int]:
+    """给定页面尺寸与缩放因子，返回 (列数, 行数)"""
+    return (
+        max(1, math.ceil(width * scale / tile_size)),
+        max(1, math.ceil(height * scale / tile_size)),
+    )
+
+
+def render_tile(
+    pdf_path: str,
+    page_number: int,
+    scale: float,
+    x: int,
+    y: int,
+    tile_size: int = 256,
+    fmt: str = "png",
+    quality: Optional[int] = None,
+    documents: Optional[DocumentPool] = None,
+) -> bytes:
+    """
+    渲染页面的一个瓦片（只光栅化裁剪区域）
+
+    Args:
+        pdf_path: PDF 文件路径
+        page_number: 页码（从1开始）
+        scale: 缩放因子（DPI / 72）
+        x: 瓦片列号（从0开始）
+        y: 瓦片行号（从0开始）
+        tile_size: 瓦片边长（像素），页面右/下边缘的瓦片可能更小
+        fmt: 输出格式 png/jpeg/webp
+        quality: 有损格式的质量（1-100）
+        documents: 文档句柄池，为 None 时每次打开文件
+
+    Returns:
+        图片字节
+
+    Raises:
+        PageOutOfRangeError: 页码超出范围
+        TileOutOfRangeError: 瓦片坐标超出页面范围
+    """
+    with open_document(pdf_path, documents) as doc:
+        if page_number < 1 or page_number > len(doc):
+            raise PageOutOfRangeError(page_number, len(doc))
+        page = doc.load_page(page_number - 1)
+        rect = page.rect
+
+        # 瓦片在页面坐标系（PDF 点）中的区域
+        span = tile_size / scale
+        clip = fitz.Rect(
+            rect.x0 + x * span,
+            rect.y0 + y * span,
+            rect.x0 + (x + 1) * span,
+            rect.y0 + (y + 1) * span,
+        ) & rect
+        if x < 0 or y < 0 or clip.is_empty:
+            columns, rows = tile_grid(rect.width, rect.height, scale, tile_size)
+            raise TileOutOfRangeError(f"瓦片坐标超出范围，该级别共 {columns} 列 {rows} 行")
+
+        pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), clip=clip, alpha=False)
+    return encode_pixmap(pix, fmt, quality)
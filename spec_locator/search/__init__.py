@@ -0,0 +1,14 @@
+"""
+全文检索模块初始化
+"""
+
+from spec_locator.search.tokenizer import compact_text, normalize_text, tokenize
+from spec_locator.search.index import SearchIndex, make_snippet
+
+__all__ = [
+    "compact_text",
+    "normalize_text",
+    "tokenize",
+    "SearchIndex",
+    "make_snippet",
+]
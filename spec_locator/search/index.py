@@ -0,0 +1,290 @@
+"""
+全文检索倒排索引
+- SQLite 持久化：文档表（每个 PDF 的每一页一条）、倒排表（词 -> 文档, 词频）、文件表（增量更新用）
+- 查询按 BM25 打分，命中词数优先，完整短语命中加权
+- 离线建索引（python -m spec_locator.search.indexer），服务只读查询
+"""
+
+import logging
+import math
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from spec_locator.search.tokenizer import compact_text, term_frequencies, tokenize
+
+logger = logging.getLogger(__name__)
+
+# 索引结构或分词规则变化时递增，旧索引会被清空重建
+SCHEMA_VERSION = 1
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 完整短语命中时的分数倍数
+PHRASE_BOOST = 2.0
+
+# 摘要窗口（命中位置前后各取多少字）
+SNIPPET_RADIUS = 30
+
+
+class SearchIndex:
+    """基于 SQLite 的倒排索引"""
+
+    def __init__(self, index_path: str, readonly: bool = False):
+        """
+        打开（或创建）索引
+
+        Args:
+            index_path: SQLite 文件路径
+            readonly: 只读打开（服务端查询），索引文件不存在时抛出 FileNotFoundError
+        """
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        if readonly:
+            if not os.path.exists(index_path):
+                raise FileNotFoundError(f"全文索引不存在: {index_path}")
+            uri = f"file:{os.path.abspath(index_path)}?mode=ro"
+            self._db = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(index_path, check_same_thread=False)
+            self._init_schema()
+
+    def _init_schema(self):
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            if version:
+                logger.info(f"全文索引版本变化 ({version} -> {SCHEMA_VERSION})，重建索引")
+            self._db.executescript(
+                """
+                DROP TABLE IF EXISTS postings;
+                DROP TABLE IF EXISTS documents;
+                DROP TABLE IF EXISTS files;
+                """
+            )
+        self._db.executescript(
+            f"""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS files (
+                file_path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                file_path TEXT NOT NULL,
+                page_number INTEGER NOT NULL,
+                spec_code TEXT NOT NULL,
+                page_code TEXT NOT NULL,
+                file_name TEXT NOT NULL,
+                source TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS documents_file ON documents (file_path);
+            CREATE TABLE IF NOT EXISTS postings (
+                token TEXT NOT NULL,
+                doc_id INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (token, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+            PRAGMA user_version = {SCHEMA_VERSION};
+            """
+        )
+        self._db.commit()
+
+    # ===== 写入（离线建索引） =====
+
+    def file_state(self, file_path: str) -> Optional[Tuple[float, int]]:
+        """已索引文件的 (修改时间, 大小)，未索引返回 None"""
+        with self._lock:
+            row = self._db.execute("SELECT mtime, size FROM files WHERE file_path = ?", (file_path,)).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def indexed_files(self) -> List[str]:
+        """所有已索引的文件路径"""
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT file_path FROM files")]
+
+    def replace_file(
+        self,
+        file_path: str,
+        mtime: float,
+        size: int,
+        spec_code: str,
+        page_code: str,
+        file_name: str,
+        pages: Sequence[Tuple[int, str, str]],
+    ):
+        """
+        写入（或替换）一个文件的全部页面
+
+        Args:
+            file_path: PDF 文件路径
+            mtime: 文件修改时间
+            size: 文件大小
+            spec_code: 规范编号
+            page_code: 页码
+            file_name: 文件名
+            pages: [(页码（从1开始）, 文本, 来源 "text" | "ocr")]
+        """
+        with self._lock, self._db:
+            self._delete_file(file_path)
+            for page_number, text, source in pages:
+                frequencies = term_frequencies(text)
+                cursor = self._db.execute(
+                    "INSERT INTO documents (file_path, page_number, spec_code, page_code, file_name, source, length, text)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (file_path, page_number, spec_code, page_code, file_name, source,
+                     sum(frequencies.values()), text),
+                )
+                self._db.executemany(
+                    "INSERT INTO postings (token, doc_id, tf) VALUES (?, ?, ?)",
+                    [(token, cursor.lastrowid, tf) for token, tf in frequencies.items()],
+                )
+            self._db.execute(
+                "INSERT OR REPLACE INTO files (file_path, mtime, size) VALUES (?, ?, ?)",
+                (file_path, mtime, size),
+            )
+
+    def remove_file(self, file_path: str):
+        """删除一个文件的全部页面"""
+        with self._lock, self._db:
+            self._delete_file(file_path)
+
+    def _delete_file(self, file_path: str):
+        """调用方需持有锁并处于事务中"""
+        doc_ids = [row[0] for row in self._db.execute("SELECT id FROM documents WHERE file_path = ?", (file_path,))]
+        self._db.executemany("DELETE FROM postings WHERE doc_id = ?", [(doc_id,) for doc_id in doc_ids])
+        self._db.execute("DELETE FROM documents WHERE file_path = ?", (file_path,))
+        self._db.execute("DELETE FROM files WHERE file_path = ?", (file_path,))
+
+    # ===== 查询 =====
+
+    def search(self, query: str, limit: int = 20, spec_code: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        检索
+
+        Args:
+            query: 查询文本
+            limit: 最多返回条数
+            spec_code: 只在指定规范内检索
+
+        Returns:
+            命中列表（按相关度降序），每项包含规范编号、页码、PDF 内页码、分数与摘要
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+        spec_code = spec_code.upper() if spec_code else None
+
+        with self._lock:
+            total_docs, total_length = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM documents"
+            ).fetchone()
+            if total_docs == 0:
+                return []
+            avg_length = total_length / total_docs
+
+            # doc_id -> [分数, 命中词数]
+            scores: Dict[int, List[float]] = {}
+            for token in tokens:
+                sql = (
+                    "SELECT p.doc_id, p.tf, d.length FROM postings p JOIN documents d ON d.id = p.doc_id"
+                    " WHERE p.token = ?"
+                )
+                params: Tuple = (token,)
+                if spec_code:
+                    sql += " AND d.spec_code = ?"
+                    params = (token, spec_code)
+                postings = self._db.execute(sql, params).fetchall()
+                if not postings:
+                    continue
+                # 词的文档频率按全库统计，限定规范时保持打分一致
+                df = len(postings) if not spec_code else self._db.execute(
+                    "SELECT COUNT(*) FROM postings WHERE token = ?", (token,)
+                ).fetchone()[0]
+                idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                for doc_id, tf, length in postings:
+                    norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                    entry = scores.setdefault(doc_id, [0.0, 0])
+                    entry[0] += idf * tf * (BM25_K1 + 1) / norm
+                    entry[1] += 1
+
+            if not scores:
+                return []
+
+            # 先按命中词数与 BM25 粗排，再对候选做短语加权
+            candidates = sorted(scores.items(), key=lambda item: (item[1][1], item[1][0]), reverse=True)
+            candidates = candidates[: max(limit * 5, 50)]
+            placeholders = ",".join("?" * len(candidates))
+            rows = self._db.execute(
+                "SELECT id, spec_code, page_code, file_name, page_number, source, text"
+                f" FROM documents WHERE id IN ({placeholders})",
+                [doc_id for doc_id, _ in candidates],
+            ).fetchall()
+
+        phrase = compact_text(query)
+        hits = []
+        for doc_id, spec, page, file_name, page_number, source, text in rows:
+            score, matched = scores[doc_id]
+            exact = bool(phrase) and phrase in compact_text(text)
+            if exact:
+                score *= PHRASE_BOOST
+            hits.append({
+                "spec_code": spec,
+                "page_code": page,
+                "file_name": file_name,
+                "page_number": page_number,
+                "score": round(score, 4),
+                "matched_terms": matched,
+                "exact": exact,
+                "source": source,
+                "snippet": make_snippet(text, query),
+            })
+        hits.sort(key=lambda hit: (hit["exact"], hit["matched_terms"], hit["score"]), reverse=True)
+        for hit in hits:
+            hit["matched_terms"] = round(hit["matched_terms"] / len(tokens), 4)
+        return hits[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        """获取索引统计信息"""
+        with self._lock:
+            files = self._db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            documents, ocr_documents = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(source = 'ocr'), 0) FROM documents"
+            ).fetchone()
+        return {
+            "index_path": self.index_path,
+            "files": files,
+            "documents": documents,
+            "ocr_documents": ocr_documents,
+        }
+
+    def close(self):
+        """关闭连接"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def make_snippet(text: str, query: str, radius: int = SNIPPET_RADIUS) -> str:
+    """截取首个命中位置附近的文本作为摘要（空白合并为单个空格）"""
+    flat = " ".join(text.split())
+    lowered = flat.lower()
+    position = -1
+    for term in [query.strip().lower()] + query.lower().split() + tokenize(query):
+        if term:
+            position = lowered.find(term)
+            if position >= 0:
+                break
+    if position < 0:
+        return flat[: radius * 2]
+    start = max(0, position - radius)
+    end = min(len(flat), position + radius)
+    return ("…" if start > 0 else "") + flat[start:end] + ("…" if end < len(flat) else "")
@@ -0,0 +1,208 @@
+"""
+离线建立全文检索索引
+- 遍历 FileIndex 中的全部规范文件，用 PyMuPDF 提取每页的文本层
+- 文本层为空（扫描件、文字已转曲）的页面回退到 OCR 引擎识别
+- 按文件修改时间与大小增量更新，已删除的文件从索引中移除
+
+使用方法：
+    python -m spec_locator.search.indexer
+    python -m spec_locator.search.indexer --spec 12J2 --no-ocr
+
+服务端直接读取索引文件，建索引期间服务可照常查询。
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import fitz  # PyMuPDF
+import numpy as np
+
+from spec_locator.config import OCRConfig, PathConfig, SearchConfig
+from spec_locator.database.file_index import FileIndex, SpecFile
+from spec_locator.search.index import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+# 每处理多少个文件输出一次进度
+PROGRESS_INTERVAL = 100
+
+
+def extract_page_texts(
+    pdf_path: str,
+    ocr: Optional[Callable[[np.ndarray], str]] = None,
+    min_chars: int = SearchConfig.OCR_MIN_CHARS,
+    ocr_dpi: int = SearchConfig.OCR_DPI,
+) -> List[Tuple[int, str, str]]:
+    """
+    提取 PDF 每一页的文本
+
+    Args:
+        pdf_path: PDF 文件路径
+        ocr: OCR 回调（BGR 图像 -> 文本），为 None 时不回退
+        min_chars: 文本层去除空白后少于该字数时回退到 OCR
+        ocr_dpi: OCR 渲染 DPI
+
+    Returns:
+        [(页码（从1开始）, 文本, 来源 "text" | "ocr")]
+    """
+    pages = []
+    with fitz.open(pdf_path) as doc:
+        for index, page in enumerate(doc):
+            text = page.get_text("text")
+            source = "text"
+            if ocr is not None and len("".join(text.split())) < min_chars:
+                zoom = ocr_dpi / 72
+                pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+                image = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+                ocr_text = ocr(cv2.cvtColor(image, cv2.COLOR_RGB2BGR))
+                if len(ocr_text.strip()) > len(text.strip()):
+                    text, source = ocr_text, "ocr"
+            pages.append((index + 1, text, source))
+    return pages
+
+
+def _ocr_text(engine) -> Callable[[np.ndarray], str]:
+    """OCR 引擎适配：识别结果按阅读顺序拼接为多行文本"""
+
+    def recognize(image: np.ndarray) -> str:
+        return "\n".join(box.text for box in engine.recognize(image))
+
+    return recognize
+
+
+class Indexer:
+    """全文索引增量构建任务"""
+
+    def __init__(
+        self,
+        file_index: FileIndex,
+        search_index: SearchIndex,
+        ocr: Optional[Callable[[np.ndarray], str]] = None,
+        min_chars: int = SearchConfig.OCR_MIN_CHARS,
+        ocr_dpi: int = SearchConfig.OCR_DPI,
+    ):
+        """
+        Args:
+            file_index: 规范文件索引
+            search_index: 全文索引（可写）
+            ocr: OCR 回调，为 None 时不对无文本层的页面做 OCR
+            min_chars: 回退到 OCR 的文本层字数阈值
+            ocr_dpi: OCR 渲染 DPI
+        """
+        self.file_index = file_index
+        self.search_index = search_index
+        self.ocr = ocr
+        self.min_chars = min_chars
+        self.ocr_dpi = ocr_dpi
+
+    def pending_files(self, spec_codes: Optional[Sequence[str]] = None, force: bool = False) -> List[SpecFile]:
+        """需要（重新）索引的文件列表"""
+        codes = [code.upper() for code in spec_codes] if spec_codes else self.file_index.get_all_specs()
+        files = [spec_file for code in codes for spec_file in self.file_index.get_spec_files(code)]
+        if force:
+            return files
+        pending = []
+        for spec_file in files:
+            try:
+                stat = os.stat(spec_file.file_path)
+            except OSError:
+                continue
+            if self.search_index.file_state(spec_file.file_path) != (stat.st_mtime, stat.st_size):
+                pending.append(spec_file)
+        return pending
+
+    def remove_deleted(self) -> int:
+        """从索引中移除已不在文件索引中的文件，返回移除数量"""
+        known = {
+            spec_file.file_path
+            for code in self.file_index.get_all_specs()
+            for spec_file in self.file_index.get_spec_files(code)
+        }
+        removed = 0
+        for file_path in self.search_index.indexed_files():
+            if file_path not in known:
+                self.search_index.remove_file(file_path)
+                removed += 1
+        return removed
+
+    def run(self, files: List[SpecFile]) -> Dict[str, int]:
+        """
+        提取文本并写入索引
+
+        Returns:
+            统计信息 {"files", "pages", "ocr_pages", "failed"}
+        """
+        stats = {"files": 0, "pages": 0, "ocr_pages": 0, "failed": 0}
+        start = time.time()
+        for done, spec_file in enumerate(files, 1):
+            try:
+                stat = os.stat(spec_file.file_path)  # 提取前记录，提取期间被修改的文件下次会重新索引
+                pages = extract_page_texts(spec_file.file_path, self.ocr, self.min_chars, self.ocr_dpi)
+            except Exception as e:
+                logger.error(f"提取文本失败: {spec_file.file_path}: {e}")
+                stats["failed"] += 1
+                continue
+
+            self.search_index.replace_file(
+                spec_file.file_path,
+                stat.st_mtime,
+                stat.st_size,
+                spec_file.spec_code,
+                spec_file.page_code,
+                spec_file.file_name,
+                pages,
+            )
+            stats["files"] += 1
+            stats["pages"] += len(pages)
+            stats["ocr_pages"] += sum(1 for _, _, source in pages if source == "ocr")
+            if done % PROGRESS_INTERVAL == 0:
+                logger.info(f"进度: {done}/{len(files)} 个文件, 用时 {time.time() - start:.1f}s")
+        return stats
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="离线建立规范 PDF 全文检索索引")
+    parser.add_argument("--data-dir", default=PathConfig.SPEC_DATA_DIR, help="规范 PDF 数据目录")
+    parser.add_argument("--index-path", default=SearchConfig.INDEX_PATH, help="索引文件路径")
+    parser.add_argument("--no-ocr", action="store_true", help="不对无文本层的页面做 OCR")
+    parser.add_argument("--ocr-dpi", type=int, default=SearchConfig.OCR_DPI, help="OCR 渲染 DPI")
+    parser.add_argument("--spec", nargs="*", help="只索引指定规范编号")
+    parser.add_argument("--force", action="store_true", help="忽略已有记录，全部重新索引")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    ocr = None
+    if SearchConfig.OCR_FALLBACK and not args.no_ocr:
+        from spec_locator.ocr import OCREngine
+
+        ocr = _ocr_text(OCREngine(use_gpu=OCRConfig.USE_GPU, conf_threshold=OCRConfig.CONF_THRESHOLD))
+
+    file_index = FileIndex(args.data_dir, collect_metadata=False)
+    search_index = SearchIndex(args.index_path)
+    indexer = Indexer(file_index, search_index, ocr=ocr, ocr_dpi=args.ocr_dpi)
+
+    removed = 0 if args.spec else indexer.remove_deleted()
+    files = indexer.pending_files(args.spec, force=args.force)
+    total = file_index.get_stats()["total_files"]
+    logger.info(f"待索引 {len(files)} 个文件（共 {total} 个），移除 {removed} 个已删除文件，OCR 回退: {ocr is not None}")
+
+    start = time.time()
+    stats = indexer.run(files)
+    logger.info(
+        f"索引完成: {stats['files']} 个文件, {stats['pages']} 页（OCR {stats['ocr_pages']} 页）, "
+        f"失败 {stats['failed']}, 用时 {time.time() - start:.1f}s"
+    )
+    logger.info(f"索引统计: {search_index.stats()}")
+    search_index.close()
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+全文检索分词
+- 中文按连续汉字切分为二元组（n-gram），不依赖词典，专业术语与标题均可命中
+- 字母数字按整词切分（规范编号、页码、型号等），统一小写
+- 建索引与查询使用同一套规则
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List
+
+# 中文 n-gram 长度
+NGRAM = 2
+
+# 连续汉字 或 连续字母数字
+_TOKEN_PATTERN = re.compile(r"[㐀-䶿一-鿿]+|[a-z0-9]+")
+_WHITESPACE = re.compile(r"\s+")
+# 汉字之间的空白（PDF 文本层中一个标题常被换行或空格断开）
+_CJK_GAP = re.compile(r"(?<=[㐀-䶿一-鿿])\s+(?=[㐀-䶿一-鿿])")
+
+
+def normalize_text(text: str) -> str:
+    """全角转半角、统一小写"""
+    return unicodedata.normalize("NFKC", text or "").lower()
+
+
+def compact_text(text: str) -> str:
+    """规范化并去除所有空白（PDF 文本层中汉字之间常有换行或空格）"""
+    return _WHITESPACE.sub("", normalize_text(text))
+
+
+def tokenize(text: str, ngram: int = NGRAM) -> List[str]:
+    """
+    分词
+
+    Args:
+        text: 原始文本
+        ngram: 中文 n-gram 长度，不足 n 个字的汉字串整体作为一个词
+
+    Returns:
+        词列表（按出现顺序，可重复）
+    """
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(_CJK_GAP.sub("", normalize_text(text))):
+        if not ("㐀" <= run[0] <= "鿿"):
+            tokens.append(run)
+        elif len(run) <= ngram:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + ngram] for i in range(len(run) - ngram + 1))
+    return tokens
+
+
+def term_frequencies(text: str, ngram: int = NGRAM) -> Dict[str, int]:
+    """词频统计"""
+    return dict(Counter(tokenize(text, ngram)))
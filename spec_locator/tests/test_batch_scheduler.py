@@ -0,0 +1,96 @@
+"""
+单元测试 - OCR 微批处理
+"""
+
+import threading
+
+import numpy as np
+import pytest
+from spec_locator.ocr.ocr_engine import OCREngine, TextBox
+from spec_locator.ocr.batch_scheduler import OCRBatchScheduler
+
+
+class FakeEngine:
+    """记录每次批量调用大小的假引擎"""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def recognize(self, image):
+        self.batch_sizes.append(1)
+        return [TextBox(text=str(int(image[0, 0])), confidence=1.0, bbox=((0, 0), (1, 0), (1, 1), (0, 1)))]
+
+    def recognize_batch(self, images):
+        self.batch_sizes.append(len(images))
+        return [
+            [TextBox(text=str(int(image[0, 0])), confidence=1.0, bbox=((0, 0), (1, 0), (1, 1), (0, 1)))]
+            for image in images
+        ]
+
+
+class FakeDetector:
+    def __call__(self, image):
+        box = np.array([[0, 0], [20, 0], [20, 10], [0, 10]], dtype=np.float32)
+        return np.array([box] * int(image[0, 0, 0])), 0.0
+
+
+class FakeRecognizer:
+    """模拟 PaddleOCR 2.x 的分阶段接口"""
+
+    def __init__(self):
+        self.text_detector = FakeDetector()
+        self.rec_calls = []
+        self.use_angle_cls = False
+
+    def text_recognizer(self, crops):
+        self.rec_calls.append(len(crops))
+        return [(f"T{i}", 0.9) for i in range(len(crops))], 0.0
+
+
+class TestOCRBatchScheduler:
+    """微批处理调度器测试"""
+
+    def test_concurrent_requests_are_grouped(self):
+        engine = FakeEngine()
+        scheduler = OCRBatchScheduler(engine, window_ms=200, max_batch_size=4)
+        results = {}
+
+        def worker(value):
+            image = np.full((2, 2), value, dtype=np.uint8)
+            results[value] = scheduler.recognize(image)[0].text
+
+        threads = [threading.Thread(target=worker, args=(v,)) for v in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=5)
+
+        assert results == {v: str(v) for v in range(4)}
+        assert sum(engine.batch_sizes) == 4
+        assert max(engine.batch_sizes) > 1
+
+    def test_single_request(self):
+        engine = FakeEngine()
+        scheduler = OCRBatchScheduler(engine, window_ms=0, max_batch_size=4)
+        image = np.full((2, 2), 7, dtype=np.uint8)
+        assert scheduler.recognize(image)[0].text == "7"
+
+
+class TestRecognizeBatch:
+    """OCREngine.recognize_batch 拆分测试"""
+
+    def test_results_split_per_image(self):
+        engine = OCREngine(use_gpu=False, conf_threshold=0.3, lazy_load=True)
+        engine.recognizer = FakeRecognizer()
+        engine._initialized = True
+
+        images = [np.full((30, 30, 3), n, dtype=np.uint8) for n in (2, 0, 3)]
+        results = engine.recognize_batch(images)
+
+        assert [len(r) for r in results] == [2, 0, 3]
+        # 识别阶段只调用一次
+        assert engine.recognizer.rec_calls == [5]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,121 @@
+"""
+单元测试 - 检测框几何筛选与选择性识别
+"""
+
+import cv2
+import numpy as np
+import pytest
+from spec_locator.ocr.box_filter import BoxFilter, box_size
+from spec_locator.ocr.ocr_engine import OCREngine
+
+
+def rect_box(x0, y0, x1, y1):
+    return np.array([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], dtype=np.float32)
+
+
+def drawing_with_callout():
+    """白底图纸，(200, 200) 处有一个半径 30 的索引圆"""
+    image = np.full((800, 1200, 3), 255, dtype=np.uint8)
+    cv2.circle(image, (200, 200), 30, (0, 0, 0), 2)
+    cv2.line(image, (170, 200), (230, 200), (0, 0, 0), 2)
+    return image
+
+
+class FakeStageRecognizer:
+    """暴露分阶段接口的假识别器：固定的检测框，识别结果为文本行宽度"""
+
+    def __init__(self, boxes):
+        self.boxes = boxes
+        self.recognized = []
+        self.text_detector = self._detect
+        self.text_recognizer = self._recognize
+
+    def _detect(self, image):
+        return np.array(self.boxes, dtype=np.float32), 0.0
+
+    def _recognize(self, crops):
+        self.recognized.append(len(crops))
+        return [(f"T{crop.shape[1]}", 0.9) for crop in crops], 0.0
+
+    def ocr(self, image):
+        return [[[box, (f"T{box[1][0] - box[0][0]}", 0.9)] for box in self.boxes]]
+
+
+class TestBoxFilter:
+    """几何筛选"""
+
+    def test_box_size(self):
+        assert box_size(rect_box(10, 10, 70, 30)) == pytest.approx((60, 20))
+
+    def test_shape_filter(self):
+        box_filter = BoxFilter(use_circles=False)
+        boxes = [
+            rect_box(0, 0, 60, 20),  # 规范编号大小
+            rect_box(0, 0, 4, 3),  # 噪点
+            rect_box(0, 0, 600, 200),  # 标题
+            rect_box(0, 0, 800, 20),  # 长说明
+            rect_box(0, 0, 20, 60),  # 竖排文本
+        ]
+        kept = box_filter.filter(np.zeros((10, 10, 3), np.uint8), boxes)
+        assert [box_size(box) for box in kept] == [(60, 20), (20, 60)]
+
+    def test_detect_circles(self):
+        circles = BoxFilter().detect_circles(drawing_with_callout())
+        assert len(circles) >= 1
+        x, y, r = circles[0]
+        assert abs(x - 200) < 5 and abs(y - 200) < 5 and abs(r - 30) < 5
+
+    def test_keeps_boxes_near_callout(self):
+        near = rect_box(240, 170, 320, 190)
+        inside = rect_box(185, 205, 215, 225)
+        far = rect_box(900, 600, 980, 620)
+        kept = BoxFilter().filter(drawing_with_callout(), [near, far, inside])
+        assert [box.tolist() for box in kept] == [near.tolist(), inside.tolist()]
+
+    def test_no_circle_falls_back_to_shape(self):
+        image = np.full((800, 1200, 3), 255, dtype=np.uint8)
+        boxes = [rect_box(900, 600, 980, 620), rect_box(100, 100, 160, 120)]
+        assert len(BoxFilter().filter(image, boxes)) == 2
+
+    def test_nothing_near_circle_falls_back_to_shape(self):
+        boxes = [rect_box(900, 600, 980, 620), rect_box(1000, 700, 1060, 720)]
+        assert len(BoxFilter().filter(drawing_with_callout(), boxes)) == 2
+
+
+class TestSelectiveRecognition:
+    """OCREngine 选择性识别"""
+
+    boxes = [
+        [[10, 10], [70, 10], [70, 30], [10, 30]],
+        [[10, 50], [810, 50], [810, 70], [10, 70]],  # 长说明文字，应跳过
+        [[10, 90], [50, 90], [50, 110], [10, 110]],
+    ]
+
+    def make_engine(self, box_filter):
+        engine = OCREngine(lazy_load=True, box_filter=box_filter)
+        engine.recognizer = FakeStageRecognizer(self.boxes)
+        engine._initialized = True
+        return engine
+
+    def test_only_kept_boxes_recognized_in_one_batch(self):
+        engine = self.make_engine(BoxFilter(use_circles=False))
+        text_boxes = engine.recognize(np.full((200, 900, 3), 255, np.uint8))
+        assert [tb.text for tb in text_boxes] == ["T60", "T40"]
+        assert engine.recognizer.recognized == [2]
+
+    def test_without_filter_recognizes_all(self):
+        engine = self.make_engine(None)
+        text_boxes = engine.recognize(np.full((200, 900, 3), 255, np.uint8))
+        assert len(text_boxes) == 3
+        assert engine.recognizer.recognized == []
+
+    def test_batch_filters_every_image(self):
+        engine = self.make_engine(BoxFilter(use_circles=False))
+        image = np.full((200, 900, 3), 255, np.uint8)
+        results = engine.recognize_batch([image, image])
+        assert [len(boxes) for boxes in results] == [2, 2]
+        assert engine.recognizer.recognized == [4]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,61 @@
+"""
+单元测试 - 多页面打包下载
+"""
+
+import io
+import os
+import zipfile
+
+import fitz
+import pytest
+from spec_locator.api import bundle
+from spec_locator.api.bundle import iter_merged_pdf, iter_zip
+from spec_locator.database.file_index import FileIndex
+
+
+@pytest.fixture
+def spec_files(tmp_path):
+    spec_dir = tmp_path / "data" / "12J2 地下工程防水"
+    spec_dir.mkdir(parents=True)
+    for i, page_code in enumerate(("C1", "C2", "C3"), 1):
+        doc = fitz.open()
+        for _ in range(i):
+            doc.new_page(width=200, height=300)
+        doc.save(str(spec_dir / f"12J2_{page_code}.pdf"))
+        doc.close()
+    return FileIndex(str(tmp_path / "data"), collect_metadata=False).get_spec_files("12J2")
+
+
+class TestBundle:
+    """打包下载测试"""
+
+    def test_zip_contains_all_files(self, spec_files):
+        data = b"".join(iter_zip(spec_files))
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            assert archive.namelist() == ["12J2/12J2_C1.pdf", "12J2/12J2_C2.pdf", "12J2/12J2_C3.pdf"]
+            with open(spec_files[1].file_path, "rb") as f:
+                assert archive.read("12J2/12J2_C2.pdf") == f.read()
+
+    def test_zip_is_streamed_in_chunks(self, spec_files):
+        assert len(list(iter_zip(spec_files))) > 1
+
+    def test_merged_pdf_keeps_order_and_pages(self, spec_files, tmp_path):
+        data = b"".join(iter_merged_pdf(spec_files, str(tmp_path)))
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            assert len(doc) == 1 + 2 + 3
+
+    def test_merged_pdf_in_batches(self, spec_files, tmp_path, monkeypatch):
+        monkeypatch.setattr(bundle, "MERGE_BATCH_SIZE", 1)
+        data = b"".join(iter_merged_pdf(spec_files, str(tmp_path)))
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            assert len(doc) == 6
+
+    def test_merged_pdf_removes_temp_file(self, spec_files, tmp_path):
+        temp_dir = tmp_path / "tmp"
+        temp_dir.mkdir()
+        b"".join(iter_merged_pdf(spec_files, str(temp_dir)))
+        assert os.listdir(temp_dir) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
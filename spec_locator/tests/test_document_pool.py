@@ -0,0 +1,129 @@
+"""
+单元测试 - PyMuPDF 文档句柄池
+"""
+
+import os
+import threading
+
+import fitz
+import pytest
+from spec_locator.preview.documents import DocumentPool
+from spec_locator.preview.renderer import page_geometry, render_page
+
+
+def make_pdf(path, pages=1, width=200):
+    doc = fitz.open()
+    for _ in range(pages):
+        doc.new_page(width=width, height=300)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture
+def pdfs(tmp_path):
+    return [make_pdf(tmp_path / f"12J2_C{i}.pdf") for i in range(1, 4)]
+
+
+class TestDocumentPool:
+    """文档句柄池测试"""
+
+    def test_reuses_open_document(self, pdfs):
+        pool = DocumentPool(max_documents=4)
+        with pool.open(pdfs[0]) as first:
+            pass
+        with pool.open(pdfs[0]) as second:
+            assert second is first
+            assert not second.is_closed
+        stats = pool.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["open_documents"] == 1
+
+    def test_lru_eviction_closes_oldest(self, pdfs):
+        pool = DocumentPool(max_documents=2)
+        docs = []
+        for path in (pdfs[0], pdfs[1], pdfs[0], pdfs[2]):
+            with pool.open(path) as doc:
+                docs.append(doc)
+        # pdfs[1] 最久未使用，被淘汰
+        assert docs[1].is_closed
+        assert not docs[0].is_closed
+        assert pool.stats()["evictions"] == 1
+        assert pool.stats()["open_documents"] == 2
+
+    def test_evicted_while_borrowed_closes_on_release(self, pdfs):
+        pool = DocumentPool(max_documents=1)
+        with pool.open(pdfs[0]) as borrowed:
+            with pool.open(pdfs[1]):
+                pass
+            assert not borrowed.is_closed
+            assert len(borrowed) == 1
+        assert borrowed.is_closed
+
+    def test_reopens_when_file_changes(self, pdfs):
+        pool = DocumentPool(max_documents=4)
+        with pool.open(pdfs[0]) as old:
+            assert len(old) == 1
+        make_pdf(pdfs[0], pages=3)
+        stat = os.stat(pdfs[0])
+        os.utime(pdfs[0], (stat.st_atime, stat.st_mtime + 10))
+        with pool.open(pdfs[0]) as new:
+            assert new is not old
+            assert len(new) == 3
+        assert old.is_closed
+        assert pool.stats()["invalidations"] == 1
+
+    def test_zero_size_disables_reuse(self, pdfs):
+        pool = DocumentPool(max_documents=0)
+        with pool.open(pdfs[0]) as doc:
+            pass
+        assert doc.is_closed
+        assert pool.stats()["open_documents"] == 0
+
+    def test_clear_closes_all(self, pdfs):
+        pool = DocumentPool(max_documents=4)
+        docs = []
+        for path in pdfs:
+            with pool.open(path) as doc:
+                docs.append(doc)
+        pool.clear()
+        assert all(doc.is_closed for doc in docs)
+        assert pool.stats()["open_documents"] == 0
+
+    def test_missing_file_raises(self, tmp_path):
+        pool = DocumentPool()
+        with pytest.raises(FileNotFoundError):
+            with pool.open(str(tmp_path / "missing.pdf")):
+                pass
+
+    def test_concurrent_renders(self, pdfs):
+        pool = DocumentPool(max_documents=2)
+        expected = render_page(pdfs[0], 1, 72)
+        errors = []
+
+        def worker(i):
+            try:
+                for j in range(10):
+                    path = pdfs[(i + j) % len(pdfs)]
+                    assert render_page(path, 1, 72, documents=pool) == expected
+            except Exception as e:  # noqa: BLE001
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert errors == []
+        assert pool.stats()["open_documents"] <= 2
+
+    def test_renderer_uses_pool(self, pdfs):
+        pool = DocumentPool()
+        page_geometry(pdfs[0], 1, pool)
+        render_page(pdfs[0], 1, 72, documents=pool)
+        assert pool.stats()["hits"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
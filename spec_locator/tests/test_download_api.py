@@ -0,0 +1,205 @@
+"""
+单元测试 - PDF 下载与预览接口（使用临时数据目录）
+"""
+
+import io
+import os
+import types
+import zipfile
+
+import fitz
+import pytest
+from fastapi.testclient import TestClient
+from spec_locator.api import server
+from spec_locator.database.file_index import FileIndex
+from spec_locator.preview import DocumentPool, PreviewCache
+
+
+def write_pdf(path, pages=1, text=""):
+    doc = fitz.open()
+    for _ in range(pages):
+        doc.new_page(width=200, height=300).insert_text((20, 50), text)
+    doc.save(str(path))
+    doc.close()
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    spec_dir = tmp_path / "data" / "12J2 地下工程防水"
+    spec_dir.mkdir(parents=True)
+    for page_code in ("C1", "C2", "C3"):
+        write_pdf(spec_dir / f"12J2_{page_code}.pdf", text=page_code)
+    # 规范编号包含 12J2 的另一图集（模糊匹配的目标）
+    other_dir = tmp_path / "data" / "12J201 平屋面建筑构造"
+    other_dir.mkdir()
+    write_pdf(other_dir / "12J201_C9.pdf", text="C9")
+    return tmp_path / "data"
+
+
+def make_client(monkeypatch, data_dir, collect_metadata):
+    file_index = FileIndex(str(data_dir), collect_metadata=collect_metadata)
+    monkeypatch.setattr(server, "pipeline", types.SimpleNamespace(file_index=file_index))
+    return TestClient(server.app), file_index
+
+
+class TestDownloadPdf:
+    """单个 PDF 下载 /api/download/{spec_code}/{page_code}"""
+
+    def test_content_hash_etag_and_304(self, monkeypatch, data_dir):
+        client, file_index = make_client(monkeypatch, data_dir, collect_metadata=True)
+        spec_file = file_index.find_file("12J2", "C1")
+
+        response = client.get("/api/download/12J2/C1")
+        assert response.status_code == 200
+        assert response.headers["etag"] == spec_file.etag
+        assert response.content == open(spec_file.file_path, "rb").read()
+
+        response = client.get("/api/download/12J2/C1", headers={"If-None-Match": spec_file.etag})
+        assert response.status_code == 304
+
+    def test_file_replaced_after_indexing(self, monkeypatch, data_dir):
+        client, file_index = make_client(monkeypatch, data_dir, collect_metadata=True)
+        spec_file = file_index.find_file("12J2", "C1")
+        stale_etag = spec_file.etag
+
+        write_pdf(spec_file.file_path, pages=3, text="replaced")
+        os.utime(spec_file.file_path, (spec_file.mtime + 10, spec_file.mtime + 10))
+        content = open(spec_file.file_path, "rb").read()
+
+        response = client.get("/api/download/12J2/C1", headers={"If-None-Match": stale_etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != stale_etag
+        assert int(response.headers["content-length"]) == len(content)
+        assert response.content == content
+
+        response = client.get("/api/download/12J2/C1", headers={"Range": "bytes=0-9"})
+        assert response.status_code == 206
+        assert response.content == content[:10]
+
+    def test_file_removed_after_indexing(self, monkeypatch, data_dir):
+        client, file_index = make_client(monkeypatch, data_dir, collect_metadata=True)
+        os.remove(file_index.find_file("12J2", "C2").file_path)
+
+        response = client.get("/api/download/12J2/C2")
+        assert response.status_code == 404
+        assert response.json()["error_code"] == "FILE_NOT_FOUND"
+
+    def test_without_metadata_uses_stat_etag(self, monkeypatch, data_dir):
+        client, _ = make_client(monkeypatch, data_dir, collect_metadata=False)
+
+        response = client.get("/api/download/12J2/C3")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert etag.startswith('W/"')
+        assert "last-modified" in response.headers
+
+        response = client.get("/api/download/12J2/C3", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        response = client.get("/api/download/12J2/C3", headers={"If-Modified-Since": response.headers["last-modified"]})
+        assert response.status_code == 304
+
+
+class TestDownloadBundleRange:
+    """页码范围打包下载 /api/download-bundle?spec_code=&start=&end="""
+
+    def names(self, response):
+        with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+            return archive.namelist()
+
+    def test_range_in_page_order(self, monkeypatch, data_dir):
+        client, _ = make_client(monkeypatch, data_dir, collect_metadata=False)
+        for start, end in (("C1", "C2"), ("C2", "C1")):
+            response = client.get("/api/download-bundle", params={"spec_code": "12J2", "start": start, "end": end})
+            assert response.status_code == 200
+            assert self.names(response) == ["12J2/12J2_C1.pdf", "12J2/12J2_C2.pdf"]
+
+    def test_range_as_merged_pdf(self, monkeypatch, data_dir, tmp_path):
+        monkeypatch.setattr(server.PathConfig, "TEMP_DIR", str(tmp_path))
+        client, _ = make_client(monkeypatch, data_dir, collect_metadata=False)
+        response = client.get(
+            "/api/download-bundle", params={"spec_code": "12J2", "start": "C1", "end": "C3", "format": "pdf"}
+        )
+        assert response.status_code == 200
+        with fitz.open(stream=response.content, filetype="pdf") as doc:
+            assert len(doc) == 3
+
+    def test_missing_end_page(self, monkeypatch, data_dir):
+        client, _ = make_client(monkeypatch, data_dir, collect_metadata=False)
+        response = client.get("/api/download-bundle", params={"spec_code": "12J2", "start": "C1", "end": "C7"})
+        assert response.status_code == 404
+        assert response.json()["missing"] == ["12J2:C7"]
+
+    def test_end_page_fuzzy_matched_to_other_spec(self, monkeypatch, data_dir):
+        client, file_index = make_client(monkeypatch, data_dir, collect_metadata=False)
+        assert file_index.find_file("12J2", "C9").spec_code == "12J201"
+
+        response = client.get("/api/download-bundle", params={"spec_code": "12J2", "start": "C1", "end": "C9"})
+        assert response.status_code == 400
+        assert response.json()["error_code"] == "INVALID_REQUEST"
+
+
+@pytest.fixture
+def preview_client(monkeypatch, data_dir, tmp_path):
+    """已采集元数据的索引 + 空的预览缓存与文档句柄池"""
+    monkeypatch.setattr(server, "preview_cache", PreviewCache(str(tmp_path / "previews"), memory_bytes=0))
+    monkeypatch.setattr(server, "preview_documents", DocumentPool(max_documents=4))
+    return make_client(monkeypatch, data_dir, collect_metadata=True)
+
+
+class TestPreviewStaleMetadata:
+    """预览与瓦片接口：PDF 在建索引后被删除或替换"""
+
+    preview = {"spec_code": "12J2", "page_code": "C1", "format": "png", "dpi": 72}
+    tile_params = {"spec_code": "12J2", "page_code": "C1", "format": "png"}
+
+    @pytest.mark.parametrize("url, params", [
+        ("/api/pdf-page-preview", preview),
+        ("/api/pdf-page-tiles/info", tile_params),
+        ("/api/pdf-page-tiles/0/0/0", tile_params),
+    ])
+    def test_removed_file_is_404(self, preview_client, url, params):
+        client, file_index = preview_client
+        os.remove(file_index.find_file("12J2", "C1").file_path)
+
+        response = client.get(url, params=params)
+        assert response.status_code == 404
+        assert response.json()["error_code"] == "FILE_NOT_FOUND"
+
+    @pytest.mark.parametrize("url, params", [
+        ("/api/pdf-page-preview", preview),
+        ("/api/pdf-page-tiles/info", tile_params),
+    ])
+    def test_corrupt_replacement_is_404(self, preview_client, url, params):
+        client, file_index = preview_client
+        with open(file_index.find_file("12J2", "C1").file_path, "wb") as f:
+            f.write(b"not a pdf")
+
+        response = client.get(url, params=params)
+        assert response.status_code == 404
+
+    def test_stale_page_count_does_not_reject_existing_page(self, preview_client):
+        client, file_index = preview_client
+        spec_file = file_index.find_file("12J2", "C1")
+        assert spec_file.page_count == 1
+
+        write_pdf(spec_file.file_path, pages=3, text="replaced")
+        os.utime(spec_file.file_path, (spec_file.mtime + 10, spec_file.mtime + 10))
+
+        response = client.get("/api/pdf-page-preview", params={**self.preview, "page_number": 3})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/png"
+
+        response = client.get("/api/pdf-page-preview", params={**self.preview, "page_number": 4})
+        assert response.status_code == 400
+        assert response.json()["total_pages"] == 3
+
+    def test_current_page_count_rejects_without_rendering(self, preview_client, monkeypatch):
+        client, _ = preview_client
+        monkeypatch.setattr(server, "_render_preview", None)  # 不应被调用
+        response = client.get("/api/pdf-page-preview", params={**self.preview, "page_number": 2})
+        assert response.status_code == 400
+        assert response.json()["total_pages"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
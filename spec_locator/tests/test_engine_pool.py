@@ -0,0 +1,106 @@
+"""
+单元测试 - OCR 引擎副本池
+"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+from spec_locator.ocr.engine_pool import OCREnginePool, default_cpu_threads
+from spec_locator.ocr.ocr_engine import OCREngine, TextBox
+
+
+class SlowEngine:
+    """记录并发度的假引擎（模拟不支持并发调用的 PaddleOCR 实例）"""
+
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self._initialized = False
+        self._busy = threading.Lock()
+
+    def recognize(self, image):
+        assert self._busy.acquire(blocking=False), "同一副本被并发调用"
+        try:
+            with SlowEngine.lock:
+                SlowEngine.active += 1
+                SlowEngine.peak = max(SlowEngine.peak, SlowEngine.active)
+            time.sleep(0.05)
+            self.calls += 1
+            with SlowEngine.lock:
+                SlowEngine.active -= 1
+            return [TextBox(text=self.name, confidence=1.0, bbox=((0, 0), (1, 0), (1, 1), (0, 1)))]
+        finally:
+            self._busy.release()
+
+    def recognize_batch(self, images):
+        return [self.recognize(image) for image in images]
+
+    def warmup(self):
+        self._initialized = True
+
+
+def make_pool(replicas, **kwargs):
+    names = iter(range(replicas))
+    SlowEngine.active = SlowEngine.peak = 0
+    return OCREnginePool(replicas=replicas, engine_factory=lambda: SlowEngine(f"E{next(names)}"), **kwargs)
+
+
+class TestOCREnginePool:
+    """副本池测试"""
+
+    def test_parallel_up_to_replicas(self):
+        pool = make_pool(2)
+        image = np.zeros((2, 2), dtype=np.uint8)
+        threads = [threading.Thread(target=pool.recognize, args=(image,)) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert SlowEngine.peak == 2
+        assert sum(engine.calls for engine in pool.engines) == 6
+        assert pool.stats()["busy"] == 0
+        assert pool.stats()["checkouts"] == 6
+
+    def test_sequential_requests_reuse_same_replica(self):
+        pool = make_pool(3)
+        image = np.zeros((2, 2), dtype=np.uint8)
+        names = {pool.recognize(image)[0].text for _ in range(5)}
+        assert names == {"E0"}
+
+    def test_replica_returned_after_error(self):
+        pool = make_pool(1)
+
+        def boom(image):
+            raise RuntimeError("fail")
+
+        pool.engines[0].recognize = boom
+        with pytest.raises(RuntimeError):
+            pool.recognize(np.zeros((2, 2), dtype=np.uint8))
+        assert pool.stats()["busy"] == 0
+
+    def test_eager_load_warms_all_replicas(self):
+        pool = make_pool(3, lazy_load=False)
+        assert all(engine._initialized for engine in pool.engines)
+        assert pool._initialized
+        assert pool.stats()["loaded"] == 3
+
+    def test_default_cpu_threads(self):
+        assert default_cpu_threads(1) >= 1
+        assert default_cpu_threads(10 ** 6) == 1
+        assert make_pool(2, cpu_threads=3).cpu_threads == 3
+
+    def test_replicas_are_independent_engines(self):
+        pool = OCREnginePool(replicas=2, cpu_threads=2, use_gpu=False)
+        assert len({id(engine) for engine in pool.engines}) == 2
+        assert all(isinstance(engine, OCREngine) and engine.cpu_threads == 2 for engine in pool.engines)
+        assert not pool._initialized
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
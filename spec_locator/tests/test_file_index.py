@@ -0,0 +1,48 @@
+"""
+单元测试 - 文件索引元数据
+"""
+
+import hashlib
+
+import fitz
+import pytest
+from spec_locator.database.file_index import FileIndex
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    spec_dir = tmp_path / "data" / "12J2 地下工程防水"
+    spec_dir.mkdir(parents=True)
+    for page_code, pages in (("C11", 1), ("C12", 3)):
+        doc = fitz.open()
+        for _ in range(pages):
+            doc.new_page(width=100, height=100)
+        doc.save(str(spec_dir / f"12J2_{page_code}.pdf"))
+        doc.close()
+    return tmp_path / "data"
+
+
+class TestFileIndexMetadata:
+    """文件元数据采集测试"""
+
+    def test_metadata_collected(self, data_dir):
+        index = FileIndex(str(data_dir), collect_metadata=True)
+        spec_file = index.find_file("12J2", "C12")
+        content = open(spec_file.file_path, "rb").read()
+
+        assert spec_file.has_metadata
+        assert spec_file.size == len(content)
+        assert spec_file.page_count == 3
+        assert spec_file.content_hash == hashlib.sha256(content).hexdigest()
+        assert spec_file.etag == f'"{spec_file.content_hash}"'
+        assert index.get_stats()["total_bytes"] > 0
+
+    def test_metadata_disabled(self, data_dir):
+        index = FileIndex(str(data_dir), collect_metadata=False)
+        spec_file = index.find_file("12J2", "C11")
+        assert not spec_file.has_metadata
+        assert spec_file.page_count == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,323 @@
+"""
+单元测试 - 识别接口（使用桩流水线与执行池）
+"""
+
+import io
+import json
+import time
+import zipfile
+
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from spec_locator.api import server
+from spec_locator.api.worker_pool import PoolFullError, RecognitionPool
+from spec_locator.config import APIConfig
+from spec_locator.core import metrics
+
+
+def png_bytes(value: int) -> bytes:
+    """纯色 PNG，像素值即"规范编号"，便于核对结果与条目的对应关系"""
+    image = np.full((32, 32, 3), value, dtype=np.uint8)
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+class StubPipeline:
+    """桩流水线：按像素值返回结果，可为指定像素值设置处理延迟"""
+
+    config_version = "test"
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.calls = 0
+
+    def process(self, image, method="ocr"):
+        self.calls += 1
+        value = int(image[0, 0, 0])
+        with metrics.stage("ocr"):
+            time.sleep(self.delays.get(value, 0))
+        return {
+            "success": True,
+            "spec": {"code": f"S{value}", "confidence": 0.9},
+            "page": {"code": "1"},
+            "callout_bbox": [4, 4, 20, 20],
+        }
+
+
+class FullPool:
+    """始终拒绝任务的执行池"""
+
+    max_workers = 2
+
+    async def run(self, fn, *args):
+        raise PoolFullError("full")
+
+
+@pytest.fixture
+def stub_pipeline():
+    return StubPipeline()
+
+
+@pytest.fixture
+def client(monkeypatch, stub_pipeline):
+    pool = RecognitionPool(max_workers=2, queue_size=8)
+    monkeypatch.setattr(server, "pipeline", stub_pipeline)
+    monkeypatch.setattr(server, "recognition_pool", pool)
+    monkeypatch.setattr(server, "result_cache", None)
+    monkeypatch.setattr(server, "near_duplicate_index", None)
+    monkeypatch.setattr(server, "preview_prefetcher", None)
+    yield TestClient(server.app)
+    pool.shutdown()
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def make_zip(entries) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in entries:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+class TestBatchLocate:
+    """批量识别接口 /api/spec-locate/batch"""
+
+    def test_streams_in_completion_order_with_indexes(self, client, stub_pipeline):
+        stub_pipeline.delays = {10: 0.3}
+        files = [("files", (f"{value}.png", png_bytes(value), "image/png")) for value in (10, 20, 30)]
+        response = client.post("/api/spec-locate/batch", files=files)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = ndjson(response)
+        assert sorted(line["index"] for line in lines) == [0, 1, 2]
+        assert lines[-1]["index"] == 0  # 最慢的条目最后返回
+        for line in lines:
+            assert line["spec"]["code"] == f"S{(line['index'] + 1) * 10}"
+            assert line["filename"] == f"{(line['index'] + 1) * 10}.png"
+
+    def test_zip_expanded_and_filtered(self, client):
+        archive = make_zip([
+            ("a/40.png", png_bytes(40)),
+            ("__MACOSX/a/._40.png", b"resource fork"),
+            ("readme.txt", b"not an image"),
+            ("a/", b""),
+            ("b/50.jpg", cv2.imencode(".jpg", np.full((32, 32, 3), 50, np.uint8))[1].tobytes()),
+        ])
+        files = [
+            ("files", ("60.png", png_bytes(60), "image/png")),
+            ("files", ("shots.zip", archive, "application/zip")),
+        ]
+        lines = sorted(ndjson(client.post("/api/spec-locate/batch", files=files)), key=lambda line: line["index"])
+
+        assert [line["filename"] for line in lines] == ["60.png", "a/40.png", "b/50.jpg"]
+        assert [line["success"] for line in lines] == [True, True, True]
+        assert lines[1]["spec"]["code"] == "S40"
+
+    def test_bad_entry_does_not_fail_batch(self, client):
+        files = [
+            ("files", ("70.png", png_bytes(70), "image/png")),
+            ("files", ("broken.png", b"not a png", "image/png")),
+            ("files", ("notes.txt", b"text", "text/plain")),
+        ]
+        lines = sorted(ndjson(client.post("/api/spec-locate/batch", files=files)), key=lambda line: line["index"])
+        assert lines[0]["success"] is True
+        assert lines[1]["error_code"] == "INVALID_FILE"
+        assert lines[2]["error_code"] == "INVALID_FILE"
+
+    def test_bad_zip_rejected(self, client):
+        response = client.post("/api/spec-locate/batch", files=[("files", ("shots.zip", b"not a zip", "application/zip"))])
+        assert response.status_code == 400
+        assert response.json()["error_code"] == "INVALID_REQUEST"
+
+    def test_too_many_files(self, client, monkeypatch):
+        monkeypatch.setattr(APIConfig, "MAX_BATCH_FILES", 2)
+        files = [("files", (f"{value}.png", png_bytes(value), "image/png")) for value in (1, 2, 3)]
+        response = client.post("/api/spec-locate/batch", files=files)
+        assert response.status_code == 413
+        assert "3 > 2" in response.json()["message"]
+
+    def test_file_too_large_per_item(self, client, monkeypatch):
+        monkeypatch.setattr(APIConfig, "MAX_UPLOAD_SIZE", 200)
+        large = png_bytes(80) + b"\0" * 500
+        archive = make_zip([("big.png", large)])
+        files = [
+            ("files", ("big.png", large, "image/png")),
+            ("files", ("shots.zip", archive, "application/zip")),
+        ]
+        lines = ndjson(client.post("/api/spec-locate/batch", files=files))
+        assert [line["error_code"] for line in lines] == ["FILE_TOO_LARGE", "FILE_TOO_LARGE"]
+
+    def test_uploads_read_before_streaming(self):
+        """响应开始后上传文件可能已被框架关闭，条目内容必须在返回流式响应之前读取"""
+        import asyncio
+        from fastapi import UploadFile
+
+        uploads = [
+            UploadFile(io.BytesIO(png_bytes(90)), filename="90.png"),
+            UploadFile(io.BytesIO(make_zip([("a/91.png", png_bytes(91))])), filename="shots.zip"),
+        ]
+
+        async def collect_then_close():
+            items = await server._collect_batch_items(uploads)
+            for upload in uploads:
+                await upload.close()
+            return [(filename, await loader()) for filename, loader in items]
+
+        loaded = asyncio.run(collect_then_close())
+        assert loaded == [("90.png", png_bytes(90)), ("a/91.png", png_bytes(91))]
+
+    def test_server_busy_per_item(self, client, monkeypatch):
+        monkeypatch.setattr(server, "recognition_pool", FullPool())
+        monkeypatch.setattr(APIConfig, "RETRY_AFTER_SECONDS", 0)
+        files = [("files", (f"{value}.png", png_bytes(value), "image/png")) for value in (1, 2)]
+        response = client.post("/api/spec-locate/batch", files=files)
+        assert response.status_code == 200
+        assert [line["error_code"] for line in ndjson(response)] == ["SERVER_BUSY", "SERVER_BUSY"]
+
+
+class StubResultCache:
+    """始终命中的结果缓存"""
+
+    def make_key(self, digest, method, config_version):
+        return f"{digest}:{method}:{config_version}"
+
+    def get(self, key):
+        return {"success": True, "spec": {"code": "CACHED", "confidence": 0.9}}, "memory"
+
+    def put(self, key, result):
+        pass
+
+
+class StubNearDuplicateIndex:
+    """始终命中的近似重复索引"""
+
+    def lookup(self, hash_value, scope, image=None):
+        return {"success": True, "spec": {"code": "SIMILAR", "confidence": 0.9}}, 3
+
+    def add(self, *args):
+        pass
+
+
+def locate(client, endpoint, timings):
+    params = {"timings": "1"} if timings else {}
+    if endpoint == "raw":
+        return client.post("/api/spec-locate/raw", params=params, content=png_bytes(10), headers={"content-type": "image/png"})
+    return client.post("/api/spec-locate", params=params, files={"file": ("10.png", png_bytes(10), "image/png")})
+
+
+@pytest.mark.parametrize("endpoint", ["multipart", "raw"])
+class TestTimings:
+    """阶段耗时：timings 字段与 Server-Timing 响应头"""
+
+    def test_not_returned_by_default(self, client, endpoint):
+        response = locate(client, endpoint, timings=False)
+        assert response.status_code == 200
+        assert response.json()["spec"]["code"] == "S10"
+        assert "timings" not in response.json()
+        assert "server-timing" not in response.headers
+
+    def test_recognition_timings(self, client, endpoint):
+        response = locate(client, endpoint, timings=True)
+        body = response.json()
+        assert body["cache_hit"] is False
+        # API 层阶段与流水线阶段（执行池中记录）合并返回
+        assert {"decode", "cache_lookup", "recognition", "ocr"} <= set(body["timings"])
+        assert all(value >= 0 for value in body["timings"].values())
+
+        header = response.headers["server-timing"]
+        assert {entry.split(";")[0] for entry in header.split(", ")} == set(body["timings"])
+        assert f"ocr;dur={body['timings']['ocr']}" in header
+        assert response.headers["timing-allow-origin"] == "*"
+
+    def test_cache_hit_timings(self, client, endpoint, monkeypatch, stub_pipeline):
+        monkeypatch.setattr(server, "result_cache", StubResultCache())
+        response = locate(client, endpoint, timings=True)
+        body = response.json()
+        assert body["cache_hit"] is True and body["cache_tier"] == "memory"
+        assert set(body["timings"]) == {"decode", "cache_lookup"}
+        assert "cache_lookup;dur=" in response.headers["server-timing"]
+        assert stub_pipeline.calls == 0
+
+        response = locate(client, endpoint, timings=False)
+        assert "timings" not in response.json()
+        assert "server-timing" not in response.headers
+
+    def test_near_duplicate_hit_timings(self, client, endpoint, monkeypatch, stub_pipeline):
+        monkeypatch.setattr(server, "near_duplicate_index", StubNearDuplicateIndex())
+        response = locate(client, endpoint, timings=True)
+        body = response.json()
+        assert body["cache_tier"] == "near_duplicate"
+        assert body["near_duplicate_distance"] == 3
+        assert set(body["timings"]) == {"decode", "cache_lookup"}
+        assert "server-timing" in response.headers
+        assert stub_pipeline.calls == 0
+
+        response = locate(client, endpoint, timings=False)
+        assert "timings" not in response.json()
+        assert "server-timing" not in response.headers
+
+
+
+class RecordingResultCache:
+    """始终未命中、记录写入内容的结果缓存"""
+
+    def __init__(self):
+        self.stored = []
+
+    def make_key(self, digest, method, config_version):
+        return digest
+
+    def get(self, key):
+        return None, None
+
+    def put(self, key, result):
+        self.stored.append(dict(result))
+
+
+class RecordingNearDuplicateIndex:
+    """始终未命中、记录收录内容的近似重复索引"""
+
+    def __init__(self):
+        self.added = []
+
+    def lookup(self, hash_value, scope, image=None):
+        return None, None
+
+    def add(self, hash_value, scope, result, signature=None):
+        self.added.append((dict(result), signature))
+
+
+class TestInternalFields:
+    """流水线内部字段（callout_bbox）不出现在响应与缓存中"""
+
+    @pytest.mark.parametrize("endpoint", ["multipart", "raw"])
+    def test_not_in_locate_response_or_cache(self, client, monkeypatch, endpoint):
+        result_cache = RecordingResultCache()
+        index = RecordingNearDuplicateIndex()
+        monkeypatch.setattr(server, "result_cache", result_cache)
+        monkeypatch.setattr(server, "near_duplicate_index", index)
+
+        body = locate(client, endpoint, timings=False).json()
+        assert body["spec"]["code"] == "S10"
+        assert "callout_bbox" not in body
+        assert ["callout_bbox" in stored for stored in result_cache.stored] == [False]
+
+        # 标注区域仍用于近似重复索引的核对指纹
+        [(indexed, signature)] = index.added
+        assert "callout_bbox" not in indexed
+        assert signature is not None
+
+    def test_not_in_batch_lines(self, client):
+        files = [("files", (f"{value}.png", png_bytes(value), "image/png")) for value in (10, 20)]
+        lines = ndjson(client.post("/api/spec-locate/batch", files=files))
+        assert len(lines) == 2
+        assert not any("callout_bbox" in line for line in lines)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
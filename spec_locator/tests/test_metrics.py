@@ -0,0 +1,81 @@
+"""
+单元测试 - 运行指标采集
+"""
+
+import pickle
+
+import pytest
+from spec_locator.core import metrics
+from spec_locator.core.metrics import MetricsRegistry
+
+
+class TestMetricsRegistry:
+    """指标注册表与文本格式测试"""
+
+    def test_counter_render(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("test_errors_total", "Errors.", ["error_code"])
+        counter.inc(error_code="NO_TEXT")
+        counter.inc(error_code="NO_TEXT")
+
+        text = registry.render()
+        assert "# TYPE test_errors_total counter" in text
+        assert 'test_errors_total{error_code="NO_TEXT"} 2' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("test_seconds", "Latency.", ["stage"], buckets=(0.1, 1.0))
+        histogram.observe(0.05, stage="ocr")
+        histogram.observe(0.5, stage="ocr")
+        histogram.observe(5, stage="ocr")
+
+        text = registry.render()
+        assert 'test_seconds_bucket{stage="ocr",le="0.1"} 1.0' in text
+        assert 'test_seconds_bucket{stage="ocr",le="1.0"} 2.0' in text
+        assert 'test_seconds_bucket{stage="ocr",le="+Inf"} 3.0' in text
+        assert 'test_seconds_count{stage="ocr"} 3.0' in text
+
+    def test_gauge_callback(self):
+        registry = MetricsRegistry()
+        registry.gauge("test_queue_depth", "Queue depth.", callback=lambda: 3)
+        assert "test_queue_depth 3" in registry.render()
+
+
+class TestRequestTrace:
+    """请求级阶段计时测试"""
+
+    def test_stage_without_trace_is_noop(self):
+        with metrics.stage("ocr"):
+            pass
+
+    def test_stages_are_recorded(self):
+        with metrics.trace("ocr") as request_trace:
+            with metrics.stage("ocr"):
+                pass
+            with metrics.stage("file_lookup"):
+                pass
+            metrics.record_event("ocr_boxes", 12)
+
+        assert set(request_trace.stages) == {"ocr", "file_lookup"}
+        assert request_trace.events["ocr_boxes"] == 12
+        assert all(ms >= 0 for ms in request_trace.timings_ms().values())
+
+    def test_trace_is_picklable(self):
+        """进程池模式下追踪需从子进程回传"""
+        with metrics.trace("auto") as request_trace:
+            with metrics.stage("llm"):
+                pass
+        restored = pickle.loads(pickle.dumps(request_trace))
+        assert restored.method == "auto"
+        assert "llm" in restored.stages
+
+    def test_observe_trace(self):
+        request_trace = metrics.RequestTrace("llm")
+        request_trace.stages["llm"] = 1.5
+        before = metrics.STAGE_DURATION.get_count(stage="llm", method="llm")
+        metrics.observe_trace(request_trace)
+        assert metrics.STAGE_DURATION.get_count(stage="llm", method="llm") == before + 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
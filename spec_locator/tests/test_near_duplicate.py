@@ -0,0 +1,160 @@
+"""
+单元测试 - 近似重复截图识别
+"""
+
+import cv2
+import numpy as np
+import pytest
+from spec_locator.core.near_duplicate import (
+    BKTree,
+    NearDuplicateIndex,
+    callout_signature,
+    hamming_distance,
+    perceptual_hash,
+    verify_callout,
+)
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def make_drawing(offset: int = 0, text: str = "12J2 C11") -> np.ndarray:
+    """生成一张简单的 CAD 风格截图"""
+    image = np.full((400, 600, 3), 255, dtype=np.uint8)
+    cv2.circle(image, (200 + offset, 200 + offset), 60, (0, 0, 0), 2)
+    cv2.line(image, (50 + offset, 350), (550 + offset, 350), (0, 0, 0), 2)
+    cv2.putText(image, text, (300 + offset, 120 + offset), FONT, 1.5, (0, 0, 0), 3)
+    return image
+
+
+def text_bbox(offset: int = 0, text: str = "12J2 C11"):
+    """make_drawing 中标注文字的外接矩形（模拟流水线返回的 callout_bbox）"""
+    (width, height), baseline = cv2.getTextSize(text, FONT, 1.5, 3)
+    x, y = 300 + offset, 120 + offset
+    return [x, y - height, x + width, y + baseline]
+
+
+def recompress(image: np.ndarray, quality: int = 60) -> np.ndarray:
+    _, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+
+
+class TestPerceptualHash:
+    """感知哈希测试"""
+
+    def test_small_shift_is_near(self):
+        a = perceptual_hash(make_drawing(0))
+        b = perceptual_hash(make_drawing(3))
+        assert hamming_distance(a, b) <= 8
+
+    def test_recompression_is_near(self):
+        image = make_drawing(0)
+        _, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 60])
+        recompressed = cv2.imdecode(encoded, cv2.IMREAD_COLOR)
+        assert hamming_distance(perceptual_hash(image), perceptual_hash(recompressed)) <= 8
+
+    def test_different_drawing_is_far(self):
+        other = np.full((400, 600, 3), 255, dtype=np.uint8)
+        cv2.rectangle(other, (50, 50), (550, 150), (0, 0, 0), 3)
+        cv2.putText(other, "20G908-1", (60, 300), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 0), 4)
+        assert hamming_distance(perceptual_hash(make_drawing()), perceptual_hash(other)) > 8
+
+
+class TestBKTree:
+    """BK 树检索测试"""
+
+    def test_search_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        values = [int(v) for v in rng.integers(0, 2 ** 16, size=200)]
+        tree = BKTree()
+        for i, v in enumerate(values):
+            tree.add(v, i)
+
+        query = values[17] ^ 0b101
+        expected = sorted(i for i, v in enumerate(values) if hamming_distance(query, v) <= 3)
+        found = sorted(i for _, i in tree.search(query, 3))
+        assert found == expected
+
+
+class TestNearDuplicateIndex:
+    """近似重复索引测试"""
+
+    def test_only_confident_success_is_indexed(self):
+        index = NearDuplicateIndex(max_distance=4, min_confidence=0.8)
+        assert index.add(1, "ocr:v1", {"success": False}) is False
+        assert index.add(1, "ocr:v1", {"success": True, "spec": {"confidence": 0.5}}) is False
+        assert index.add(1, "ocr:v1", {"success": True, "spec": {"confidence": 0.9}}) is True
+
+    def test_lookup_respects_scope_and_distance(self):
+        index = NearDuplicateIndex(max_distance=2, min_confidence=0.8)
+        index.add(0b1111, "ocr:v1", {"success": True, "spec": {"code": "12J2", "confidence": 0.9}})
+
+        result, distance = index.lookup(0b1101, "ocr:v1")
+        assert result["spec"]["code"] == "12J2"
+        assert distance == 1
+
+        assert index.lookup(0b1101, "llm:v1") == (None, None)
+        assert index.lookup(0b0000, "ocr:v1") == (None, None)
+
+    def test_signature_entry_requires_image(self):
+        index = NearDuplicateIndex(max_distance=8, min_confidence=0.0)
+        image = make_drawing()
+        index.add(perceptual_hash(image), "s", {"success": True, "spec": {"confidence": 1.0}}, callout_signature(image, text_bbox()))
+        assert index.lookup(perceptual_hash(image), "s") == (None, None)
+        assert index.lookup(perceptual_hash(image), "s", image)[0] is not None
+
+    def test_eviction(self):
+        index = NearDuplicateIndex(max_distance=0, min_confidence=0.0, max_entries=2)
+        for value in range(10):
+            index.add(value, "s", {"success": True, "spec": {"confidence": 1.0}, "v": value})
+        assert index.lookup(0, "s") == (None, None)
+        assert index.lookup(9, "s")[0]["v"] == 9
+        assert index.stats()["entries"] == 2
+
+
+class TestCalloutVerification:
+    """标注区域核对：版面相同、标注文字不同的截图不得复用"""
+
+    @pytest.mark.parametrize("text", ["12J2 C12", "12J2 C18", "12J3 C11"])
+    def test_same_layout_different_callout_text_rejected(self, text):
+        original = make_drawing()
+        other = make_drawing(text=text)
+        # 整图哈希几乎相同，仅靠哈希会误判为重复
+        assert hamming_distance(perceptual_hash(original), perceptual_hash(other)) <= 8
+
+        index = NearDuplicateIndex(max_distance=8, min_confidence=0.8)
+        result = {"success": True, "spec": {"code": "12J2", "page": "C11", "confidence": 0.95}}
+        assert index.add(perceptual_hash(original), "ocr:v1", result, callout_signature(original, text_bbox()))
+
+        assert index.lookup(perceptual_hash(other), "ocr:v1", other) == (None, None)
+        assert index.stats()["rejected"] == 1
+
+    @pytest.mark.parametrize(
+        "variant",
+        [
+            lambda: make_drawing(),
+            lambda: make_drawing(offset=3),
+            lambda: recompress(make_drawing()),
+            lambda: recompress(make_drawing(offset=2), quality=40),
+        ],
+    )
+    def test_same_callout_accepted(self, variant):
+        original = make_drawing()
+        signature = callout_signature(original, text_bbox())
+        assert verify_callout(variant(), signature)
+
+        index = NearDuplicateIndex(max_distance=8, min_confidence=0.8)
+        result = {"success": True, "spec": {"code": "12J2", "page": "C11", "confidence": 0.95}}
+        index.add(perceptual_hash(original), "ocr:v1", result, signature)
+        image = variant()
+        found, _ = index.lookup(perceptual_hash(image), "ocr:v1", image)
+        assert found["spec"]["page"] == "C11"
+
+    def test_rescaled_screenshot(self):
+        original = make_drawing()
+        signature = callout_signature(original, text_bbox())
+        assert verify_callout(cv2.resize(original, (612, 408)), signature)
+        assert not verify_callout(cv2.resize(make_drawing(text="12J2 C12"), (612, 408)), signature)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,243 @@
+"""
+单元测试 - ONNX Runtime OCR 后端（前后处理与引擎接入，使用假推理会话）
+"""
+
+import os
+import sys
+import threading
+import time
+from types import ModuleType, SimpleNamespace
+
+import numpy as np
+import pytest
+from spec_locator.ocr.compare_backends import summarize
+from spec_locator.ocr.ocr_engine import OCREngine
+from spec_locator.ocr.onnx_backend import (
+    OnnxOCR,
+    OnnxTextDetector,
+    OnnxTextRecognizer,
+    ctc_decode,
+    db_postprocess,
+    normalize_for_recognition,
+    order_points,
+    quantize_model,
+    resize_for_detection,
+)
+
+CHARSET = ["<blank>", "1", "2", "J", "C"]
+
+
+class FakeSession:
+    """模拟 onnxruntime.InferenceSession：get_inputs() 与 run(None, feed)"""
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.batches = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="x")]
+
+    def run(self, _outputs, feed):
+        self.batches.append(feed["x"].shape)
+        return [self.fn(feed["x"])]
+
+
+def one_hot(indices, num_classes=len(CHARSET)):
+    probs = np.full((len(indices), num_classes), 0.01, dtype=np.float32)
+    probs[np.arange(len(indices)), indices] = 0.96
+    return probs
+
+
+def det_fn(x):
+    """在检测输入的固定相对位置（中部横条）输出高概率"""
+    _, _, h, w = x.shape
+    prob = np.zeros((1, 1, h, w), dtype=np.float32)
+    prob[0, 0, h // 4:h // 4 + h // 8, w // 8:w // 2] = 0.95
+    return prob
+
+
+def rec_fn(x):
+    """每个文本行都解码为 "12J2"（含重复与空白）"""
+    steps = one_hot([1, 1, 0, 2, 3, 0, 2, 0])
+    return np.repeat(steps[np.newaxis], x.shape[0], axis=0)
+
+
+class TestPostprocess:
+    """前后处理"""
+
+    def test_ctc_decode_merges_repeats_and_drops_blank(self):
+        probs = one_hot([1, 1, 0, 1, 2, 2, 0, 3])[np.newaxis]
+        [(text, score)] = ctc_decode(probs, CHARSET)
+        assert text == "112J"
+        assert score == pytest.approx(0.96)
+
+    def test_ctc_decode_all_blank(self):
+        assert ctc_decode(one_hot([0, 0, 0])[np.newaxis], CHARSET) == [("", 0.0)]
+
+    def test_resize_for_detection_multiple_of_32(self):
+        image = np.zeros((1500, 1000, 3), dtype=np.uint8)
+        resized, scale_h, scale_w = resize_for_detection(image, limit_side=960)
+        h, w = resized.shape[:2]
+        assert h % 32 == 0 and w % 32 == 0
+        assert max(h, w) <= 960 + 32
+        assert scale_h == pytest.approx(h / 1500)
+        assert scale_w == pytest.approx(w / 1000)
+
+    def test_db_postprocess_maps_back_to_original(self):
+        prob = np.zeros((64, 128), dtype=np.float32)
+        prob[20:30, 10:90] = 0.9
+        # 检测输入为原图的一半
+        boxes = db_postprocess(prob, scale_h=0.5, scale_w=0.5, image_shape=(128, 256))
+        assert boxes.shape == (1, 4, 2)
+        xs, ys = boxes[0, :, 0], boxes[0, :, 1]
+        assert xs.min() <= 20 and xs.max() >= 178
+        assert ys.min() <= 40 and ys.max() >= 58
+        assert xs.max() < 256 and ys.max() < 128
+
+    def test_db_postprocess_filters_low_score(self):
+        prob = np.zeros((64, 128), dtype=np.float32)
+        prob[20:30, 10:90] = 0.4
+        assert len(db_postprocess(prob, 1.0, 1.0, (64, 128), box_thresh=0.6)) == 0
+
+    def test_order_points(self):
+        points = np.array([[10, 10], [0, 10], [10, 0], [0, 0]], dtype=np.float32)
+        np.testing.assert_array_equal(order_points(points), [[0, 0], [10, 0], [10, 10], [0, 10]])
+
+    def test_normalize_for_recognition_pads_to_widest(self):
+        crops = [np.full((20, 40, 3), 255, np.uint8), np.full((10, 200, 3), 255, np.uint8)]
+        batch = normalize_for_recognition(crops)
+        assert batch.shape == (2, 3, 48, 960)
+        assert batch.dtype == np.float32
+        assert batch[0, :, :, :96].max() == pytest.approx(1.0)
+        assert batch[0, :, :, 200:].max() == 0.0
+
+
+class TestOnnxOCR:
+    """端到端（假会话）"""
+
+    def _ocr(self):
+        detector = OnnxTextDetector(FakeSession(det_fn), limit_side=640)
+        recognizer = OnnxTextRecognizer(FakeSession(rec_fn), CHARSET, batch_size=2)
+        return OnnxOCR(detector, recognizer)
+
+    def test_ocr_returns_paddle_format(self):
+        image = np.full((400, 600, 3), 255, dtype=np.uint8)
+        [lines] = self._ocr().ocr(image)
+        assert len(lines) == 1
+        box, (text, score) = lines[0]
+        assert text == "12J2"
+        assert score > 0.9
+        assert np.array(box).shape == (4, 2)
+
+    def test_recognizer_batches_and_keeps_order(self):
+        recognizer = OnnxTextRecognizer(FakeSession(rec_fn), CHARSET, batch_size=2)
+        crops = [np.zeros((20, w, 3), np.uint8) for w in (200, 40, 100)]
+        results, _ = recognizer(crops)
+        assert [text for text, _ in results] == ["12J2"] * 3
+        assert len(recognizer.session.batches) == 2
+
+    def test_engine_parses_onnx_results(self):
+        engine = OCREngine(lazy_load=True, backend="onnx")
+        engine.recognizer = self._ocr()
+        engine._initialized = True
+        image = np.full((400, 600, 3), 255, dtype=np.uint8)
+
+        text_boxes = engine.recognize(image)
+        assert [tb.text for tb in text_boxes] == ["12J2"]
+
+        batch = engine.recognize_batch([image, image])
+        assert [[tb.text for tb in boxes] for boxes in batch] == [["12J2"], ["12J2"]]
+
+
+class TestBackendSelection:
+    """后端选择"""
+
+    def test_unknown_backend_rejected(self):
+        with pytest.raises(ValueError):
+            OCREngine(lazy_load=True, backend="tensorrt")
+
+    def test_onnx_backend_without_models(self, monkeypatch):
+        from spec_locator.config import OCRConfig
+
+        monkeypatch.setattr(OCRConfig, "ONNX_DET_MODEL", "/nonexistent/det.onnx")
+        engine = OCREngine(lazy_load=True, backend="onnx")
+        assert engine.recognize(np.zeros((32, 32, 3), np.uint8)) == []
+        assert engine.recognizer is None
+
+
+class TestCompareBackends:
+    """后端对比汇总"""
+
+    def test_summarize_agreement_and_recall(self):
+        results = {
+            "paddle": {"a.png": {"latencies_ms": [10.0, 20.0], "text": "12J2\nC11", "boxes": 2}},
+            "onnx": {"a.png": {"latencies_ms": [5.0, 7.0], "text": "12J2\nC1", "boxes": 2}},
+        }
+        summary = summarize(results, labels={"a.png": ["12J2", "C11"]})
+        assert summary["paddle"]["agreement"] == 1.0
+        assert 0.8 < summary["onnx"]["agreement"] < 1.0
+        assert summary["paddle"]["label_recall"] == 1.0
+        assert summary["onnx"]["label_recall"] == 0.5
+        assert summary["onnx"]["p50_ms"] == 6.0
+
+
+
+class TestQuantizeModel:
+    """int8 量化模型生成（注入假的 onnxruntime.quantization）"""
+
+    @pytest.fixture
+    def quantize_calls(self, monkeypatch):
+        calls = []
+
+        def quantize_dynamic(model_path, output_path, weight_type):
+            calls.append(output_path)
+            with open(output_path, "wb") as f:
+                f.write(b"partial")
+                time.sleep(0.05)
+                if os.path.basename(model_path).startswith("broken"):
+                    raise RuntimeError("quantization failed")
+                f.write(b" int8")
+
+        quantization = ModuleType("onnxruntime.quantization")
+        quantization.QuantType = SimpleNamespace(QUInt8="QUInt8")
+        quantization.quantize_dynamic = quantize_dynamic
+        monkeypatch.setitem(sys.modules, "onnxruntime", ModuleType("onnxruntime"))
+        monkeypatch.setitem(sys.modules, "onnxruntime.quantization", quantization)
+        return calls
+
+    def test_concurrent_replicas_quantize_once(self, quantize_calls, tmp_path):
+        model = tmp_path / "rec.onnx"
+        model.write_bytes(b"fp32")
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(quantize_model(str(model)))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        output = tmp_path / "rec.int8.onnx"
+        assert results == [str(output)] * 4
+        assert len(quantize_calls) == 1
+        assert quantize_calls[0] != str(output)  # 写入临时文件
+        assert output.read_bytes() == b"partial int8"
+        assert sorted(os.listdir(tmp_path)) == ["rec.int8.onnx", "rec.onnx"]
+
+    def test_failure_leaves_no_partial_model(self, quantize_calls, tmp_path):
+        model = tmp_path / "broken.onnx"
+        model.write_bytes(b"fp32")
+        with pytest.raises(RuntimeError):
+            quantize_model(str(model))
+        assert os.listdir(tmp_path) == ["broken.onnx"]
+
+    def test_stale_model_requantized(self, quantize_calls, tmp_path):
+        model = tmp_path / "det.onnx"
+        model.write_bytes(b"fp32")
+        quantize_model(str(model))
+        output = tmp_path / "det.int8.onnx"
+        os.utime(output, (0, 0))
+        quantize_model(str(model))
+        assert len(quantize_calls) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,33 @@
+"""
+单元测试 - 识别流水线路由
+"""
+
+import numpy as np
+import pytest
+from spec_locator.core.pipeline import SpecLocatorPipeline
+
+
+class TestPipelineRouting:
+    """请求级识别方式路由测试"""
+
+    @pytest.fixture
+    def pipeline(self, tmp_path, monkeypatch):
+        pipeline = SpecLocatorPipeline(data_dir=str(tmp_path), lazy_ocr=True)
+        monkeypatch.setattr(pipeline, "_process_with_ocr", lambda image: {"route": "ocr"})
+        monkeypatch.setattr(pipeline, "_process_with_llm", lambda image: {"route": "llm"})
+        monkeypatch.setattr(pipeline, "_process_hybrid", lambda image: {"route": "auto"})
+        return pipeline
+
+    def test_default_method(self, pipeline):
+        image = np.zeros((10, 10, 3), dtype=np.uint8)
+        assert pipeline.process(image)["route"] == "ocr"
+
+    def test_method_argument_does_not_mutate_pipeline(self, pipeline):
+        image = np.zeros((10, 10, 3), dtype=np.uint8)
+        assert pipeline.process(image, method="llm")["route"] == "llm"
+        assert pipeline.process(image, method="auto")["route"] == "auto"
+        assert pipeline.recognition_method == "ocr"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,162 @@
+"""
+单元测试 - 相邻页面预览预取
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from spec_locator.database.file_index import FileIndex
+from spec_locator.preview.cache import PreviewCache, preview_key
+from spec_locator.preview.prefetch import PreviewPrefetcher
+
+
+@pytest.fixture
+def file_index(tmp_path):
+    spec_dir = tmp_path / "data" / "12J2 地下工程防水"
+    spec_dir.mkdir(parents=True)
+    for page_code in ("C1", "C2", "C3", "C10", "C11"):
+        (spec_dir / f"12J2_{page_code}.pdf").write_bytes(b"%PDF-1.4")
+    return FileIndex(str(tmp_path / "data"))
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestPreviewPrefetcher:
+    """预取测试"""
+
+    def test_index_is_in_natural_page_order(self, file_index):
+        pages = [f.page_code for f in file_index.get_spec_files("12J2")]
+        assert pages == ["C1", "C2", "C3", "C10", "C11"]
+
+    def test_renders_match_then_neighbors(self, file_index, tmp_path):
+        rendered = []
+        cache = PreviewCache(str(tmp_path / "cache"), memory_bytes=0)
+
+        def render(cache_key, *args):
+            rendered.append(cache_key)
+
+        prefetcher = PreviewPrefetcher(file_index, cache, render, neighbors=1, dpi=150, fmt="webp", interval=0)
+        match = file_index.find_file("12J2", "C3")
+        assert prefetcher.submit("12J2", match.file_path)
+        assert wait_until(lambda: len(rendered) == 3)
+        assert rendered == [preview_key("12J2", page, 1, 150, "webp", 80) for page in ("C3", "C10", "C2")]
+        prefetcher.shutdown()
+
+    def test_skips_cached_and_waits_while_busy(self, file_index, tmp_path):
+        cache = PreviewCache(str(tmp_path / "cache"), memory_bytes=0)
+        cache.put(preview_key("12J2", "C1", 1, 150, "webp", 80), b"RIFF", "webp")
+        busy = threading.Event()
+        busy.set()
+        rendered = []
+
+        prefetcher = PreviewPrefetcher(
+            file_index, cache, lambda key, *args: rendered.append(key),
+            neighbors=1, interval=0, busy=busy.is_set,
+        )
+        prefetcher.submit("12J2", file_index.find_file("12J2", "C1").file_path)
+        assert wait_until(lambda: prefetcher.stats()["skipped"] == 1)
+        time.sleep(0.1)
+        assert rendered == []  # 前台繁忙，暂停渲染
+
+        busy.clear()
+        assert wait_until(lambda: len(rendered) == 1)
+        assert rendered == [preview_key("12J2", "C2", 1, 150, "webp", 80)]
+        prefetcher.shutdown()
+
+    def test_rechecks_cache_after_waiting(self, file_index, tmp_path):
+        cache = PreviewCache(str(tmp_path / "cache"), memory_bytes=0)
+        busy = threading.Event()
+        busy.set()
+        rendered = []
+        prefetcher = PreviewPrefetcher(
+            file_index, cache, lambda key, *args: rendered.append(key),
+            neighbors=0, interval=0, busy=busy.is_set,
+        )
+        prefetcher.submit("12J2", file_index.find_file("12J2", "C1").file_path)
+        time.sleep(0.1)
+        # 等待期间前台请求渲染了该页面
+        cache.put(preview_key("12J2", "C1", 1, 150, "webp", 80), b"RIFF", "webp")
+        busy.clear()
+        assert wait_until(lambda: prefetcher.stats()["skipped"] == 1)
+        assert rendered == []
+        prefetcher.shutdown()
+
+
+class TestPrefetchSingleFlight:
+    """预取渲染与前台预览请求共用 preview_flight"""
+
+    @pytest.fixture
+    def renders(self, monkeypatch):
+        from spec_locator.api import server
+
+        calls = []
+
+        def render_preview(cache_key, *args):
+            calls.append(threading.current_thread().name)
+            time.sleep(0.2)
+            if cache_key == "broken":
+                raise RuntimeError("render failed")
+            return b"image"
+
+        monkeypatch.setattr(server, "_render_preview", render_preview)
+        return calls
+
+    def foreground(self, server, key):
+        return server.preview_flight.do(
+            key, lambda: server.run_in_threadpool(server._render_preview, key, "p.pdf", 1, 150, "webp", 80)
+        )
+
+    def test_foreground_joins_prefetch_render(self, renders):
+        from spec_locator.api import server
+
+        async def main():
+            render = server._prefetch_renderer(asyncio.get_running_loop())
+            prefetch = asyncio.get_running_loop().run_in_executor(None, render, "k", "p.pdf", 1, 150, "webp", 80)
+            while server.preview_flight.in_flight() == 0:
+                await asyncio.sleep(0.01)
+            result = await self.foreground(server, "k")
+            return result, await prefetch
+
+        (image, shared), prefetched = asyncio.run(main())
+        assert image == prefetched == b"image"
+        assert shared
+        assert len(renders) == 1
+
+    def test_prefetch_joins_foreground_render(self, renders):
+        from spec_locator.api import server
+
+        async def main():
+            render = server._prefetch_renderer(asyncio.get_running_loop())
+            foreground = asyncio.ensure_future(self.foreground(server, "k"))
+            await asyncio.sleep(0.05)
+            prefetched = await asyncio.get_running_loop().run_in_executor(None, render, "k", "p.pdf", 1, 150, "webp", 80)
+            return await foreground, prefetched
+
+        (image, shared), prefetched = asyncio.run(main())
+        assert image == prefetched == b"image"
+        assert not shared
+        assert len(renders) == 1
+
+    def test_render_error_propagates(self, renders):
+        from spec_locator.api import server
+
+        async def main():
+            render = server._prefetch_renderer(asyncio.get_running_loop())
+            return await asyncio.get_running_loop().run_in_executor(None, render, "broken", "p.pdf", 1, 150, "webp", 80)
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(main())
+        assert server.preview_flight.in_flight() == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,155 @@
+"""
+单元测试 - 预派生多进程服务与就绪状态
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import textwrap
+import time
+import urllib.request
+
+import pytest
+from fastapi.testclient import TestClient
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="需要 os.fork")
+
+SERVER_SCRIPT = textwrap.dedent(
+    """
+    import json, os, sys
+    from spec_locator.api.prefork import PreforkServer, bind_socket
+
+    PRELOADED = {}
+
+    def preload():
+        PRELOADED["pid"] = os.getpid()
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        body = json.dumps({"pid": os.getpid(), "preloaded_in": PRELOADED.get("pid")}).encode()
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json"), (b"connection", b"close")]})
+        await send({"type": "http.response.body", "body": body})
+
+    sock = bind_socket("127.0.0.1", 0)
+    print(f"PORT={sock.getsockname()[1]}", flush=True)
+    sys.exit(PreforkServer(app, workers=2, preload=preload, log_level="warning", sock=sock).run())
+    """
+)
+
+
+def fetch(port, timeout=10.0):
+    deadline = time.time() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=2) as response:
+                return json.loads(response.read())
+        except OSError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+@pytest.fixture
+def prefork_server(tmp_path):
+    pytest.importorskip("uvicorn")
+    script = tmp_path / "serve.py"
+    script.write_text(SERVER_SCRIPT, encoding="utf-8")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    process = subprocess.Popen([sys.executable, str(script)], stdout=subprocess.PIPE, env=env, text=True)
+    line = process.stdout.readline()
+    while line and not line.startswith("PORT="):
+        line = process.stdout.readline()
+    port = int(line[len("PORT="):])
+    yield process, port
+    if process.poll() is None:
+        process.kill()
+        process.wait()
+
+
+class TestPreforkServer:
+    """预派生服务测试"""
+
+    def test_workers_inherit_preloaded_state(self, prefork_server):
+        process, port = prefork_server
+        pids = set()
+        for _ in range(10):
+            data = fetch(port)
+            assert data["preloaded_in"] == process.pid
+            pids.add(data["pid"])
+        assert process.pid not in pids
+        assert 1 <= len(pids) <= 2
+
+    def test_crashed_worker_is_respawned(self, prefork_server):
+        process, port = prefork_server
+        first = fetch(port)["pid"]
+        os.kill(first, signal.SIGKILL)
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            data = fetch(port)
+            if data["pid"] != first:
+                break
+        assert data["pid"] != first
+        assert data["preloaded_in"] == process.pid
+
+    def test_sigterm_stops_master_and_workers(self, prefork_server):
+        process, port = prefork_server
+        fetch(port)
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=15) == 0
+
+
+class TestReadiness:
+    """/health 就绪状态测试"""
+
+    def test_health_unavailable_while_warming(self, monkeypatch):
+        from spec_locator.api import server
+
+        monkeypatch.setattr(server, "pipeline", object())
+        monkeypatch.setattr(server, "warmup_status", "warming")
+        response = TestClient(server.app).get("/health")
+        assert response.status_code == 503
+        assert response.json()["ready"] is False
+
+
+
+class TestPreloadPipeline:
+    """主进程预加载"""
+
+    @pytest.fixture
+    def calls(self, monkeypatch):
+        from spec_locator.api import server
+
+        calls = {"lazy_ocr": [], "warmup": 0}
+
+        def create_pipeline(lazy_ocr=None):
+            calls["lazy_ocr"].append(lazy_ocr)
+            return object(), "ocr"
+
+        def warmup():
+            calls["warmup"] += 1
+
+        monkeypatch.setattr(server, "_create_pipeline", create_pipeline)
+        monkeypatch.setattr(server, "_warmup_pipeline", warmup)
+        monkeypatch.setattr(server.PathConfig, "ensure_dirs", staticmethod(lambda: None))
+        monkeypatch.setattr(server, "pipeline", None)
+        monkeypatch.setattr(server, "pipeline_preloaded", False)
+        return calls
+
+    @pytest.mark.parametrize("backend", ["paddle", "onnx"])
+    def test_models_not_loaded_in_master(self, calls, monkeypatch, backend):
+        """onnxruntime 与 Paddle 的推理线程池都不能跨 fork 使用，主进程只创建懒加载的 Pipeline"""
+        from spec_locator.api import server
+
+        monkeypatch.setattr(server.OCRConfig, "BACKEND", backend)
+        server.preload_pipeline()
+        assert calls == {"lazy_ocr": [True], "warmup": 0}
+        assert server.pipeline_preloaded
+        assert server.warmup_status == "disabled"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,108 @@
+"""
+单元测试 - 预览图离线预渲染
+"""
+
+import os
+
+import fitz
+import pytest
+from spec_locator.database.file_index import FileIndex
+from spec_locator.preview.cache import PreviewCache, preview_key
+from spec_locator.preview import prerender
+from spec_locator.preview.prerender import Prerenderer
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    spec_dir = tmp_path / "data" / "12J2 地下工程防水"
+    spec_dir.mkdir(parents=True)
+    for page_code in ("C11", "C12"):
+        doc = fitz.open()
+        doc.new_page(width=100, height=100).insert_text((10, 50), page_code)
+        doc.save(str(spec_dir / f"12J2_{page_code}.pdf"))
+        doc.close()
+    return str(tmp_path / "data")
+
+
+class TestPrerenderer:
+    """离线预渲染测试"""
+
+    def test_renders_dpi_ladder_into_cache(self, data_dir, tmp_path):
+        cache = PreviewCache(str(tmp_path / "cache"), memory_bytes=0)
+        prerenderer = Prerenderer(FileIndex(data_dir), cache, [72, 150])
+
+        files = prerenderer.pending_files()
+        assert len(files) == 2
+        stats = prerenderer.run(files, workers=1)
+        assert stats["images"] == 4
+        assert cache.contains(preview_key("12J2", "C11", 1, 150))
+
+    def test_resume_skips_unchanged_files(self, data_dir, tmp_path):
+        cache_dir = str(tmp_path / "cache")
+        first = Prerenderer(FileIndex(data_dir), PreviewCache(cache_dir, memory_bytes=0), [72])
+        first.run(first.pending_files(), workers=1)
+
+        second = Prerenderer(FileIndex(data_dir), PreviewCache(cache_dir, memory_bytes=0), [72])
+        assert second.pending_files() == []
+
+        # 源文件变化或新增 DPI 时重新渲染
+        changed = second.file_index.get_spec_files("12J2")[0].file_path
+        os.utime(changed, (0, 0))
+        assert [f.file_path for f in second.pending_files()] == [changed]
+
+        third = Prerenderer(FileIndex(data_dir), PreviewCache(cache_dir, memory_bytes=0), [72, 150])
+        assert len(third.pending_files()) == 2
+
+    def test_running_server_cache_hits_prerendered_pages(self, data_dir, tmp_path):
+        cache_dir = str(tmp_path / "cache")
+        server_cache = PreviewCache(cache_dir)  # 预渲染前已启动的服务
+        prerenderer = Prerenderer(FileIndex(data_dir), PreviewCache(cache_dir, memory_bytes=0), [150], ["webp"])
+        prerenderer.run(prerenderer.pending_files(), workers=1)
+
+        data, tier = server_cache.get(preview_key("12J2", "C12", 1, 150, "webp", prerenderer.quality))
+        assert tier == "disk"
+        assert data[:4] == b"RIFF"
+
+    def test_removed_file_counted_as_failed(self, data_dir, tmp_path):
+        prerenderer = Prerenderer(FileIndex(data_dir), PreviewCache(str(tmp_path / "cache"), memory_bytes=0), [72])
+        files = prerenderer.pending_files()
+        os.remove(files[0].file_path)
+
+        stats = prerenderer.run(files, workers=1)
+        assert stats["failed"] == 1
+        assert stats["files"] == 1
+        assert list(prerenderer.manifest) == [files[1].file_path]
+
+    def test_bounded_in_flight(self, data_dir, tmp_path, monkeypatch):
+        monkeypatch.setattr(prerender, "IN_FLIGHT_PER_WORKER", 1)
+        prerenderer = Prerenderer(FileIndex(data_dir), PreviewCache(str(tmp_path / "cache"), memory_bytes=0), [72])
+        stats = prerenderer.run(prerenderer.pending_files(), workers=1)
+        assert stats["files"] == 2 and stats["failed"] == 0
+
+    def test_estimate_bytes(self, data_dir, tmp_path):
+        cache = PreviewCache(str(tmp_path / "cache"), memory_bytes=0)
+        prerenderer = Prerenderer(FileIndex(data_dir), cache, [72, 150])
+        files = prerenderer.pending_files()
+        estimate = prerenderer.estimate_bytes(files)
+
+        stats = prerenderer.run(files, workers=1)
+        assert estimate == pytest.approx(stats["bytes"], rel=0.2)
+        assert prerenderer.estimate_bytes([]) == 0
+
+    def test_stops_when_output_exceeds_disk_budget(self, data_dir, tmp_path, monkeypatch):
+        monkeypatch.setattr(prerender, "IN_FLIGHT_PER_WORKER", 1)
+        cache = PreviewCache(str(tmp_path / "cache"), memory_bytes=0, disk_bytes=1)
+        prerenderer = Prerenderer(FileIndex(data_dir), cache, [72])
+        stats = prerenderer.run(prerenderer.pending_files(), workers=1)
+        assert stats["files"] == 1
+        assert stats["skipped"] == 1
+
+    def test_main_refuses_when_estimate_exceeds_disk_budget(self, data_dir, tmp_path, monkeypatch):
+        monkeypatch.setattr(prerender.PreviewConfig, "DISK_BYTES", 1)
+        cache_dir = tmp_path / "cache"
+        assert prerender.main(["--data-dir", data_dir, "--cache-dir", str(cache_dir), "--workers", "1"]) == 2
+        assert not (cache_dir / prerender.MANIFEST_NAME).exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
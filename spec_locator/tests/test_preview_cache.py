@@ -0,0 +1,123 @@
+"""
+单元测试 - PDF 页面预览缓存
+"""
+
+import os
+import time
+
+import pytest
+from spec_locator.preview.cache import PreviewCache
+
+
+class TestPreviewCache:
+    """预览缓存测试"""
+
+    def test_memory_then_disk_hit(self, tmp_path):
+        cache = PreviewCache(str(tmp_path), memory_bytes=1024, disk_bytes=4096)
+        cache.put("a", b"x" * 100)
+        assert cache.get("a") == (b"x" * 100, "memory")
+
+        # 新实例从磁盘重建索引
+        reopened = PreviewCache(str(tmp_path), memory_bytes=1024, disk_bytes=4096)
+        assert reopened.get("a") == (b"x" * 100, "disk")
+        assert reopened.get("a")[1] == "memory"
+        assert reopened.get("missing") == (None, None)
+
+    def test_memory_budget(self, tmp_path):
+        cache = PreviewCache(str(tmp_path), memory_bytes=1000, disk_bytes=10000)
+        for i in range(6):
+            cache.put(f"k{i}", b"x" * 200)
+        assert cache.stats()["memory_bytes"] <= 1000
+        assert cache.get("k0")[1] == "disk"
+        assert cache.get("k5")[1] == "memory"
+
+    def test_disk_size_cap_evicts_lru(self, tmp_path):
+        cache = PreviewCache(str(tmp_path), memory_bytes=0, disk_bytes=300)
+        cache.put("a", b"1" * 100)
+        cache.put("b", b"2" * 100)
+        cache.put("c", b"3" * 100)
+        cache.get("a")  # a 变为最近访问
+        cache.put("d", b"4" * 100)
+
+        assert cache.get("b") == (None, None)
+        assert cache.get("a")[0] == b"1" * 100
+        assert cache.stats()["disk_bytes"] <= 300
+        assert len(os.listdir(tmp_path)) == 3
+
+    def test_ttl_expiry_removes_file(self, tmp_path):
+        cache = PreviewCache(str(tmp_path), memory_bytes=1024, disk_bytes=4096, ttl=0.05)
+        cache.put("a", b"x" * 10)
+        time.sleep(0.1)
+        assert cache.get("a") == (None, None)
+        assert os.listdir(tmp_path) == []
+
+    def test_formats_stored_with_extension(self, tmp_path):
+        cache = PreviewCache(str(tmp_path), memory_bytes=0)
+        cache.put("a_webp80", b"RIFF", "webp")
+        assert os.listdir(tmp_path) == [f"{cache._hash('a_webp80')}.webp"]
+
+        reopened = PreviewCache(str(tmp_path), memory_bytes=0)
+        assert reopened.get("a_webp80") == (b"RIFF", "disk")
+
+    def test_hit_ratio(self, tmp_path):
+        cache = PreviewCache(str(tmp_path))
+        cache.put("a", b"x")
+        cache.get("a")
+        cache.get("b")
+        assert cache.hit_ratio() == 0.5
+
+
+
+def dir_size(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path))
+
+
+class TestSharedCacheDirectory:
+    """多个工作进程共享缓存目录（以同一目录上的多个实例模拟）"""
+
+    def test_file_written_by_sibling_is_hit(self, tmp_path):
+        first = PreviewCache(str(tmp_path), memory_bytes=0)
+        second = PreviewCache(str(tmp_path), memory_bytes=0)
+        first.put("a_webp80", b"RIFF", "webp")
+
+        assert second.contains("a_webp80")
+        assert second.get("a_webp80") == (b"RIFF", "disk")
+        assert second.stats()["disk_entries"] == 1
+        assert not second.contains("missing")
+
+    def test_file_evicted_by_sibling_is_miss(self, tmp_path):
+        first = PreviewCache(str(tmp_path), memory_bytes=0)
+        first.put("a", b"x" * 10)
+        second = PreviewCache(str(tmp_path), memory_bytes=0)
+        os.remove(os.path.join(str(tmp_path), f"{first._hash('a')}.png"))
+
+        assert second.get("a") == (None, None)
+        assert second.stats()["disk_entries"] == 0
+
+    def test_size_cap_enforced_across_instances(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(PreviewCache, "RESCAN_INTERVAL", 0)
+        first = PreviewCache(str(tmp_path), memory_bytes=0, disk_bytes=300)
+        second = PreviewCache(str(tmp_path), memory_bytes=0, disk_bytes=300)
+        for i in range(3):
+            first.put(f"first{i}", b"1" * 100)
+            second.put(f"second{i}", b"2" * 100)
+
+        assert dir_size(tmp_path) <= 300
+        assert second.get("second2")[0] == b"2" * 100
+        assert first.get("second2")[1] == "disk"
+
+    def test_rescan_interval_limits_directory_scans(self, tmp_path):
+        first = PreviewCache(str(tmp_path), memory_bytes=0, disk_bytes=300)
+        second = PreviewCache(str(tmp_path), memory_bytes=0, disk_bytes=300)
+        for i in range(3):
+            first.put(f"first{i}", b"1" * 100)
+        second.put("second", b"2" * 100)
+        assert dir_size(tmp_path) == 400  # 下次重新扫描前只按本进程计数淘汰
+
+        second._last_scan = 0
+        second.put("second", b"2" * 100)
+        assert dir_size(tmp_path) <= 300
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,74 @@
+"""
+单元测试 - PDF 页面渲染
+"""
+
+import cv2
+import fitz
+import numpy as np
+import pytest
+from spec_locator.preview.renderer import (
+    PageOutOfRangeError,
+    TileOutOfRangeError,
+    render_page,
+    render_tile,
+    tile_grid,
+    tile_scale,
+)
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "sample.pdf"
+    doc = fitz.open()
+    for text in ("C11", "C12"):
+        page = doc.new_page(width=200, height=100)
+        page.insert_text((20, 50), text, fontsize=24)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+class TestRenderPage:
+    """页面渲染测试"""
+
+    def test_render_scales_with_dpi(self, pdf_path):
+        image = cv2.imdecode(np.frombuffer(render_page(pdf_path, 2, 144), np.uint8), cv2.IMREAD_COLOR)
+        assert image.shape[:2] == (200, 400)
+
+    @pytest.mark.parametrize("fmt, magic", [("png", b"\x89PNG"), ("jpeg", b"\xff\xd8"), ("webp", b"RIFF")])
+    def test_output_formats(self, pdf_path, fmt, magic):
+        data = render_page(pdf_path, 1, 72, fmt, quality=70)
+        assert data.startswith(magic)
+        image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+        assert image.shape[:2] == (100, 200)
+
+    def test_page_out_of_range(self, pdf_path):
+        with pytest.raises(PageOutOfRangeError) as exc_info:
+            render_page(pdf_path, 3, 72)
+        assert exc_info.value.total_pages == 2
+
+
+class TestRenderTile:
+    """瓦片渲染测试"""
+
+    def test_tile_scale(self):
+        assert tile_scale(4, 4, 288) == 4.0
+        assert tile_scale(2, 4, 288) == 1.0
+
+    def test_tiles_cover_page(self, pdf_path):
+        # 200x100 点的页面在 2 倍缩放下为 400x200 像素，128 像素瓦片为 4 列 2 行
+        columns, rows = tile_grid(200, 100, 2.0, 128)
+        assert (columns, rows) == (4, 2)
+
+        def decode(data):
+            return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+        assert decode(render_tile(pdf_path, 1, 2.0, 0, 0, 128)).shape[:2] == (128, 128)
+        assert decode(render_tile(pdf_path, 1, 2.0, 3, 1, 128)).shape[:2] == (72, 16)  # 右下角边缘瓦片
+
+        with pytest.raises(TileOutOfRangeError):
+            render_tile(pdf_path, 1, 2.0, 4, 0, 128)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,75 @@
+"""
+单元测试 - 识别结果缓存
+"""
+
+import numpy as np
+import pytest
+from spec_locator.core import result_cache as result_cache_module
+from spec_locator.core.result_cache import ResultCache, image_digest
+
+
+class TestImageDigest:
+    """图像内容哈希测试"""
+
+    def test_same_content_same_digest(self):
+        a = np.zeros((10, 10, 3), dtype=np.uint8)
+        b = np.zeros((10, 10, 3), dtype=np.uint8)
+        assert image_digest(a) == image_digest(b)
+
+    def test_shape_is_part_of_digest(self):
+        a = np.zeros((10, 20, 3), dtype=np.uint8)
+        b = np.zeros((20, 10, 3), dtype=np.uint8)
+        assert image_digest(a) != image_digest(b)
+
+
+class TestResultCache:
+    """两级结果缓存测试"""
+
+    def test_memory_hit(self):
+        cache = ResultCache(max_entries=4, ttl=60)
+        key = cache.make_key("abc", "ocr", "v1")
+        assert cache.get(key) == (None, None)
+
+        cache.put(key, {"success": True, "spec": {"code": "12J2"}})
+        result, tier = cache.get(key)
+        assert tier == "memory"
+        assert result["spec"]["code"] == "12J2"
+
+    def test_returned_result_is_a_copy(self):
+        cache = ResultCache(max_entries=4, ttl=60)
+        cache.put("k", {"success": True})
+        result, _ = cache.get("k")
+        result["cache_hit"] = True
+        assert "cache_hit" not in cache.get("k")[0]
+
+    def test_lru_eviction(self):
+        cache = ResultCache(max_entries=2, ttl=60)
+        cache.put("a", {"v": 1})
+        cache.put("b", {"v": 2})
+        cache.get("a")
+        cache.put("c", {"v": 3})
+        assert cache.get("b") == (None, None)
+        assert cache.get("a")[0] == {"v": 1}
+
+    def test_ttl_expiry(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(result_cache_module.time, "time", lambda: now[0])
+        cache = ResultCache(max_entries=4, ttl=10)
+        cache.put("k", {"v": 1})
+        now[0] += 11
+        assert cache.get("k") == (None, None)
+
+    def test_disk_tier_survives_restart(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+        cache = ResultCache(max_entries=4, ttl=60, disk_path=path)
+        cache.put("k", {"v": 1})
+        cache.close()
+
+        reopened = ResultCache(max_entries=4, ttl=60, disk_path=path)
+        assert reopened.get("k") == ({"v": 1}, "disk")
+        assert reopened.get("k") == ({"v": 1}, "memory")
+        reopened.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
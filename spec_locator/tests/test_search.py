@@ -0,0 +1,152 @@
+"""
+单元测试 - 全文检索（分词、倒排索引、离线建索引）
+"""
+
+import os
+
+import fitz
+import pytest
+from spec_locator.database.file_index import FileIndex
+from spec_locator.search import SearchIndex, make_snippet, tokenize
+from spec_locator.search.indexer import Indexer, extract_page_texts
+
+
+def make_pdf(path, texts):
+    doc = fitz.open()
+    for text in texts:
+        page = doc.new_page(width=400, height=300)
+        if text:
+            page.insert_text((20, 40), text, fontname="china-s", fontsize=12)
+    doc.save(str(path))
+    doc.close()
+
+
+@pytest.fixture
+def index(tmp_path):
+    search_index = SearchIndex(str(tmp_path / "search.sqlite3"))
+    search_index.replace_file("/a.pdf", 1.0, 10, "12J2", "C11", "12J2_C11.pdf", [(1, "女儿墙泛水做法 详图", "text")])
+    search_index.replace_file("/b.pdf", 1.0, 10, "12J2", "C12", "12J2_C12.pdf", [(1, "墙身防水 泛水收头", "text")])
+    search_index.replace_file("/c.pdf", 1.0, 10, "11J930", "A1", "11J930_A1.pdf", [(1, "女儿墙 压顶", "text")])
+    yield search_index
+    search_index.close()
+
+
+class TestTokenizer:
+    """分词测试"""
+
+    def test_chinese_bigrams(self):
+        assert tokenize("女儿墙泛水") == ["女儿", "儿墙", "墙泛", "泛水"]
+
+    def test_alnum_words_lowercased_and_fullwidth_normalized(self):
+        assert tokenize("12J2 Ｃ11") == ["12j2", "c11"]
+
+    def test_line_break_inside_chinese_title(self):
+        assert tokenize("女儿墙\n泛水") == tokenize("女儿墙泛水")
+
+    def test_single_char(self):
+        assert tokenize("墙") == ["墙"]
+
+
+class TestSearchIndex:
+    """倒排索引测试"""
+
+    def test_exact_phrase_ranks_first(self, index):
+        hits = index.search("女儿墙泛水")
+        assert [hit["page_code"] for hit in hits][:1] == ["C11"]
+        assert hits[0]["exact"] is True
+        assert hits[0]["matched_terms"] == 1.0
+        assert {hit["page_code"] for hit in hits} == {"C11", "C12", "A1"}
+
+    def test_spec_filter(self, index):
+        hits = index.search("女儿墙", spec_code="11j930")
+        assert [hit["spec_code"] for hit in hits] == ["11J930"]
+
+    def test_no_match(self, index):
+        assert index.search("楼梯栏杆") == []
+        assert index.search("   ") == []
+
+    def test_limit(self, index):
+        assert len(index.search("墙", limit=1)) <= 1
+        assert len(index.search("泛水", limit=1)) == 1
+
+    def test_replace_and_remove(self, index):
+        index.replace_file("/a.pdf", 2.0, 20, "12J2", "C11", "12J2_C11.pdf", [(1, "变形缝", "ocr")])
+        assert index.file_state("/a.pdf") == (2.0, 20)
+        assert [hit["page_code"] for hit in index.search("变形缝")] == ["C11"]
+        assert all(hit["page_code"] != "C11" for hit in index.search("女儿墙泛水"))
+
+        index.remove_file("/a.pdf")
+        assert index.search("变形缝") == []
+        assert index.file_state("/a.pdf") is None
+        assert index.stats()["files"] == 2
+
+    def test_readonly_reopen(self, index, tmp_path):
+        reader = SearchIndex(index.index_path, readonly=True)
+        try:
+            assert reader.search("压顶")[0]["page_code"] == "A1"
+        finally:
+            reader.close()
+
+    def test_readonly_missing_file(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            SearchIndex(str(tmp_path / "missing.sqlite3"), readonly=True)
+
+    def test_snippet(self):
+        text = "说明 " * 20 + "女儿墙泛水做法" + " 详图" * 20
+        snippet = make_snippet(text, "女儿墙泛水")
+        assert "女儿墙泛水" in snippet
+        assert snippet.startswith("…") and snippet.endswith("…")
+
+
+class TestIndexer:
+    """离线建索引测试"""
+
+    def test_extract_text_layer(self, tmp_path):
+        make_pdf(tmp_path / "a.pdf", ["女儿墙泛水做法", "雨水口"])
+        pages = extract_page_texts(str(tmp_path / "a.pdf"))
+        assert [(number, source) for number, _, source in pages] == [(1, "text"), (2, "text")]
+        assert "女儿墙泛水做法" in pages[0][1]
+
+    def test_ocr_fallback_for_pages_without_text(self, tmp_path):
+        make_pdf(tmp_path / "a.pdf", ["女儿墙泛水做法", ""])
+        calls = []
+
+        def fake_ocr(image):
+            calls.append(image.shape)
+            return "扫描页 变形缝"
+
+        pages = extract_page_texts(str(tmp_path / "a.pdf"), ocr=fake_ocr, min_chars=5)
+        assert len(calls) == 1
+        assert pages[1][1:] == ("扫描页 变形缝", "ocr")
+        assert pages[0][2] == "text"
+
+    def test_incremental_run(self, tmp_path):
+        spec_dir = tmp_path / "data" / "12J2 地下工程防水"
+        spec_dir.mkdir(parents=True)
+        make_pdf(spec_dir / "12J2_C11.pdf", ["女儿墙泛水做法"])
+        make_pdf(spec_dir / "12J2_C12.pdf", ["变形缝"])
+        file_index = FileIndex(str(tmp_path / "data"), collect_metadata=False)
+        search_index = SearchIndex(str(tmp_path / "search.sqlite3"))
+        indexer = Indexer(file_index, search_index)
+
+        stats = indexer.run(indexer.pending_files())
+        assert stats["files"] == 2
+        assert indexer.pending_files() == []
+        assert search_index.search("泛水")[0]["page_code"] == "C11"
+
+        path = str(spec_dir / "12J2_C12.pdf")
+        make_pdf(path, ["后浇带"])
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+        assert [f.page_code for f in indexer.pending_files()] == ["C12"]
+
+        os.remove(spec_dir / "12J2_C11.pdf")
+        file_index = FileIndex(str(tmp_path / "data"), collect_metadata=False)
+        indexer = Indexer(file_index, search_index)
+        assert indexer.remove_deleted() == 1
+        assert search_index.search("泛水") == []
+        search_index.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
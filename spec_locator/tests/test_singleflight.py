@@ -0,0 +1,79 @@
+"""
+单元测试 - 请求合并（single-flight）
+"""
+
+import asyncio
+
+import pytest
+from spec_locator.api.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """single-flight 合并器测试"""
+
+    def test_concurrent_calls_share_one_computation(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"value": 42}
+
+        async def scenario():
+            return await asyncio.gather(*(flight.do("k", compute) for _ in range(5)))
+
+        results = asyncio.run(scenario())
+        assert len(calls) == 1
+        assert all(result == {"value": 42} for result, _ in results)
+        assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+        assert flight.in_flight() == 0
+
+    def test_different_keys_run_separately(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def compute(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key
+
+        async def scenario():
+            return await asyncio.gather(
+                flight.do("a", lambda: compute("a")),
+                flight.do("b", lambda: compute("b")),
+            )
+
+        asyncio.run(scenario())
+        assert sorted(calls) == ["a", "b"]
+
+    def test_leader_cancellation_does_not_affect_followers(self):
+        flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        async def scenario():
+            leader = asyncio.ensure_future(flight.do("k", compute))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.do("k", compute))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        assert asyncio.run(scenario()) == ("done", True)
+
+    def test_exception_is_propagated(self):
+        flight = SingleFlight()
+
+        async def compute():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(flight.do("k", compute))
+        assert flight.in_flight() == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
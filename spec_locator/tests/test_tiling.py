@@ -0,0 +1,171 @@
+"""
+单元测试 - 大图分块识别
+"""
+
+import threading
+
+import cv2
+import numpy as np
+import pytest
+from spec_locator.ocr.engine_pool import OCREnginePool
+from spec_locator.ocr.ocr_engine import OCREngine, TextBox
+from spec_locator.ocr.tiling import compute_tiles, merge_tile_results, needs_tiling, split_image
+
+# 灰度值 -> 文本（假识别器按色块灰度"识别"文本）
+TEXTS = {200: "12J2", 220: "C11", 240: "05J909"}
+
+
+class BlockRecognizer:
+    """假识别器：将图像中的每个色块识别为对应的文本，返回 PaddleOCR 2.x 格式"""
+
+    def __init__(self):
+        self.calls = 0
+        self.sizes = []
+        self.lock = threading.Lock()
+
+    def ocr(self, image):
+        with self.lock:
+            self.calls += 1
+            self.sizes.append(image.shape[:2])
+        gray = image if image.ndim == 2 else image[:, :, 0]
+        lines = []
+        for value, text in TEXTS.items():
+            mask = (gray == value).astype(np.uint8)
+            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            for contour in contours:
+                x, y, w, h = cv2.boundingRect(contour)
+                box = [[x, y], [x + w, y], [x + w, y + h], [x, y + h]]
+                lines.append([box, (text, 0.95)])
+        return [lines]
+
+
+def make_engine(threshold=1000, tile_size=800, overlap=200):
+    engine = OCREngine(lazy_load=True, tile_threshold=threshold, tile_size=tile_size, tile_overlap=overlap)
+    engine.recognizer = BlockRecognizer()
+    engine._initialized = True
+    return engine
+
+
+def make_sheet():
+    """3000x1200 的图纸，其中一个色块横跨分块接缝"""
+    image = np.zeros((1200, 3000, 3), dtype=np.uint8)
+    image[100:140, 100:300] = 200
+    image[500:540, 700:860] = 220  # 位于第 1、2 列分块的重叠区域
+    image[1000:1040, 2600:2900] = 240
+    return image
+
+
+def text_box(text, x0, y0, x1, y1, confidence=0.9):
+    return TextBox(text=text, confidence=confidence, bbox=((x0, y0), (x1, y0), (x1, y1), (x0, y1)))
+
+
+class TestComputeTiles:
+    """分块划分"""
+
+    def test_small_image_single_tile(self):
+        assert compute_tiles(500, 600, 800, 100) == [(0, 0, 600, 500)]
+
+    def test_tiles_cover_image_with_overlap(self):
+        tiles = compute_tiles(1200, 3000, 800, 200)
+        covered = np.zeros((1200, 3000), dtype=bool)
+        for x0, y0, x1, y1 in tiles:
+            assert x1 - x0 <= 800 and y1 - y0 <= 800
+            covered[y0:y1, x0:x1] = True
+        assert covered.all()
+        xs = sorted({x0 for x0, _, _, _ in tiles})
+        assert xs[0] == 0 and max(x1 for _, _, x1, _ in tiles) == 3000
+        assert all(800 - (b - a) >= 200 for a, b in zip(xs, xs[1:]))
+
+    def test_split_image_views(self):
+        image = np.arange(100 * 150, dtype=np.uint16).reshape(100, 150)
+        for (x0, y0, x1, y1), tile in split_image(image, 64, 16):
+            np.testing.assert_array_equal(tile, image[y0:y1, x0:x1])
+
+    def test_needs_tiling(self):
+        image = np.zeros((10, 3000), dtype=np.uint8)
+        assert needs_tiling(image, 2560)
+        assert not needs_tiling(image, 0)
+        assert not needs_tiling(image, 4096)
+
+
+class TestMerge:
+    """分块结果合并"""
+
+    tiles = [(0, 0, 600, 400), (400, 0, 1000, 400)]
+
+    def test_offsets_to_global_coordinates(self):
+        merged = merge_tile_results(self.tiles, [[], [text_box("C11", 300, 50, 400, 80)]], (400, 1000))
+        assert merged[0].bbox == ((700, 50), (800, 50), (800, 80), (700, 80))
+
+    def test_duplicate_in_overlap_removed(self):
+        results = [
+            [text_box("12J2", 450, 100, 550, 130, confidence=0.8)],
+            [text_box("12J2", 51, 101, 151, 131, confidence=0.9)],
+        ]
+        merged = merge_tile_results(self.tiles, results, (400, 1000))
+        assert len(merged) == 1
+        assert merged[0].confidence == 0.9
+
+    def test_cut_fragment_replaced_by_complete_box(self):
+        results = [
+            [text_box("05J9", 500, 100, 600, 130, confidence=0.99)],  # 被左侧分块右边界截断
+            [text_box("05J909", 100, 100, 250, 130, confidence=0.9)],
+        ]
+        merged = merge_tile_results(self.tiles, results, (400, 1000))
+        assert [tb.text for tb in merged] == ["05J909"]
+
+    def test_fragments_across_seam_joined(self):
+        results = [
+            [text_box("12J2-C1", 300, 100, 600, 130)],  # 截断于 x=600
+            [text_box("2-C11", 0, 101, 260, 131)],  # 截断于 x=400
+        ]
+        merged = merge_tile_results(self.tiles, results, (400, 1000))
+        assert [tb.text for tb in merged] == ["12J2-C11"]
+        assert merged[0].bbox[0] == (300, 100) and merged[0].bbox[2] == (660, 131)
+
+    def test_image_border_is_not_seam(self):
+        results = [[text_box("A1", 0, 0, 40, 20)], [text_box("B2", 560, 0, 600, 20)]]
+        merged = merge_tile_results(self.tiles, results, (400, 1000))
+        assert sorted(tb.text for tb in merged) == ["A1", "B2"]
+
+
+class TestTiledEngine:
+    """OCREngine / OCREnginePool 分块识别"""
+
+    def test_small_image_not_tiled(self):
+        engine = make_engine()
+        engine.recognize(np.zeros((600, 900, 3), dtype=np.uint8))
+        assert engine.recognizer.calls == 1
+
+    def test_large_image_tiled_and_merged(self):
+        engine = make_engine()
+        text_boxes = engine.recognize(make_sheet())
+
+        assert engine.recognizer.calls > 1
+        assert all(max(size) <= 800 for size in engine.recognizer.sizes)
+        assert [tb.text for tb in text_boxes] == ["12J2", "C11", "05J909"]
+        assert text_boxes[1].bbox[0] == (700, 500)
+        assert text_boxes[2].bbox[2] == (2900, 1040)
+
+    def test_batch_mixes_tiled_and_plain_images(self):
+        engine = make_engine()
+        small = np.zeros((300, 300, 3), dtype=np.uint8)
+        small[10:30, 10:60] = 220
+        results = engine.recognize_batch([small, make_sheet()])
+        assert [[tb.text for tb in boxes] for boxes in results] == [["C11"], ["12J2", "C11", "05J909"]]
+
+    def test_pool_spreads_tiles_across_replicas(self):
+        pool = OCREnginePool(
+            replicas=2,
+            engine_factory=make_engine,
+            tile_threshold=1000,
+            tile_size=800,
+            tile_overlap=200,
+        )
+        text_boxes = pool.recognize(make_sheet())
+        assert [tb.text for tb in text_boxes] == ["12J2", "C11", "05J909"]
+        assert all(engine.recognizer.calls > 0 for engine in pool.engines)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
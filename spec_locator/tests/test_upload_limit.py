@@ -0,0 +1,61 @@
+"""
+单元测试 - 上传大小限制中间件
+"""
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from spec_locator.api.upload_limit import UploadSizeLimitMiddleware
+
+
+def make_client(limit: int) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, limits={"/upload": limit})
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        size = 0
+        async for chunk in request.stream():
+            size += len(chunk)
+        return {"size": size}
+
+    @app.post("/other")
+    async def other(request: Request):
+        return {"size": len(await request.body())}
+
+    return TestClient(app)
+
+
+class TestUploadSizeLimitMiddleware:
+    """上传大小限制测试"""
+
+    def test_within_limit(self):
+        client = make_client(1024)
+        response = client.post("/upload", content=b"x" * 1024)
+        assert response.status_code == 200
+        assert response.json() == {"size": 1024}
+
+    def test_declared_length_rejected_early(self):
+        client = make_client(1024)
+        response = client.post("/upload", content=b"x" * 2048)
+        assert response.status_code == 413
+        assert response.json()["message"] == "File too large"
+
+    def test_chunked_body_aborted(self):
+        client = make_client(1024)
+
+        def chunks():
+            for _ in range(8):
+                yield b"x" * 512
+
+        response = client.post("/upload", content=chunks())
+        assert response.status_code == 413
+
+    def test_unlisted_path_not_limited(self):
+        client = make_client(1024)
+        response = client.post("/other", content=b"x" * 4096)
+        assert response.status_code == 200
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,59 @@
+"""
+单元测试 - 识别执行池
+"""
+
+import asyncio
+import threading
+
+import pytest
+from spec_locator.api.worker_pool import RecognitionPool, PoolFullError
+
+
+class TestRecognitionPool:
+    """有界识别执行池测试"""
+
+    def test_run_returns_result(self):
+        pool = RecognitionPool(max_workers=1, queue_size=0)
+        try:
+            result = asyncio.run(pool.run(lambda x: x * 2, 21))
+            assert result == 42
+            assert pool.stats()["active"] == 0
+        finally:
+            pool.shutdown(wait=True)
+
+    def test_rejects_when_full(self):
+        """正在执行 + 排队达到上限时立即拒绝"""
+        pool = RecognitionPool(max_workers=1, queue_size=1)
+        release = threading.Event()
+
+        async def scenario():
+            first = asyncio.ensure_future(pool.run(release.wait))
+            second = asyncio.ensure_future(pool.run(release.wait))
+            await asyncio.sleep(0.05)
+
+            stats = pool.stats()
+            assert stats["active"] == 1
+            assert stats["queue_depth"] == 1
+
+            with pytest.raises(PoolFullError):
+                await pool.run(release.wait)
+
+            release.set()
+            await asyncio.gather(first, second)
+
+        try:
+            asyncio.run(scenario())
+            stats = pool.stats()
+            assert stats["rejected"] == 1
+            assert stats["queue_depth"] == 0
+        finally:
+            release.set()
+            pool.shutdown(wait=True)
+
+    def test_invalid_executor(self):
+        with pytest.raises(ValueError):
+            RecognitionPool(executor="gpu")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])